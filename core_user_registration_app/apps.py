@@ -1,22 +1,13 @@
 """ Apps file for setting core package when app is ready
 """
-import sys
-
 from django.apps import AppConfig
 
 
 class UserRegistrationAppConfig(AppConfig):
-    """Core application settings."""
-
-    name = "core_user_registration_app"
+    """Core application settings.
 
-    def ready(self):
-        """Run when the app is ready.
+    The registration app is initialized by the init_registration_app management
+    command, or lazily by the first registration request of each process.
+    """
 
-        Returns:
-
-        """
-        if "migrate" not in sys.argv:
-            import core_user_registration_app.discover as discover
-
-            discover.init_registration_app()
+    name = "core_user_registration_app"
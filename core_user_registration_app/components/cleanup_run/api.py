@@ -0,0 +1,42 @@
+""" Cleanup Run api
+"""
+from datetime import timedelta
+
+from core_main_app.access_control.api import has_perm_administration
+from core_main_app.access_control.decorators import access_control
+from core_main_app.utils.datetime_tools.utils import datetime_now
+from core_user_registration_app.components.cleanup_run.models import CleanupRun
+from core_user_registration_app.settings import CLEANUP_RUN_HISTORY_RETENTION
+
+
+def upsert(cleanup_run):
+    """Save or update the cleanup run, and delete the runs of the same cleanup
+    older than CLEANUP_RUN_HISTORY_RETENTION
+
+    Args:
+        cleanup_run:
+
+    Returns:
+
+    """
+    saved_cleanup_run = cleanup_run.save_object()
+    if CLEANUP_RUN_HISTORY_RETENTION > 0:
+        CleanupRun.delete_all_by_name_started_before(
+            cleanup_run.name,
+            datetime_now() - timedelta(seconds=CLEANUP_RUN_HISTORY_RETENTION),
+        )
+    return saved_cleanup_run
+
+
+@access_control(has_perm_administration)
+def get_all_by_name(name, user):
+    """Return the history of the cleanup with the given name, latest first
+
+    Args:
+        name:
+        user:
+
+    Returns:
+
+    """
+    return CleanupRun.get_all_by_name(name)
@@ -0,0 +1,58 @@
+""" Cleanup Run model
+"""
+from django_mongoengine import fields, Document
+
+from core_main_app.commons import exceptions
+
+
+class CleanupRun(Document):
+    """Counters and timings of a cleanup task run"""
+
+    name = fields.StringField()
+    start_date = fields.DateTimeField()
+    end_date = fields.DateTimeField(blank=True)
+    dry_run = fields.BooleanField(default=False)
+    elements_scanned = fields.IntField(default=0)
+    structures_expired = fields.IntField(default=0)
+    elements_deleted = fields.IntField(default=0)
+    bytes_reclaimed = fields.IntField(default=0)
+    phase_durations = fields.DictField(default={}, blank=True)
+
+    meta = {"indexes": [("name", "-start_date")]}
+
+    def save_object(self):
+        """Custom save
+
+        Returns:
+
+        """
+        try:
+            return self.save()
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def get_all_by_name(name):
+        """Return the runs of the cleanup with the given name, latest first.
+
+        Args:
+            name:
+
+        Returns:
+
+        """
+        return CleanupRun.objects(name=name).order_by("-start_date")
+
+    @staticmethod
+    def delete_all_by_name_started_before(name, date):
+        """Delete the runs of the cleanup with the given name started before a date.
+
+        Args:
+            name:
+            date:
+
+        Returns:
+            number of deleted runs
+
+        """
+        return CleanupRun.objects(name=name, start_date__lt=date).delete()
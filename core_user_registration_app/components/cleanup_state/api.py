@@ -0,0 +1,68 @@
+""" Cleanup State api
+"""
+import pytz
+from django.utils import timezone
+
+from core_main_app.commons import exceptions
+from core_main_app.utils.datetime_tools.utils import datetime_now
+from core_user_registration_app.components.cleanup_state.models import CleanupState
+
+
+def get_by_name(name):
+    """Return the cleanup state with the given name
+
+    Args:
+        name:
+
+    Returns:
+
+    """
+    return CleanupState.get_by_name(name)
+
+
+def get_or_create(name):
+    """Return the cleanup state with the given name, or a new unsaved one
+
+    Args:
+        name:
+
+    Returns:
+
+    """
+    try:
+        return get_by_name(name)
+    except exceptions.DoesNotExist:
+        return CleanupState(name=name)
+
+
+def upsert(cleanup_state):
+    """Save or update the cleanup state
+
+    Args:
+        cleanup_state:
+
+    Returns:
+
+    """
+    return cleanup_state.save_object()
+
+
+def is_due(name):
+    """Return True if the next run of the cleanup with the given name is due
+
+    Args:
+        name:
+
+    Returns:
+
+    """
+    try:
+        next_run_date = CleanupState.get_by_name(name).next_run_date
+    except exceptions.DoesNotExist:
+        return True
+    if next_run_date is None:
+        return True
+    # dates are read back from the database without timezone
+    if timezone.is_naive(next_run_date):
+        next_run_date = timezone.make_aware(next_run_date, pytz.utc)
+    return next_run_date <= datetime_now()
@@ -0,0 +1,48 @@
+""" Cleanup State model
+"""
+from django_mongoengine import fields, Document
+from mongoengine import errors as mongoengine_errors
+from mongoengine.errors import NotUniqueError
+
+from core_main_app.commons import exceptions
+
+
+class CleanupState(Document):
+    """State of a periodic cleanup task, kept between two runs"""
+
+    name = fields.StringField(unique=True)
+    watermark = fields.ObjectIdField(blank=True)
+    next_run_date = fields.DateTimeField(blank=True)
+    interval = fields.IntField(blank=True)
+    batch_size = fields.IntField(blank=True)
+
+    def save_object(self):
+        """Custom save
+
+        Returns:
+
+        """
+        try:
+            return self.save()
+        except NotUniqueError:
+            raise exceptions.ModelError("Unable to save the document: not unique.")
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def get_by_name(name):
+        """Return the cleanup state with the given name.
+
+        Args:
+            name:
+
+        Returns:
+            CleanupState (obj): CleanupState object with the given name
+
+        """
+        try:
+            return CleanupState.objects.get(name=name)
+        except mongoengine_errors.DoesNotExist as e:
+            raise exceptions.DoesNotExist(str(e))
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
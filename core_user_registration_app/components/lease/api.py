@@ -0,0 +1,35 @@
+""" Lease api
+"""
+from datetime import timedelta
+
+from core_main_app.utils.datetime_tools.utils import datetime_now
+from core_user_registration_app.components.lease.models import Lease
+
+
+def acquire(name, owner, duration):
+    """Acquire a lease for a duration
+
+    Args:
+        name: lease name
+        owner: unique id of the caller
+        duration: lease duration in seconds
+
+    Returns:
+        True if the lease was acquired, False if another owner holds it
+
+    """
+    now = datetime_now()
+    return Lease.acquire(name, owner, now, now + timedelta(seconds=duration))
+
+
+def release(name, owner):
+    """Release a lease held by an owner
+
+    Args:
+        name:
+        owner:
+
+    Returns:
+
+    """
+    Lease.release(name, owner)
@@ -0,0 +1,81 @@
+""" Lease model
+"""
+from django_mongoengine import fields, Document
+from mongoengine import errors as mongoengine_errors
+from mongoengine.errors import NotUniqueError
+
+from core_main_app.commons import exceptions
+
+
+class Lease(Document):
+    """Named lock held by a single owner until its expiration date"""
+
+    name = fields.StringField(unique=True)
+    owner = fields.StringField()
+    expiration_date = fields.DateTimeField()
+
+    @staticmethod
+    def get_by_name(name):
+        """Return the lease with the given name.
+
+        Args:
+            name:
+
+        Returns:
+            Lease (obj): Lease object with the given name
+
+        """
+        try:
+            return Lease.objects.get(name=name)
+        except mongoengine_errors.DoesNotExist as e:
+            raise exceptions.DoesNotExist(str(e))
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def acquire(name, owner, now, expiration_date):
+        """Take the lease if it is free, expired or already held by the owner.
+
+        The check and the update are done by a single atomic query. When another
+        owner holds the lease, the upsert collides with the unique name.
+
+        Args:
+            name:
+            owner:
+            now:
+            expiration_date:
+
+        Returns:
+            True if the lease was acquired
+
+        """
+        try:
+            lease = Lease.objects(
+                __raw__={
+                    "name": name,
+                    "$or": [{"expiration_date": {"$lt": now}}, {"owner": owner}],
+                }
+            ).modify(
+                upsert=True,
+                new=True,
+                set__owner=owner,
+                set__expiration_date=expiration_date,
+            )
+        except NotUniqueError:
+            return False
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+        return lease is not None
+
+    @staticmethod
+    def release(name, owner):
+        """Release the lease if held by the owner.
+
+        Args:
+            name:
+            owner:
+
+        Returns:
+
+        """
+        Lease.objects(name=name, owner=owner).delete()
@@ -0,0 +1,45 @@
+""" Startup Fingerprint api
+"""
+from core_main_app.commons import exceptions
+from core_user_registration_app.components.startup_fingerprint.models import (
+    StartupFingerprint,
+)
+
+
+def get_by_name(name):
+    """Return the startup fingerprint with the given name
+
+    Args:
+        name:
+
+    Returns:
+
+    """
+    return StartupFingerprint.get_by_name(name)
+
+
+def get_or_create(name):
+    """Return the startup fingerprint with the given name, or a new unsaved one
+
+    Args:
+        name:
+
+    Returns:
+
+    """
+    try:
+        return get_by_name(name)
+    except exceptions.DoesNotExist:
+        return StartupFingerprint(name=name)
+
+
+def upsert(startup_fingerprint):
+    """Save or update the startup fingerprint
+
+    Args:
+        startup_fingerprint:
+
+    Returns:
+
+    """
+    return startup_fingerprint.save_object()
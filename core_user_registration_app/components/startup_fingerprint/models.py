@@ -0,0 +1,45 @@
+""" Startup Fingerprint model
+"""
+from django_mongoengine import fields, Document
+from mongoengine import errors as mongoengine_errors
+from mongoengine.errors import NotUniqueError
+
+from core_main_app.commons import exceptions
+
+
+class StartupFingerprint(Document):
+    """Fingerprint of the configuration an initialization step last ran with"""
+
+    name = fields.StringField(unique=True)
+    value = fields.StringField(blank=True)
+
+    def save_object(self):
+        """Custom save
+
+        Returns:
+
+        """
+        try:
+            return self.save()
+        except NotUniqueError:
+            raise exceptions.ModelError("Unable to save the document: not unique.")
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def get_by_name(name):
+        """Return the startup fingerprint with the given name.
+
+        Args:
+            name:
+
+        Returns:
+            StartupFingerprint (obj): StartupFingerprint object with the given name
+
+        """
+        try:
+            return StartupFingerprint.objects.get(name=name)
+        except mongoengine_errors.DoesNotExist as e:
+            raise exceptions.DoesNotExist(str(e))
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
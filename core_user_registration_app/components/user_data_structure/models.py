@@ -8,6 +8,7 @@ from mongoengine.queryset.base import CASCADE
 
 from core_main_app.commons import exceptions
 from core_main_app.components.data.models import Data
+from core_main_app.utils.datetime_tools.utils import datetime_now
 from core_parser_app.components.data_structure.models import DataStructure
 from core_user_registration_app.permissions import rights
 from signals_utils.signals.mongo import connector, signals
@@ -18,6 +19,17 @@ class UserDataStructure(DataStructure):
 
     form_string = fields.StringField(blank=True)
     data = fields.ReferenceField(Data, blank=True, reverse_delete_rule=CASCADE)
+    creation_date = fields.DateTimeField(blank=True, default=datetime_now)
+    meta = {
+        "indexes": [
+            # lookups by user, or by user and template
+            ("user", "template"),
+            # lookups by data, and data structures without data
+            "data",
+            # lookups by root, and join of the orphan element sweep
+            "data_structure_element_root",
+        ]
+    }
 
     @staticmethod
     def get_permission():
@@ -9,13 +9,17 @@ from core_main_app.access_control.api import (
     can_write_in_workspace,
 )
 from core_main_app.access_control.exceptions import AccessControlError
-from core_main_app.components.workspace import api as workspace_api
-from core_main_app.settings import DATA_SORTING_FIELDS
+from core_main_app.settings import (
+    CAN_ANONYMOUS_ACCESS_PUBLIC_DOCUMENT,
+    DATA_SORTING_FIELDS,
+    VERIFY_DATA_ACCESS,
+)
 from core_main_app.utils.labels import get_data_label
 from core_main_app.utils.raw_query.mongo_raw_query import (
     add_access_criteria,
     add_aggregate_access_criteria,
 )
+from core_user_registration_app.utils import workspace_access as workspace_access_utils
 
 logger = logging.getLogger(__name__)
 
@@ -167,17 +171,14 @@ def _get_read_accessible_workspaces_by_user(user):
     Returns:
 
     """
-    if not CAN_ANONYMOUS_ACCESS_PUBLIC_DATA and user.is_anonymous:
+    if not CAN_ANONYMOUS_ACCESS_PUBLIC_DOCUMENT and user.is_anonymous:
         accessible_workspaces = []
     else:
         # workspace case
         # list accessible workspaces
-        accessible_workspaces = [
-            workspace.id
-            for workspace in workspace_api.get_all_workspaces_with_read_access_by_user(
-                user
-            )
-        ]
+        accessible_workspaces = workspace_access_utils.get_accessible_workspaces(
+            user
+        ).read
 
     return accessible_workspaces
 
@@ -1,8 +1,11 @@
 """ Metadata API
 """
 import datetime
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 import pytz
+from mongoengine.errors import LookUpError
 
 import core_main_app.access_control.api
 import core_main_app.components.workspace.access_control
@@ -10,11 +13,17 @@ from core_main_app.access_control.decorators import access_control
 from core_main_app.commons import exceptions as exceptions
 from core_main_app.components.workspace import api as workspace_api
 from core_main_app.settings import DATA_SORTING_FIELDS
-from core_main_app.utils.xml import validate_xml_data
 from core_user_registration_app.components.user_metadata import (
     access_control as metadata_api_access_control,
 )
 from core_user_registration_app.components.user_metadata.models import UserMetadata
+from core_user_registration_app.settings import (
+    REGISTRATION_BULK_UPSERT_CHUNK_SIZE,
+    REGISTRATION_VALIDATION_WORKERS,
+)
+from core_user_registration_app.utils import pagination as pagination_utils
+from core_user_registration_app.utils import workspace_access as workspace_access_utils
+from core_user_registration_app.utils import xml as registration_xml_utils
 from xml_utils.xsd_tree.xsd_tree import XSDTree
 
 
@@ -58,47 +67,145 @@ def get_by_id(data_id, user):
     return UserMetadata.get_by_id(data_id)
 
 
-def get_all(user, order_by_field=DATA_SORTING_FIELDS):
+def get_all(user, order_by_field=DATA_SORTING_FIELDS, fields=None):
     """Get all the data if superuser. Raise exception otherwise.
 
     Parameters:
             user:
             order_by_field: Order by field.
+            fields: names of the fields to return, as read-only dicts (all fields, as documents, if None)
 
     Returns: data collection
     """
-    return UserMetadata.get_all(order_by_field)
+    return _project(UserMetadata.get_all(order_by_field), fields, order_by_field)
 
 
-def get_all_accessible_by_user(user, order_by_field=DATA_SORTING_FIELDS):
+def get_all_accessible_by_user(user, order_by_field=DATA_SORTING_FIELDS, fields=None):
     """Return all data accessible by a user.
 
     Parameters:
         user:
         order_by_field:
+        fields: names of the fields to return, as read-only dicts (all fields, as documents, if None)
 
     Returns: data collection
     """
-
-    read_workspaces = workspace_api.get_all_workspaces_with_read_access_by_user(user)
-    write_workspaces = workspace_api.get_all_workspaces_with_write_access_by_user(user)
-    user_accessible_workspaces = list(set().union(read_workspaces, write_workspaces))
-
-    return UserMetadata.get_all_by_user_and_workspace(
-        user.id, user_accessible_workspaces, order_by_field
+    return _project(
+        _get_all_accessible_by_user(user, order_by_field), fields, order_by_field
     )
 
 
-def get_all_by_user(user, order_by_field=DATA_SORTING_FIELDS):
+def get_all_by_user(user, order_by_field=DATA_SORTING_FIELDS, fields=None):
     """Return all data owned by a user.
 
     Parameters:
         user:
         order_by_field: Order by field.
+        fields: names of the fields to return, as read-only dicts (all fields, as documents, if None)
 
     Returns: data collection
     """
-    return UserMetadata.get_all_by_user_id(str(user.id), order_by_field)
+    return _project(
+        UserMetadata.get_all_by_user_id(str(user.id), order_by_field),
+        fields,
+        order_by_field,
+    )
+
+
+def count_by_user(user):
+    """Return the number of data owned by a user.
+
+    Parameters:
+        user:
+
+    Returns: number of data
+    """
+    return UserMetadata.get_all_by_user_id(str(user.id), []).count()
+
+
+def exists_by_user(user):
+    """Return True if the user owns a data.
+
+    Parameters:
+        user:
+
+    Returns:
+    """
+    return _exists(UserMetadata.get_all_by_user_id(str(user.id), []))
+
+
+@access_control(core_main_app.access_control.api.can_read_or_write_in_workspace)
+def count_by_workspace(workspace, user):
+    """Return the number of data that belong to the workspace.
+
+    Args:
+        workspace:
+        user:
+
+    Returns: number of data
+
+    """
+    return UserMetadata.get_all_by_workspace(workspace, []).count()
+
+
+@access_control(core_main_app.access_control.api.can_read_or_write_in_workspace)
+def exists_by_workspace(workspace, user):
+    """Return True if a data belongs to the workspace.
+
+    Args:
+        workspace:
+        user:
+
+    Returns:
+
+    """
+    return _exists(UserMetadata.get_all_by_workspace(workspace, []))
+
+
+def count_accessible_by_user(user):
+    """Return the number of data accessible by a user.
+
+    Parameters:
+        user:
+
+    Returns: number of data
+    """
+    return _get_all_accessible_by_user(user, []).count()
+
+
+def exists_accessible_by_user(user):
+    """Return True if a data is accessible by a user.
+
+    Parameters:
+        user:
+
+    Returns:
+    """
+    return _exists(_get_all_accessible_by_user(user, []))
+
+
+def count_by_template(template, user):
+    """Return the number of data of the template accessible by a user (all if superuser).
+
+    Parameters:
+        template:
+        user:
+
+    Returns: number of data
+    """
+    return _get_all_by_template_accessible_by_user(template, user).count()
+
+
+def exists_by_template(template, user):
+    """Return True if a data of the template is accessible by a user (any if superuser).
+
+    Parameters:
+        template:
+        user:
+
+    Returns:
+    """
+    return _exists(_get_all_by_template_accessible_by_user(template, user))
 
 
 @access_control(core_main_app.access_control.api.can_read)
@@ -114,12 +221,34 @@ def get_all_except_user(user, order_by_field=DATA_SORTING_FIELDS):
     return UserMetadata.get_all_except_user_id(str(user.id), order_by_field)
 
 
-def upsert(data, request):
+def get_page(
+    data_list, page_size, continuation_token=None, order_by_field=DATA_SORTING_FIELDS
+):
+    """Return a page of data, and the continuation token of the next page.
+
+    Pages are read with a range condition on the ordering fields and the id,
+    so that a deep page costs the same as the first one.
+
+    Parameters:
+        data_list: data collection returned by one of the get_all functions
+        page_size: maximum number of data in the page
+        continuation_token: token returned with the previous page, None for the first page
+        order_by_field: Order by field.
+
+    Returns: list of data, token of the next page (None on the last page)
+    """
+    return pagination_utils.get_page(
+        data_list, order_by_field, page_size, continuation_token
+    )
+
+
+def upsert(data, request, xml_tree=None):
     """Save or update the data.
 
     Args:
         data:
-        user:
+        request: used to resolve the imports and includes of the schema
+        xml_tree: tree of the xml content, if the caller already parsed it
 
     Returns:
 
@@ -128,32 +257,141 @@ def upsert(data, request):
         raise exceptions.ApiError("Unable to save data: xml_content field is not set.")
 
     data.last_modification_date = datetime.datetime.now(pytz.utc)
-    check_xml_file_is_valid(data, request=request)
+    check_xml_file_is_valid(data, request=request, xml_tree=xml_tree)
     return data.convert_and_save()
 
 
-def check_xml_file_is_valid(data, request):
+def bulk_upsert(data_list, request):
+    """Save or update several data, without stopping at the first invalid one.
+
+    Data are validated, then written with unordered bulk writes, by chunks of
+    REGISTRATION_BULK_UPSERT_CHUNK_SIZE. The data of a template are all
+    validated against the same compiled schema, in REGISTRATION_VALIDATION_WORKERS
+    processes if set, unless an XSD_URI_RESOLVER needs the request.
+
+    Args:
+        data_list: iterable of data
+        request:
+
+    Returns:
+        list: (id, error) of each data, in input order, error is None if saved,
+            the position of the data in data_list instead of its id if it has none
+
+    """
+    report = []
+    # the workers keep their compiled schemas for the whole import, but have no
+    # request: schemas resolved through the session are validated in process
+    executor = (
+        ProcessPoolExecutor(max_workers=REGISTRATION_VALIDATION_WORKERS)
+        if REGISTRATION_VALIDATION_WORKERS > 0
+        and not registration_xml_utils.is_validation_request_dependent()
+        else None
+    )
+    try:
+        data_iterator = iter(data_list)
+        chunk = list(islice(data_iterator, REGISTRATION_BULK_UPSERT_CHUNK_SIZE))
+        while chunk:
+            report.extend(_bulk_upsert_chunk(chunk, request, executor, len(report)))
+            chunk = list(islice(data_iterator, REGISTRATION_BULK_UPSERT_CHUNK_SIZE))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return report
+
+
+def _bulk_upsert_chunk(chunk, request, executor=None, offset=0):
+    """Validate and save a chunk of data.
+
+    Args:
+        chunk: list of data
+        request:
+        executor: process pool validating the data, validated in process if None
+        offset: position of the chunk in the data list
+
+    Returns:
+        list: (id or position, error) of each data of the chunk
+
+    """
+    pool_errors = {}
+    if executor is not None:
+        indexes = [
+            index
+            for index, data in enumerate(chunk)
+            if data.xml_content is not None and data.template is not None
+        ]
+        pool_errors = dict(
+            zip(
+                indexes,
+                registration_xml_utils.validate_xml_contents_in_pool(
+                    executor,
+                    [
+                        (chunk[index].template, chunk[index].xml_content)
+                        for index in indexes
+                    ],
+                    REGISTRATION_VALIDATION_WORKERS,
+                ),
+            )
+        )
+
+    errors = [None] * len(chunk)
+    valid_data = []
+    valid_data_indexes = []
+    for index, data in enumerate(chunk):
+        try:
+            if data.xml_content is None:
+                raise exceptions.ApiError(
+                    "Unable to save data: xml_content field is not set."
+                )
+            if data.template is None:
+                raise exceptions.ApiError(
+                    "Unable to save data: template field is not set."
+                )
+            data.last_modification_date = datetime.datetime.now(pytz.utc)
+            if executor is None:
+                check_xml_file_is_valid(data, request=request)
+            elif pool_errors[index] is not None:
+                raise exceptions.XMLError(pool_errors[index])
+            data.convert_to_dict()
+        except Exception as e:
+            errors[index] = str(e)
+            continue
+        valid_data.append(data)
+        valid_data_indexes.append(index)
+
+    for index, error in UserMetadata.bulk_upsert(valid_data).items():
+        errors[valid_data_indexes[index]] = error
+    return [
+        (data.id if data.id is not None else offset + index, error)
+        for index, (data, error) in enumerate(zip(chunk, errors))
+    ]
+
+
+def check_xml_file_is_valid(data, request, xml_tree=None):
     """Check if xml data is valid against a given schema.
 
     Args:
         data:
         request:
+        xml_tree: tree of the xml content, parsed from it if not given
 
     Returns:
 
     """
     template = data.template
 
-    try:
-        xml_tree = XSDTree.build_tree(data.xml_content)
-    except Exception as e:
-        raise exceptions.XMLError(str(e))
+    if xml_tree is None:
+        try:
+            xml_tree = XSDTree.build_tree(data.xml_content)
+        except Exception as e:
+            raise exceptions.XMLError(str(e))
 
     try:
-        xsd_tree = XSDTree.build_tree(template.content)
+        # the schema of the template is compiled once per process
+        error = registration_xml_utils.validate_xml_data(
+            template, xml_tree, request=request
+        )
     except Exception as e:
         raise exceptions.XSDError(str(e))
-    error = validate_xml_data(xsd_tree, xml_tree, request=request)
     if error is not None:
         raise exceptions.XMLError(error)
     else:
@@ -218,3 +456,75 @@ def is_data_public(data):
         if UserMetadata.workspace is not None
         else False
     )
+
+
+def _project(data_list, fields, order_by_field):
+    """Restrict a data collection to some fields.
+
+    Only the requested fields, the ordering fields and the id (as "_id") are
+    read from the database, and returned as raw dicts instead of documents.
+    The ordering fields let get_page continue after the last dict of a page.
+    The xml file and dict content of the data are not loaded unless requested.
+
+    Args:
+        data_list:
+        fields: names of the fields to return, None to return documents
+        order_by_field: Order by field.
+
+    Returns: data collection
+
+    """
+    if fields is None:
+        return data_list
+    sort_fields = [name for name, _ in pagination_utils.get_sort_keys(order_by_field)]
+    try:
+        return data_list.only(*fields, *sort_fields).as_pymongo()
+    except LookUpError as e:
+        raise exceptions.ApiError(str(e))
+
+
+def _get_all_accessible_by_user(user, order_by_field):
+    """Return all data owned by a user, or in a workspace the user can read or write.
+
+    Args:
+        user:
+        order_by_field:
+
+    Returns: data collection
+
+    """
+    accessible_workspaces = workspace_access_utils.get_accessible_workspaces(user)
+    user_accessible_workspaces = list(
+        set().union(accessible_workspaces.read, accessible_workspaces.write)
+    )
+
+    return UserMetadata.get_all_by_user_and_workspace(
+        user.id, user_accessible_workspaces, order_by_field
+    )
+
+
+def _get_all_by_template_accessible_by_user(template, user):
+    """Return all data of the template accessible by a user (all if superuser).
+
+    Args:
+        template:
+        user:
+
+    Returns: data collection
+
+    """
+    if user.is_superuser:
+        return UserMetadata.get_all_by_list_template([template], [])
+    return _get_all_accessible_by_user(user, []).filter(template=template)
+
+
+def _exists(data_list):
+    """Return True if the data collection is not empty, without loading a data.
+
+    Args:
+        data_list:
+
+    Returns:
+
+    """
+    return data_list.limit(1).count(with_limit_and_skip=True) > 0
@@ -1,15 +1,40 @@
 """ Metadata model
 """
 
+from bson.objectid import ObjectId
 from django_mongoengine import fields
 from mongoengine import errors as mongoengine_errors
 from mongoengine.queryset.base import NULLIFY
 from mongoengine.queryset.visitor import Q
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
 
 from core_main_app.commons import exceptions
 from core_main_app.components.abstract_data.models import AbstractData
 from core_main_app.components.template.models import Template
 from core_main_app.components.workspace.models import Workspace
+from core_main_app.settings import DATA_SORTING_FIELDS
+from core_main_app.utils.datetime_tools.utils import datetime_now
+from core_user_registration_app.utils.pagination import get_sort_keys
+
+
+def _get_sorted_index(*filter_fields):
+    """Return an index on the filter fields, then on the DATA_SORTING_FIELDS ordering.
+
+    The ordering ends with the id, as in the keyset pagination, so the index
+    serves both the filter and the sort of a query.
+
+    Args:
+        *filter_fields: fields queried by equality
+
+    Returns:
+
+    """
+    sort_fields = [
+        ("-" if direction < 0 else "+") + name
+        for name, direction in get_sort_keys(DATA_SORTING_FIELDS)
+    ]
+    return {"fields": list(filter_fields) + sort_fields}
 
 
 class UserMetadata(AbstractData):
@@ -20,7 +45,18 @@ class UserMetadata(AbstractData):
     workspace = fields.ReferenceField(
         Workspace, reverse_delete_rule=NULLIFY, blank=True
     )
-    meta = {"indexes": ["title", "last_modification_date", "template", "user_id"]}
+    meta = {
+        "indexes": [
+            "title",
+            "last_modification_date",
+            # one index per filtered field of the query methods below
+            _get_sorted_index("user_id"),
+            _get_sorted_index("workspace"),
+            _get_sorted_index("template"),
+        ]
+        # unfiltered queries, unless the default _id index already sorts them
+        + ([_get_sorted_index()] if DATA_SORTING_FIELDS else [])
+    }
 
     @staticmethod
     def get_all(order_by_field):
@@ -73,7 +109,7 @@ class UserMetadata(AbstractData):
         Returns:
 
         """
-        return UserMetadata.objects(user_id__nin=str(user_id)).order_by(*order_by_field)
+        return UserMetadata.objects(user_id__ne=str(user_id)).order_by(*order_by_field)
 
     @staticmethod
     def get_all_by_id_list(list_id, order_by_field):
@@ -88,6 +124,64 @@ class UserMetadata(AbstractData):
         """
         return UserMetadata.objects(pk__in=list_id).order_by(*order_by_field)
 
+    @staticmethod
+    def bulk_upsert(data_list):
+        """Save or update data with one unordered bulk write.
+
+        Data are validated before their XML content is stored in GridFS. The
+        new files of the data not saved are deleted, and the previous files of
+        updated data are only deleted once their update is written.
+
+        Args:
+            data_list: data with their dict content already converted
+
+        Returns:
+            dict: error message by index in data_list of the data not saved
+
+        """
+        now = datetime_now()
+        errors = {}
+        requests = []
+        request_indexes = []
+        # previous file of each data converted, by index
+        previous_grid_ids = {}
+        new_data_indexes = set()
+        for index, data in enumerate(data_list):
+            # set the datetime fields as save_object does
+            data.last_change_date = now
+            if not data.id:
+                data.id = ObjectId()
+                data.creation_date = now
+                data.last_modification_date = now
+                new_data_indexes.add(index)
+            try:
+                data.validate()
+                previous_grid_ids[index] = data.xml_file.grid_id
+                # store the content in a new file, the previous one is still referenced
+                data.xml_file.grid_id = None
+                data.xml_file.gridout = None
+                data.convert_to_file()
+            except Exception as e:
+                errors[index] = str(e)
+                continue
+            requests.append(ReplaceOne({"_id": data.id}, data.to_mongo(), upsert=True))
+            request_indexes.append(index)
+
+        try:
+            if requests:
+                UserMetadata._get_collection().bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details["writeErrors"]:
+                errors[request_indexes[write_error["index"]]] = write_error["errmsg"]
+        except Exception as ex:
+            errors.update((index, str(ex)) for index in request_indexes)
+            _clean_bulk_upsert_files(
+                data_list, errors, previous_grid_ids, new_data_indexes
+            )
+            raise exceptions.ModelError(str(ex))
+        _clean_bulk_upsert_files(data_list, errors, previous_grid_ids, new_data_indexes)
+        return errors
+
     @staticmethod
     def get_by_id(data_id):
         """Return the object with the given id.
@@ -177,3 +271,32 @@ class UserMetadata(AbstractData):
         return UserMetadata.objects(
             Q(workspace__in=list_workspace) | Q(user_id=str(user_id))
         ).order_by(*order_by_field)
+
+
+def _clean_bulk_upsert_files(data_list, errors, previous_grid_ids, new_data_indexes):
+    """Delete the files no longer referenced after a bulk upsert.
+
+    The data not saved get their previous file (and id if new) back, and their
+    new file is deleted. The previous file of the data saved is deleted.
+
+    Args:
+        data_list: data of the bulk upsert
+        errors: error message by index of the data not saved
+        previous_grid_ids: previous file id by index of the data converted
+        new_data_indexes: indexes of the data inserted
+
+    Returns:
+
+    """
+    for index, previous_grid_id in previous_grid_ids.items():
+        data = data_list[index]
+        if index in errors:
+            if data.xml_file.grid_id is not None:
+                data.xml_file.delete()
+            data.xml_file.grid_id = previous_grid_id
+            data.xml_file.gridout = None
+        elif previous_grid_id is not None:
+            data.xml_file.fs.delete(previous_grid_id)
+    for index in new_data_indexes:
+        if index in errors:
+            data_list[index].id = None
@@ -16,6 +16,7 @@ from core_user_registration_app.components.user_template_version_manager.access_
 from core_user_registration_app.components.user_template_version_manager.models import (
     UserTemplateVersionManager,
 )
+from core_user_registration_app.utils import xml as registration_xml_utils
 
 
 @access_control(can_write)
@@ -43,6 +44,8 @@ def insert(user_version_manager, template, request):
         display_name = get_latest_version_name(user_version_manager)
         # update saved template
         template_api.set_display_name(template, display_name, request=request)
+        # drop the compiled schemas of the previous versions
+        registration_xml_utils.invalidate_schema_cache(user_version_manager.versions)
         # return version manager
         return user_version_manager
     except Exception as e:
@@ -111,7 +114,10 @@ def set_current(version, request):
         )
 
     user_version_manager.set_current_version(version)
-    return upsert(user_version_manager, request=request)
+    user_version_manager = upsert(user_version_manager, request=request)
+    # drop the compiled schemas of the previous current version
+    registration_xml_utils.invalidate_schema_cache(user_version_manager.versions)
+    return user_version_manager
 
 
 @access_control(is_superuser)
@@ -1,19 +1,25 @@
 """ Initialize permissions for core user registration app.
 """
+import hashlib
 import logging
-
-from django.contrib.auth.models import Group, Permission
+import threading
+import time
+from contextlib import contextmanager
+from uuid import uuid4
 
 import core_main_app.permissions.rights as main_rights
 import core_user_registration_app.permissions.rights as registration_rights
-from core_user_registration_app.components.user_template_version_manager import (
-    api as user_version_manager_api,
+from core_user_registration_app.components.lease import api as lease_api
+from core_user_registration_app.components.startup_fingerprint import (
+    api as startup_fingerprint_api,
 )
 from core_user_registration_app.settings import (
     REGISTRY_XSD_USER_FILENAME,
     REGISTRY_XSD_USER_FILEPATH,
+    REGISTRATION_INIT_LEASE_DURATION,
+    REGISTRATION_INIT_RETRY_INTERVAL,
+    REGISTRATION_INIT_WAIT_TIMEOUT,
 )
-from core_user_registration_app.system import api as registry_system_api
 
 logger = logging.getLogger(__name__)
 
@@ -27,32 +33,205 @@ from core_user_registration_app.settings import (
     DETAIL_XSL_FILENAME,
 )
 from core_main_app.commons import exceptions
-
-from core_main_app.components.xsl_transformation import api as xslt_transformation_api
-from core_main_app.components.xsl_transformation.models import XslTransformation
 from core_main_app.utils.file import read_file_content
 
+INIT_FINGERPRINT_NAME = "init_registration_app"
+INIT_LEASE_POLL_INTERVAL = 0.5
+
+_registration_app_initialized = False
+_registration_app_init_lock = threading.Lock()
+# time.monotonic() before which a failed init is not retried
+_registration_app_init_retry_time = None
+# durations in seconds of the phases of the last init of this process
+_init_phase_durations = {}
+
+
+def get_init_phase_durations():
+    """Return the durations of the phases of the last init of this process.
+
+    Returns:
+        dict: duration in seconds of each phase, in execution order
+
+    """
+    return dict(_init_phase_durations)
+
+
+def ensure_registration_app_initialized():
+    """Init the registration app once per process, until an init succeeds.
+
+    A failed init is retried at most every REGISTRATION_INIT_RETRY_INTERVAL
+    seconds, so that a persistent failure does not run the init on every request.
+
+    Returns:
+
+    """
+    global _registration_app_initialized, _registration_app_init_retry_time
+
+    if _registration_app_initialized or _is_init_retry_pending():
+        return
+    with _registration_app_init_lock:
+        if _registration_app_initialized or _is_init_retry_pending():
+            return
+        _registration_app_initialized = init_registration_app()
+        if not _registration_app_initialized:
+            _registration_app_init_retry_time = (
+                time.monotonic() + REGISTRATION_INIT_RETRY_INTERVAL
+            )
+            logger.warning(
+                "The registration app init failed, "
+                f"next attempt in {REGISTRATION_INIT_RETRY_INTERVAL}s."
+            )
+
+
+def _is_init_retry_pending():
+    """Is a failed init of this process waiting for its retry time.
+
+    Returns:
+
+    """
+    return (
+        _registration_app_init_retry_time is not None
+        and time.monotonic() < _registration_app_init_retry_time
+    )
+
 
-def init_registration_app():
+def init_registration_app(force=False):
     """Init the registry. Add the registry template.
 
+    The init is skipped if it already succeeded with the same files and settings.
+
+    Args:
+        force: run every step even if the files and settings are unchanged
+
     Returns:
+        bool: True if the registration app is initialized
 
     """
 
+    _init_phase_durations.clear()
     try:
-        # Add template
-        _add_user_template()
-        # Init the permissions
-        _init_permissions()
-        # Init the xslt
-        _init_xslt()
+        with _timed_phase("fingerprint"):
+            fingerprint = _get_init_fingerprint()
+            is_initialized = _has_init_fingerprint(fingerprint)
+        if not force and is_initialized:
+            return True
+        # one process seeds the database, the others wait for its fingerprint
+        owner = str(uuid4())
+        deadline = time.monotonic() + REGISTRATION_INIT_WAIT_TIMEOUT
+        with _timed_phase("lock"):
+            while not lease_api.acquire(
+                INIT_FINGERPRINT_NAME, owner, REGISTRATION_INIT_LEASE_DURATION
+            ):
+                if time.monotonic() >= deadline:
+                    logger.warning(
+                        "The registration app is being initialized by another process."
+                    )
+                    return False
+                time.sleep(INIT_LEASE_POLL_INTERVAL)
+                if not force and _has_init_fingerprint(fingerprint):
+                    return True
+        try:
+            startup_fingerprint = startup_fingerprint_api.get_or_create(
+                INIT_FINGERPRINT_NAME
+            )
+            # the previous lease holder may have finished in the meantime
+            if not force and startup_fingerprint.value == fingerprint:
+                return True
+            # Add template
+            with _timed_phase("template"):
+                template_added = _add_user_template()
+            # Init the permissions
+            with _timed_phase("permissions"):
+                permissions_initialized = _init_permissions()
+            # Init the xslt
+            xslt_initialized = _init_xslt()
+            # only skip the next inits if everything is in place
+            if template_added and permissions_initialized and xslt_initialized:
+                startup_fingerprint.value = fingerprint
+                startup_fingerprint_api.upsert(startup_fingerprint)
+                return True
+        finally:
+            lease_api.release(INIT_FINGERPRINT_NAME, owner)
     except Exception as e:
         logger.error("Impossible to init the registration app: {0}".format(str(e)))
+    return False
+
+
+@contextmanager
+def _timed_phase(phase):
+    """Measure an init phase, log its duration and keep it in the phase registry.
+
+    Args:
+        phase: phase name
+
+    Returns:
+
+    """
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        duration = time.monotonic() - start
+        _init_phase_durations[phase] = duration
+        logger.info(
+            f"Registration app init phase {phase} took {duration:.3f}s",
+            extra={"phase": phase, "duration": duration},
+        )
+
+
+def _has_init_fingerprint(fingerprint):
+    """Return True if the last successful init ran with the given fingerprint.
+
+    Args:
+        fingerprint:
+
+    Returns:
+
+    """
+    return (
+        startup_fingerprint_api.get_or_create(INIT_FINGERPRINT_NAME).value
+        == fingerprint
+    )
+
+
+def _get_init_fingerprint():
+    """Hash the settings and the content of the files the init depends on.
+
+    Returns:
+        str: hexadecimal digest
+
+    """
+    fingerprint = hashlib.sha256()
+    for setting in (
+        REGISTRY_XSD_USER_FILENAME,
+        REGISTRY_XSD_USER_FILEPATH,
+        XSL_FOLDER_PATH,
+        LIST_XSL_FILENAME,
+        DETAIL_XSL_FILENAME,
+    ):
+        fingerprint.update(setting.encode() + b"\0")
+    for static_path in (
+        REGISTRY_XSD_USER_FILEPATH,
+        join(XSL_FOLDER_PATH, LIST_XSL_FILENAME),
+        join(XSL_FOLDER_PATH, DETAIL_XSL_FILENAME),
+    ):
+        file_path = finders.find(static_path) if static_path else None
+        if file_path:
+            with open(file_path, "rb") as file:
+                fingerprint.update(file.read())
+        fingerprint.update(b"\0")
+    return fingerprint.hexdigest()
 
 
 def _init_permissions():
-    """Initialization of groups and permissions."""
+    """Initialization of groups and permissions.
+
+    Returns:
+        bool: True if the permissions were initialized
+
+    """
+    from django.contrib.auth.models import Group, Permission
+
     try:
         # Get or Create the default group
         anonymous, created = Group.objects.get_or_create(
@@ -72,17 +251,21 @@ def _init_permissions():
             register_access_perm,
             register_view_data_save_repo_perm,
         )
-
+        return True
     except Exception as e:
         logger.error("Impossible to init register permissions: %s" % str(e))
+        return False
 
 
 def _add_user_template():
     """Add the registry template.
 
     Returns:
+        bool: True if the template is in place
 
     """
+    from core_user_registration_app.system import api as registry_system_api
+
     xsd_filepath = REGISTRY_XSD_USER_FILEPATH
     xsd_filename = REGISTRY_XSD_USER_FILENAME
     if xsd_filename == "":
@@ -101,32 +284,43 @@ def _add_user_template():
         registry_system_api.insert_registry_user_schema(xsd_filename, xsd_data)
     except Exception as e:
         logger.error("Impossible to add the template: {0}".format(str(e)))
+        return False
+    return True
 
 
 def _init_xslt():
     """Init the XSLTs. Add XSLTs and the binding with the user template.
 
     Returns:
+        bool: True if the XSLTs and the binding are in place
 
     """
+    from core_user_registration_app.components.user_template_version_manager import (
+        api as user_version_manager_api,
+    )
+
     try:
         # Get or create template
         template_version_manager = (
             user_version_manager_api.get_default_version_manager()
         )
         # Get or create XSLTs
-        list_xslt = _get_or_create_xslt(LIST_XSL_FILENAME)
-        default_detail_xslt = _get_or_create_xslt(DETAIL_XSL_FILENAME)
+        with _timed_phase("xslt"):
+            list_xslt = _get_or_create_xslt(LIST_XSL_FILENAME)
+            default_detail_xslt = _get_or_create_xslt(DETAIL_XSL_FILENAME)
         list_detail_xslt = [default_detail_xslt]
         # Create binding between template and XSLTs if does not exist
-        _bind_template_xslt(
-            template_version_manager[0].current,
-            list_xslt,
-            default_detail_xslt,
-            list_detail_xslt,
-        )
+        with _timed_phase("binding"):
+            _bind_template_xslt(
+                template_version_manager[0].current,
+                list_xslt,
+                default_detail_xslt,
+                list_detail_xslt,
+            )
+        return True
     except Exception as e:
-        print("ERROR : Impossible to init the XSLTs. " + str(e))
+        logger.error("Impossible to init the XSLTs: {0}".format(str(e)))
+        return False
 
 
 def _get_or_create_xslt(filename):
@@ -139,6 +333,13 @@ def _get_or_create_xslt(filename):
         XSLT.
 
     """
+    from core_main_app.components.xsl_transformation import (
+        api as xslt_transformation_api,
+    )
+    from core_main_app.components.xsl_transformation.models import (
+        XslTransformation,
+    )
+
     try:
         return xslt_transformation_api.get_by_name(filename)
     except exceptions.ApiError:
@@ -0,0 +1,45 @@
+""" Management command initializing the registration app
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core_user_registration_app import discover
+
+
+class Command(BaseCommand):
+    """Add the user template, the permissions and the XSLTs of the registration app"""
+
+    help = "Initialize the registration app: user template, permissions and XSLTs."
+
+    def add_arguments(self, parser):
+        """Add the command arguments.
+
+        Args:
+            parser:
+
+        Returns:
+
+        """
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Run every step even if the files and settings are unchanged.",
+        )
+
+    def handle(self, *args, **options):
+        """Run the command.
+
+        Args:
+            *args:
+            **options:
+
+        Returns:
+
+        """
+        initialized = discover.init_registration_app(force=options["force"])
+        for phase, duration in discover.get_init_phase_durations().items():
+            self.stdout.write(f"{phase}: {duration:.3f}s")
+        if not initialized:
+            raise CommandError(
+                "Impossible to init the registration app, see the logs for details."
+            )
+        self.stdout.write(self.style.SUCCESS("Registration app initialized."))
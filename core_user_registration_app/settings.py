@@ -48,10 +48,141 @@ REGISTRY_XSD_USER_FILENAME = getattr(settings, "REGISTRY_XSD_USER_FILENAME", "us
 """
 
 
-DELETE_USER_DATA_STRUCTURE_RATE = 10
-""" int: Task rate in seconds.
+DELETE_USER_DATA_STRUCTURE_RATE = getattr(
+    settings, "DELETE_USER_DATA_STRUCTURE_RATE", 10
+)
+""" int: Shortest interval in seconds between two cleanup runs, used while a backlog remains.
+"""
+
+DELETE_USER_DATA_STRUCTURE_MAX_INTERVAL = getattr(
+    settings, "DELETE_USER_DATA_STRUCTURE_MAX_INTERVAL", 3600
+)
+""" int: Longest interval in seconds between two cleanup runs, reached when nothing expires.
 """
 
 USER_DATA_STRUCTURE_HOURS_THRESHOLD = 1
 """ int: Number of hours before deleting a User Data Structure
 """
+
+USER_DATA_STRUCTURE_DELETE_BATCH_SIZE = getattr(
+    settings, "USER_DATA_STRUCTURE_DELETE_BATCH_SIZE", 1000
+)
+""" int: Maximum number of Data Structure Elements removed by a single delete query.
+"""
+
+USER_DATA_STRUCTURE_DELETE_MAX_BATCH_SIZE = getattr(
+    settings, "USER_DATA_STRUCTURE_DELETE_MAX_BATCH_SIZE", 10000
+)
+""" int: Upper bound of the delete batch size, which grows during registration bursts.
+"""
+
+USER_DATA_STRUCTURE_TTL_INDEX_ENABLED = getattr(
+    settings, "USER_DATA_STRUCTURE_TTL_INDEX_ENABLED", False
+)
+""" bool: Expire User Data Structures with a MongoDB TTL index on their creation date.
+The periodic task then only sweeps what the TTL monitor has not removed yet.
+When disabled, the periodic task drops the TTL index if a previous configuration created it.
+"""
+
+REGISTRATION_INIT_LEASE_DURATION = getattr(
+    settings, "REGISTRATION_INIT_LEASE_DURATION", 60
+)
+""" int: Seconds a process holds the lock on the registration app init before another process can take over.
+"""
+
+REGISTRATION_INIT_WAIT_TIMEOUT = getattr(settings, "REGISTRATION_INIT_WAIT_TIMEOUT", 10)
+""" int: Seconds a process waits for another process to initialize the registration app.
+"""
+
+REGISTRATION_INIT_RETRY_INTERVAL = getattr(
+    settings, "REGISTRATION_INIT_RETRY_INTERVAL", 300
+)
+""" int: Seconds a process waits before retrying a failed init of the registration app.
+"""
+
+USER_DATA_STRUCTURE_CLEANUP_LEASE_DURATION = getattr(
+    settings, "USER_DATA_STRUCTURE_CLEANUP_LEASE_DURATION", 300
+)
+""" int: Seconds a cleanup run holds its lease before another run can take over.
+"""
+
+CLEANUP_RUN_HISTORY_RETENTION = getattr(
+    settings, "CLEANUP_RUN_HISTORY_RETENTION", 90 * 24 * 3600
+)
+""" int: Seconds the counters of a cleanup run are kept, 0 keeps them forever.
+Older runs of a cleanup are deleted each time it saves a new run.
+"""
+
+USER_DATA_STRUCTURE_CLEANUP_DRY_RUN = getattr(
+    settings, "USER_DATA_STRUCTURE_CLEANUP_DRY_RUN", False
+)
+""" bool: Only report what the cleanup task would delete, without deleting anything.
+"""
+
+USER_DATA_STRUCTURE_ORPHAN_GRACE_PERIOD = getattr(
+    settings, "USER_DATA_STRUCTURE_ORPHAN_GRACE_PERIOD", 3600
+)
+""" int: Age in seconds an element tree must reach before it can be swept as orphan.
+Protects forms being generated, whose root is not yet set on the UserDataStructure.
+"""
+
+REGISTRATION_RETENTION_POLICIES = getattr(
+    settings,
+    "REGISTRATION_RETENTION_POLICIES",
+    {
+        "user_data_structure": None,
+        "account_request_without_metadata": None,
+        "account_request_with_metadata": None,
+    },
+)
+""" dict: Hours before abandoned registration records are deleted, by retention policy.
+    - user_data_structure: registration drafts never linked to a data,
+    - account_request_without_metadata: account requests whose form was never saved,
+    - account_request_with_metadata: account requests never accepted nor denied.
+Account requests are deleted with their inactive user and their user metadata.
+None disables a policy.
+"""
+
+REGISTRATION_RETENTION_BATCH_SIZE = getattr(
+    settings, "REGISTRATION_RETENTION_BATCH_SIZE", 500
+)
+""" int: Maximum number of records deleted by a retention task, before it schedules the next batch.
+"""
+
+REGISTRATION_SCHEMA_CACHE_SIZE = getattr(settings, "REGISTRATION_SCHEMA_CACHE_SIZE", 16)
+""" int: Maximum number of compiled template schemas kept in memory by each process.
+"""
+
+REGISTRATION_VALIDATION_CACHE_SIZE = getattr(
+    settings, "REGISTRATION_VALIDATION_CACHE_SIZE", 1024
+)
+""" int: Maximum number of validation results kept in memory by each process, 0 disables the cache.
+"""
+
+REGISTRATION_VALIDATION_CACHE_TTL = getattr(
+    settings, "REGISTRATION_VALIDATION_CACHE_TTL", 300
+)
+""" int: Seconds a validation result is reused for an identical document and schema.
+"""
+
+REGISTRATION_BULK_UPSERT_CHUNK_SIZE = getattr(
+    settings, "REGISTRATION_BULK_UPSERT_CHUNK_SIZE", 500
+)
+""" int: Number of UserMetadata validated and written together by a bulk upsert.
+"""
+
+REGISTRATION_VALIDATION_WORKERS = getattr(
+    settings, "REGISTRATION_VALIDATION_WORKERS", 0
+)
+""" int: Number of processes validating the UserMetadata of a bulk upsert, 0 validates in the calling process.
+Ignored when an XSD_URI_RESOLVER resolves schemas through the session of the request.
+"""
+
+REGISTRATION_WORKSPACE_ACCESS_CACHE_TTL = getattr(
+    settings, "REGISTRATION_WORKSPACE_ACCESS_CACHE_TTL", 0
+)
+""" int: Seconds the workspaces accessible by a user are kept in the Django cache, 0 (default) disables the cache.
+Workspace and permission changes invalidate the cached workspaces in the cache backend of the process
+making the change: enable it only with a cache backend shared by all processes (e.g. Memcached, Redis).
+With a per-process backend (e.g. LocMemCache), other processes keep revoked permissions until the TTL expires.
+"""
@@ -1,10 +1,20 @@
 """ System api to access data without access control neither API rules
 """
+from bson.objectid import ObjectId
+from django.contrib.auth.models import User
+from pymongo.errors import OperationFailure
 
 from core_main_app.components.template.models import Template
 from core_main_app.components.version_manager.utils import get_latest_version_name
 from core_main_app.utils.xml import is_schema_valid, get_hash
 from core_parser_app.components.data_structure.models import DataStructureElement
+from core_user_registration_app.components.account_request_metadata.models import (
+    AccountRequestMetadata,
+)
+from core_user_registration_app.components.user_data_structure.models import (
+    UserDataStructure,
+)
+from core_user_registration_app.components.user_metadata.models import UserMetadata
 from core_user_registration_app.components.user_template_version_manager.models import (
     UserTemplateVersionManager,
 )
@@ -45,6 +55,31 @@ def get_all_data_structure_elements():
     return DataStructureElement.objects.all()
 
 
+def get_all_user_data_structure_elements_created_before(date, from_id=None):
+    """Returns all data structure elements of user data structures created before a date
+
+    The creation date is read from the ObjectId, so the filter is a range query
+    on the _id index instead of a scan of the whole collection.
+
+    Args:
+        date: aware datetime
+        from_id: if set, only return elements with an id greater or equal
+
+    Returns:
+
+    """
+    data_structure_field = DataStructureElement._fields["data_structure"].db_field
+    id_range = {"$lt": ObjectId.from_datetime(date)}
+    if from_id is not None:
+        id_range["$gte"] = from_id
+    return DataStructureElement.objects(
+        __raw__={
+            "_id": id_range,
+            f"{data_structure_field}._cls": UserDataStructure._class_name,
+        }
+    )
+
+
 def get_active_global_version_manager_by_title(version_manager_title):
     """Return all active Version Managers with user set to None.
 
@@ -58,3 +93,395 @@ def get_active_global_version_manager_by_title(version_manager_title):
     return UserTemplateVersionManager.get_active_global_version_manager_by_title(
         version_manager_title
     )
+
+
+def delete_first_user_data_structure_elements_created_before(date, count, from_id=None):
+    """Delete the count first data structure elements of user data structures created before a date
+
+    Elements are taken in id order, so a caller can resume after the returned
+    id, with from_id, to delete the next ones.
+
+    Args:
+        date: aware datetime
+        count: maximum number of elements deleted
+        from_id: if set, only delete elements with an id greater or equal
+
+    Returns:
+        tuple: number of deleted elements, id of the last element deleted (None if none)
+
+    """
+    expired_element_ids = list(
+        get_all_user_data_structure_elements_created_before(date, from_id)
+        .order_by("+id")
+        .limit(count)
+        .scalar("id")
+    )
+    if not expired_element_ids:
+        return 0, None
+    deleted_count = (
+        DataStructureElement._get_collection()
+        .delete_many({"_id": {"$in": expired_element_ids}})
+        .deleted_count
+    )
+    return deleted_count, expired_element_ids[-1]
+
+
+def get_all_user_data_structures_created_before(date):
+    """Returns all user data structures created before a date
+
+    Args:
+        date: aware datetime
+
+    Returns:
+
+    """
+    return UserDataStructure.objects(
+        __raw__={"_id": {"$lt": ObjectId.from_datetime(date)}}
+    )
+
+
+def delete_first_user_data_structures_created_before(date, count):
+    """Delete the count first user data structures created before a date
+
+    Deleted data structures no longer match, so the next call resumes after them.
+    The pre_delete signal is not sent: elements are expected to be removed by
+    the element sweep of the cleanup task, with
+    delete_first_user_data_structure_elements_created_before.
+
+    Args:
+        date: aware datetime
+        count: maximum number of user data structures deleted
+
+    Returns:
+        number of deleted user data structures
+
+    """
+    expired_data_structure_ids = list(
+        get_all_user_data_structures_created_before(date)
+        .order_by("+id")
+        .limit(count)
+        .scalar("id")
+    )
+    if not expired_data_structure_ids:
+        return 0
+    return (
+        UserDataStructure._get_collection()
+        .delete_many({"_id": {"$in": expired_data_structure_ids}})
+        .deleted_count
+    )
+
+
+def ensure_user_data_structure_ttl_index(expire_after_seconds):
+    """Create the TTL index expiring user data structures, or update its expiration
+
+    Args:
+        expire_after_seconds:
+
+    Returns:
+
+    """
+    collection = UserDataStructure._get_collection()
+    creation_date_field = UserDataStructure._fields["creation_date"].db_field
+    try:
+        collection.create_index(
+            creation_date_field, expireAfterSeconds=expire_after_seconds
+        )
+    except OperationFailure:
+        # index exists with another expiration: update it in place
+        collection.database.command(
+            "collMod",
+            collection.name,
+            index={
+                "keyPattern": {creation_date_field: 1},
+                "expireAfterSeconds": expire_after_seconds,
+            },
+        )
+
+
+def drop_user_data_structure_ttl_index():
+    """Drop the TTL index expiring user data structures, if present
+
+    Returns:
+        True if the index was dropped
+
+    """
+    collection = UserDataStructure._get_collection()
+    creation_date_field = UserDataStructure._fields["creation_date"].db_field
+    for name, index in collection.index_information().items():
+        if index["key"] == [(creation_date_field, 1)] and "expireAfterSeconds" in index:
+            collection.drop_index(name)
+            return True
+    return False
+
+
+def get_average_document_size(document_class):
+    """Return the average size in bytes of the documents of a collection
+
+    Args:
+        document_class:
+
+    Returns:
+        average size in bytes, 0 if the database does not report it
+
+    """
+    collection = document_class._get_collection()
+    try:
+        return collection.database.command("collstats", collection.name).get(
+            "avgObjSize", 0
+        )
+    except Exception:
+        return 0
+
+
+def ensure_data_structure_element_children_index():
+    """Create the index on the children of data structure elements
+
+    The orphan tree sweep joins the elements with their parents on children.
+
+    Returns:
+
+    """
+    DataStructureElement._get_collection().create_index(
+        DataStructureElement._fields["children"].db_field
+    )
+
+
+def get_orphan_user_data_structure_element_trees(date, batch_size):
+    """Returns the trees of data structure elements no user data structure points to
+
+    A single aggregation selects the user data structure elements that are not the
+    child of another element (tree roots) and joins them with the user data
+    structures on data_structure_element_root. Roots without a match are orphans,
+    their descendants are collected with a graph lookup on children. The joins use
+    the children index (see ensure_data_structure_element_children_index) and the
+    data_structure_element_root index of the user data structures.
+
+    Args:
+        date: aware datetime, only roots created before it are returned
+        batch_size: cursor batch size
+
+    Returns:
+        cursor of {"_id": root id, "descendants": [{"_id": element id}, ...]}
+
+    """
+    collection = DataStructureElement._get_collection()
+    data_structure_field = DataStructureElement._fields["data_structure"].db_field
+    root_field = UserDataStructure._fields["data_structure_element_root"].db_field
+    children_field = DataStructureElement._fields["children"].db_field
+    return collection.aggregate(
+        [
+            {
+                "$match": {
+                    "_id": {"$lt": ObjectId.from_datetime(date)},
+                    f"{data_structure_field}._cls": UserDataStructure._class_name,
+                }
+            },
+            {
+                "$lookup": {
+                    "from": collection.name,
+                    "localField": "_id",
+                    "foreignField": children_field,
+                    "as": "parents",
+                }
+            },
+            {"$match": {"parents": {"$size": 0}}},
+            {
+                "$lookup": {
+                    "from": UserDataStructure._get_collection_name(),
+                    "localField": "_id",
+                    "foreignField": root_field,
+                    "as": "data_structures",
+                }
+            },
+            {"$match": {"data_structures": {"$size": 0}}},
+            {
+                "$graphLookup": {
+                    "from": collection.name,
+                    "startWith": f"${children_field}",
+                    "connectFromField": children_field,
+                    "connectToField": "_id",
+                    "as": "descendants",
+                }
+            },
+            {"$project": {"_id": 1, "descendants._id": 1}},
+        ],
+        allowDiskUse=True,
+        batchSize=batch_size,
+    )
+
+
+def delete_orphan_user_data_structure_elements(date, batch_size):
+    """Delete, by batches, the trees of data structure elements no user data structure points to
+
+    Args:
+        date: aware datetime, only trees with a root created before it are deleted
+        batch_size: maximum number of elements deleted per query
+
+    Returns:
+        number of deleted elements
+
+    """
+    return _delete_by_batches(
+        DataStructureElement._get_collection(),
+        _get_tree_element_ids(
+            get_orphan_user_data_structure_element_trees(date, batch_size)
+        ),
+        batch_size,
+    )
+
+
+def delete_user_data_structure_drafts_created_before(date, batch_size):
+    """Delete one batch of user data structures with no data, created before a date
+
+    The elements of the deleted drafts are left to
+    delete_orphan_user_data_structure_elements.
+
+    Args:
+        date: aware datetime
+        batch_size: maximum number of drafts deleted
+
+    Returns:
+        number of deleted drafts
+
+    """
+    draft_ids = list(
+        UserDataStructure.objects(
+            id__lt=ObjectId.from_datetime(date), data__exists=False
+        )
+        .scalar("id")
+        .limit(batch_size)
+    )
+    if not draft_ids:
+        return 0
+    return (
+        UserDataStructure._get_collection()
+        .delete_many({"_id": {"$in": draft_ids}})
+        .deleted_count
+    )
+
+
+def delete_account_requests_without_metadata_created_before(date, batch_size):
+    """Delete one batch of account requests that never received metadata, created before a date
+
+    Args:
+        date: aware datetime
+        batch_size: maximum number of account requests deleted
+
+    Returns:
+        number of deleted account requests
+
+    """
+    return _delete_account_requests(
+        AccountRequestMetadata.objects(
+            id__lt=ObjectId.from_datetime(date), metadata=None
+        ),
+        batch_size,
+    )
+
+
+def delete_account_requests_with_metadata_created_before(date, batch_size):
+    """Delete one batch of pending account requests with metadata, created before a date
+
+    Args:
+        date: aware datetime
+        batch_size: maximum number of account requests deleted
+
+    Returns:
+        number of deleted account requests
+
+    """
+    return _delete_account_requests(
+        AccountRequestMetadata.objects(
+            id__lt=ObjectId.from_datetime(date), metadata__ne=None
+        ),
+        batch_size,
+    )
+
+
+def _delete_account_requests(account_requests, batch_size):
+    """Delete one batch of account requests, with their inactive user and their metadata
+
+    Args:
+        account_requests: AccountRequestMetadata queryset
+        batch_size:
+
+    Returns:
+        number of deleted account requests
+
+    """
+    account_requests = list(
+        account_requests.only("id", "username", "metadata")
+        .limit(batch_size)
+        .as_pymongo()
+    )
+    if not account_requests:
+        return 0
+    metadata_ids = [
+        account_request["metadata"]
+        for account_request in account_requests
+        if account_request.get("metadata") is not None
+    ]
+    # one by one, to also delete the xml files stored in GridFS
+    for user_metadata in UserMetadata.objects(id__in=metadata_ids):
+        user_metadata.delete()
+    # users are activated when their request is accepted: never delete active users
+    User.objects.filter(
+        username__in=[
+            account_request["username"] for account_request in account_requests
+        ],
+        is_active=False,
+    ).delete()
+    return (
+        AccountRequestMetadata._get_collection()
+        .delete_many(
+            {
+                "_id": {
+                    "$in": [
+                        account_request["_id"] for account_request in account_requests
+                    ]
+                }
+            }
+        )
+        .deleted_count
+    )
+
+
+def _get_tree_element_ids(trees):
+    """Yield the ids of the elements of the trees returned by the orphan aggregation
+
+    Args:
+        trees:
+
+    Returns:
+
+    """
+    for tree in trees:
+        yield tree["_id"]
+        for descendant in tree["descendants"]:
+            yield descendant["_id"]
+
+
+def _delete_by_batches(collection, document_ids, batch_size):
+    """Delete documents from a collection with one delete_many per batch of ids
+
+    Args:
+        collection: pymongo collection
+        document_ids: iterable of ids
+        batch_size:
+
+    Returns:
+        number of deleted documents
+
+    """
+    deleted_count = 0
+    batch = []
+    for document_id in document_ids:
+        batch.append(document_id)
+        if len(batch) >= batch_size:
+            deleted_count += collection.delete_many(
+                {"_id": {"$in": batch}}
+            ).deleted_count
+            batch = []
+    if batch:
+        deleted_count += collection.delete_many({"_id": {"$in": batch}}).deleted_count
+    return deleted_count
@@ -1,37 +1,407 @@
 """User Registration tasks """
 
 import logging
+import time
 from datetime import timedelta
+from uuid import uuid4
 
+from bson.objectid import ObjectId
+from celery import shared_task
 from celery.schedules import crontab
 from celery.task import periodic_task
 from django.utils import timezone
 
+from core_main_app.utils.datetime_tools.utils import datetime_now
+from core_parser_app.components.data_structure_element.models import (
+    DataStructureElement,
+)
+from core_user_registration_app.components.cleanup_run import (
+    api as cleanup_run_api,
+)
+from core_user_registration_app.components.cleanup_run.models import CleanupRun
+from core_user_registration_app.components.cleanup_state import (
+    api as cleanup_state_api,
+)
+from core_user_registration_app.components.lease import api as lease_api
 from core_user_registration_app.settings import (
+    DELETE_USER_DATA_STRUCTURE_RATE,
+    DELETE_USER_DATA_STRUCTURE_MAX_INTERVAL,
     USER_DATA_STRUCTURE_HOURS_THRESHOLD,
+    USER_DATA_STRUCTURE_DELETE_BATCH_SIZE,
+    USER_DATA_STRUCTURE_DELETE_MAX_BATCH_SIZE,
+    USER_DATA_STRUCTURE_TTL_INDEX_ENABLED,
+    USER_DATA_STRUCTURE_CLEANUP_LEASE_DURATION,
+    USER_DATA_STRUCTURE_CLEANUP_DRY_RUN,
+    USER_DATA_STRUCTURE_ORPHAN_GRACE_PERIOD,
+    REGISTRATION_RETENTION_POLICIES,
+    REGISTRATION_RETENTION_BATCH_SIZE,
+)
+from core_user_registration_app.components.user_data_structure.models import (
+    UserDataStructure,
 )
 from core_user_registration_app.system import api as system_api
 
 logger = logging.getLogger(__name__)
 
+USER_DATA_STRUCTURE_CLEANUP_NAME = "delete_user_data_structure"
+ORPHAN_DATA_STRUCTURE_ELEMENT_CLEANUP_NAME = (
+    "delete_orphan_user_data_structure_elements"
+)
 
-@periodic_task(run_every=crontab(minute="*"))
-def delete_user_data_structure():
-    """DELETES every DELETE_USER_DATA_STRUCTURE_RATE the UserDataStructure in the DataStructure collection"""
+# period in seconds of the beat schedule of delete_user_data_structure
+USER_DATA_STRUCTURE_CLEANUP_TICK = 60
+
+# deletion function of each retention policy, called with (date, batch_size)
+RETENTION_POLICY_FUNCTIONS = {
+    "user_data_structure": system_api.delete_user_data_structure_drafts_created_before,
+    "account_request_without_metadata": system_api.delete_account_requests_without_metadata_created_before,
+    "account_request_with_metadata": system_api.delete_account_requests_with_metadata_created_before,
+}
+
+
+# runs left in the queue past the next tick are dropped instead of piling up
+@periodic_task(
+    run_every=crontab(minute="*"),
+    options={"expires": USER_DATA_STRUCTURE_CLEANUP_TICK},
+)
+def delete_user_data_structure(dry_run=USER_DATA_STRUCTURE_CLEANUP_DRY_RUN):
+    """DELETES the UserDataStructure in the DataStructure collection
+
+    The interval between two runs adapts to the backlog, from
+    DELETE_USER_DATA_STRUCTURE_RATE to DELETE_USER_DATA_STRUCTURE_MAX_INTERVAL:
+    ticks arriving before the planned date are skipped.
+
+    Args:
+        dry_run: only count what would be deleted
+
+    Returns:
+
+    """
     logger.info("Checking Old UserDataStructures")
     try:
-        for data_structure_element in system_api.get_all_data_structure_elements():
-            if (
-                data_structure_element.data_structure.collection
-                == "user_data_structure"
-            ):
-                if (
-                    data_structure_element.id.generation_time
-                    < timezone.now()
-                    - timedelta(hours=USER_DATA_STRUCTURE_HOURS_THRESHOLD)
-                ):
-                    data_structure_element.delete()
-        logger.info("FINISH checking DataStructures.")
-
+        if not dry_run and not cleanup_state_api.is_due(
+            USER_DATA_STRUCTURE_CLEANUP_NAME
+        ):
+            logger.info("SKIP checking DataStructures: next run is not due yet.")
+            return
+        _run_with_lease(
+            USER_DATA_STRUCTURE_CLEANUP_NAME,
+            _delete_expired_user_data_structures,
+            dry_run,
+        )
     except Exception as e:
         logger.error(f"ERROR : Error while deleting data structures: {str(e)}")
+
+
+@periodic_task(run_every=crontab(minute=0), options={"expires": 3600})
+def delete_orphan_user_data_structure_elements(
+    dry_run=USER_DATA_STRUCTURE_CLEANUP_DRY_RUN,
+):
+    """DELETES every hour the element trees no UserDataStructure points to
+
+    Args:
+        dry_run: only count what would be deleted
+
+    Returns:
+
+    """
+    logger.info("Checking orphan DataStructureElements")
+    try:
+        _run_with_lease(
+            ORPHAN_DATA_STRUCTURE_ELEMENT_CLEANUP_NAME,
+            _delete_orphan_user_data_structure_elements,
+            dry_run,
+        )
+    except Exception as e:
+        logger.error(f"ERROR : Error while deleting orphan elements: {str(e)}")
+
+
+@periodic_task(run_every=crontab(minute=30), options={"expires": 3600})
+def apply_registration_retention_policies():
+    """Start every hour a retention task for each enabled registration retention policy
+
+    Returns:
+
+    """
+    for policy_name, hours in REGISTRATION_RETENTION_POLICIES.items():
+        if hours is None:
+            continue
+        if policy_name not in RETENTION_POLICY_FUNCTIONS:
+            logger.warning(f"Unknown registration retention policy: {policy_name}")
+            continue
+        apply_registration_retention_policy.apply_async((policy_name,))
+
+
+@shared_task
+def apply_registration_retention_policy(policy_name):
+    """Delete a batch of records expired under a retention policy, then schedule the next batch
+
+    Args:
+        policy_name:
+
+    Returns:
+
+    """
+    try:
+        deleted_count = _run_with_lease(
+            f"retention_{policy_name}", _apply_retention_policy, policy_name
+        )
+        if deleted_count is not None and (
+            deleted_count >= REGISTRATION_RETENTION_BATCH_SIZE
+        ):
+            apply_registration_retention_policy.apply_async((policy_name,))
+    except Exception as e:
+        logger.error(
+            f"ERROR : Error while applying retention policy {policy_name}: {str(e)}"
+        )
+
+
+def _run_with_lease(name, func, *args):
+    """Run func if no other worker holds the lease with the given name
+
+    Args:
+        name: lease name
+        func:
+        *args:
+
+    Returns:
+        result of func, None if the lease is held by another worker
+
+    """
+    lease_owner = str(uuid4())
+    if not lease_api.acquire(
+        name, lease_owner, USER_DATA_STRUCTURE_CLEANUP_LEASE_DURATION
+    ):
+        logger.info(f"SKIP {name}: another run holds the lease.")
+        return None
+    try:
+        return func(*args)
+    finally:
+        lease_api.release(name, lease_owner)
+
+
+def _delete_expired_user_data_structures(dry_run):
+    """Delete the expired UserDataStructure elements, and drafts in TTL index mode
+
+    Args:
+        dry_run: only count what would be deleted
+
+    Returns:
+        CleanupRun: counters and timings of the run, saved in the run history
+
+    """
+    cleanup_run = CleanupRun(
+        name=USER_DATA_STRUCTURE_CLEANUP_NAME,
+        start_date=datetime_now(),
+        dry_run=dry_run,
+    )
+    cleanup_state = cleanup_state_api.get_or_create(USER_DATA_STRUCTURE_CLEANUP_NAME)
+    expiration_date = timezone.now() - timedelta(
+        hours=USER_DATA_STRUCTURE_HOURS_THRESHOLD
+    )
+    batch_size = cleanup_state.batch_size or USER_DATA_STRUCTURE_DELETE_BATCH_SIZE
+
+    # count what is eligible
+    phase_start = time.monotonic()
+    # elements below the watermark have been processed by a previous run
+    cleanup_run.elements_scanned = (
+        system_api.get_all_user_data_structure_elements_created_before(
+            expiration_date, from_id=cleanup_state.watermark
+        ).count()
+    )
+    if USER_DATA_STRUCTURE_TTL_INDEX_ENABLED:
+        cleanup_run.structures_expired = (
+            system_api.get_all_user_data_structures_created_before(
+                expiration_date
+            ).count()
+        )
+    cleanup_run.phase_durations["scan"] = time.monotonic() - phase_start
+
+    # a dry run reclaims what a run would delete, a run only what it deleted
+    structures_deleted = cleanup_run.structures_expired if dry_run else 0
+    if USER_DATA_STRUCTURE_TTL_INDEX_ENABLED and not dry_run:
+        # drafts expire through the TTL index, only sweep what it missed
+        phase_start = time.monotonic()
+        try:
+            system_api.ensure_user_data_structure_ttl_index(
+                USER_DATA_STRUCTURE_HOURS_THRESHOLD * 3600
+            )
+        except Exception as e:
+            logger.warning(f"Unable to set the UserDataStructure TTL index: {str(e)}")
+        # capped as the element sweep, the next runs delete the rest
+        structures_deleted = (
+            system_api.delete_first_user_data_structures_created_before(
+                expiration_date, batch_size
+            )
+        )
+        cleanup_run.phase_durations["delete_structures"] = (
+            time.monotonic() - phase_start
+        )
+    elif not dry_run:
+        # the TTL index of a previous configuration would keep expiring drafts
+        try:
+            if system_api.drop_user_data_structure_ttl_index():
+                logger.info("UserDataStructure TTL index dropped.")
+        except Exception as e:
+            logger.warning(f"Unable to drop the UserDataStructure TTL index: {str(e)}")
+
+    if not dry_run:
+        phase_start = time.monotonic()
+        # a run deletes at most batch_size elements, the next run resumes after them
+        (
+            cleanup_run.elements_deleted,
+            last_element_id,
+        ) = system_api.delete_first_user_data_structure_elements_created_before(
+            expiration_date,
+            batch_size,
+            from_id=cleanup_state.watermark,
+        )
+        if cleanup_run.elements_scanned > batch_size:
+            cleanup_state.watermark = last_element_id
+        else:
+            cleanup_state.watermark = ObjectId.from_datetime(expiration_date)
+        # expired structures left by the capped sweep are a backlog as well
+        cleanup_state.interval, cleanup_state.batch_size = _get_next_schedule(
+            cleanup_state.interval,
+            batch_size,
+            max(cleanup_run.elements_scanned, cleanup_run.structures_expired),
+        )
+        cleanup_state.next_run_date = datetime_now() + timedelta(
+            seconds=cleanup_state.interval
+        )
+        cleanup_state_api.upsert(cleanup_state)
+        # the beat only ticks every minute, catch up faster during bursts
+        if cleanup_state.interval < USER_DATA_STRUCTURE_CLEANUP_TICK:
+            delete_user_data_structure.apply_async(countdown=cleanup_state.interval)
+        cleanup_run.phase_durations["delete_elements"] = time.monotonic() - phase_start
+
+    # estimated from the average document sizes reported by the database
+    cleanup_run.bytes_reclaimed = int(
+        (cleanup_run.elements_scanned if dry_run else cleanup_run.elements_deleted)
+        * system_api.get_average_document_size(DataStructureElement)
+        + structures_deleted * system_api.get_average_document_size(UserDataStructure)
+    )
+    cleanup_run.end_date = datetime_now()
+    cleanup_run_api.upsert(cleanup_run)
+
+    logger.info(
+        f"FINISH checking DataStructures{' (dry run)' if dry_run else ''}: "
+        f"{cleanup_run.elements_scanned} elements scanned, "
+        f"{cleanup_run.elements_deleted} elements deleted, "
+        f"{cleanup_run.structures_expired} structures expired, "
+        f"~{cleanup_run.bytes_reclaimed} bytes reclaimed, "
+        f"phase durations: {cleanup_run.phase_durations}."
+    )
+    return cleanup_run
+
+
+def _get_next_schedule(interval, batch_size, elements_scanned):
+    """Compute the interval and batch size of the next cleanup run
+
+    A run deletes at most batch_size elements. If more were eligible, a backlog
+    remains: run again as soon as possible, with a larger batch. An empty run
+    backs off exponentially. Otherwise, both values drift back toward their
+    defaults.
+
+    Args:
+        interval: interval in seconds used before the run, None on the first run
+        batch_size: maximum number of elements deleted by the run
+        elements_scanned: number of elements (or expired data structures, if more)
+            eligible for deletion at the start of the run
+
+    Returns:
+        tuple: next interval in seconds, next batch size
+
+    """
+    interval = interval or DELETE_USER_DATA_STRUCTURE_RATE
+    if elements_scanned == 0:
+        return (
+            min(interval * 2, DELETE_USER_DATA_STRUCTURE_MAX_INTERVAL),
+            USER_DATA_STRUCTURE_DELETE_BATCH_SIZE,
+        )
+    if elements_scanned > batch_size:
+        return (
+            DELETE_USER_DATA_STRUCTURE_RATE,
+            min(batch_size * 2, USER_DATA_STRUCTURE_DELETE_MAX_BATCH_SIZE),
+        )
+    return (
+        max(interval // 2, DELETE_USER_DATA_STRUCTURE_RATE),
+        max(batch_size // 2, USER_DATA_STRUCTURE_DELETE_BATCH_SIZE),
+    )
+
+
+def _delete_orphan_user_data_structure_elements(dry_run):
+    """Delete the element trees no UserDataStructure points to
+
+    Args:
+        dry_run: only count what would be deleted
+
+    Returns:
+        CleanupRun: counters and timings of the run, saved in the run history
+
+    """
+    cleanup_run = CleanupRun(
+        name=ORPHAN_DATA_STRUCTURE_ELEMENT_CLEANUP_NAME,
+        start_date=datetime_now(),
+        dry_run=dry_run,
+    )
+    # trees of forms being generated do not have their root set yet
+    grace_date = timezone.now() - timedelta(
+        seconds=USER_DATA_STRUCTURE_ORPHAN_GRACE_PERIOD
+    )
+
+    # the parent lookup of the sweep scans the elements without it
+    system_api.ensure_data_structure_element_children_index()
+    phase_start = time.monotonic()
+    if dry_run:
+        cleanup_run.elements_scanned = sum(
+            1 + len(tree["descendants"])
+            for tree in system_api.get_orphan_user_data_structure_element_trees(
+                grace_date, USER_DATA_STRUCTURE_DELETE_BATCH_SIZE
+            )
+        )
+        cleanup_run.phase_durations["scan"] = time.monotonic() - phase_start
+    else:
+        cleanup_run.elements_deleted = (
+            system_api.delete_orphan_user_data_structure_elements(
+                grace_date, USER_DATA_STRUCTURE_DELETE_BATCH_SIZE
+            )
+        )
+        cleanup_run.elements_scanned = cleanup_run.elements_deleted
+        cleanup_run.phase_durations["delete_elements"] = time.monotonic() - phase_start
+
+    cleanup_run.bytes_reclaimed = int(
+        (cleanup_run.elements_scanned if dry_run else cleanup_run.elements_deleted)
+        * system_api.get_average_document_size(DataStructureElement)
+    )
+    cleanup_run.end_date = datetime_now()
+    cleanup_run_api.upsert(cleanup_run)
+
+    logger.info(
+        f"FINISH checking orphan DataStructureElements{' (dry run)' if dry_run else ''}: "
+        f"{cleanup_run.elements_scanned} elements scanned, "
+        f"{cleanup_run.elements_deleted} elements deleted, "
+        f"~{cleanup_run.bytes_reclaimed} bytes reclaimed, "
+        f"phase durations: {cleanup_run.phase_durations}."
+    )
+    return cleanup_run
+
+
+def _apply_retention_policy(policy_name):
+    """Delete a batch of records older than the retention policy threshold
+
+    Args:
+        policy_name:
+
+    Returns:
+        number of deleted records
+
+    """
+    expiration_date = timezone.now() - timedelta(
+        hours=REGISTRATION_RETENTION_POLICIES[policy_name]
+    )
+    deleted_count = RETENTION_POLICY_FUNCTIONS[policy_name](
+        expiration_date, REGISTRATION_RETENTION_BATCH_SIZE
+    )
+    logger.info(f"FINISH retention policy {policy_name}: {deleted_count} deleted.")
+    return deleted_count
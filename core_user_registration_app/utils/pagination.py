@@ -0,0 +1,196 @@
+""" Keyset pagination utils for the registration app
+"""
+import base64
+import binascii
+import json
+
+from bson import json_util
+from mongoengine.queryset.field_list import QueryFieldList
+from mongoengine.queryset.visitor import Q
+
+from core_main_app.commons import exceptions
+
+# decode dates as naive datetimes, as they are stored
+_JSON_OPTIONS = json_util.JSONOptions(tz_aware=False)
+
+
+def get_sort_keys(order_by_field):
+    """Return the (field name, direction) pairs of an ordering, ending with the id.
+
+    Args:
+        order_by_field: list of fields to order by, e.g. ["-title", "+date"]
+
+    Returns:
+
+    """
+    sort_keys = []
+    for field in order_by_field:
+        if field.startswith("-"):
+            sort_keys.append((field[1:], -1))
+        else:
+            sort_keys.append((field.lstrip("+"), 1))
+    # the id makes the ordering total, so each document has a unique position
+    if not any(name in ("id", "pk") for name, _ in sort_keys):
+        sort_keys.append(("id", 1))
+    return sort_keys
+
+
+def encode_continuation_token(document, sort_keys):
+    """Return an opaque token pointing after the document.
+
+    Args:
+        document:
+        sort_keys:
+
+    Returns:
+
+    """
+    payload = {
+        "keys": _get_order_by(sort_keys),
+        "values": [_get_value(document, name) for name, _ in sort_keys],
+    }
+    return base64.urlsafe_b64encode(json_util.dumps(payload).encode("utf-8")).decode(
+        "ascii"
+    )
+
+
+def decode_continuation_token(continuation_token, sort_keys):
+    """Return the sort values stored in a continuation token.
+
+    Args:
+        continuation_token:
+        sort_keys:
+
+    Returns:
+
+    """
+    try:
+        payload = json_util.loads(
+            base64.urlsafe_b64decode(continuation_token.encode("ascii")).decode(
+                "utf-8"
+            ),
+            json_options=_JSON_OPTIONS,
+        )
+        keys = payload["keys"]
+        values = payload["values"]
+    except (
+        AttributeError,
+        KeyError,
+        TypeError,
+        UnicodeError,
+        ValueError,
+        binascii.Error,
+        json.JSONDecodeError,
+    ):
+        raise exceptions.ApiError("Invalid continuation token.")
+
+    if keys != _get_order_by(sort_keys) or len(values) != len(sort_keys):
+        raise exceptions.ApiError(
+            "The continuation token does not match the requested ordering."
+        )
+    return values
+
+
+def get_page(queryset, order_by_field, page_size, continuation_token=None):
+    """Return a page of the queryset, and the token of the next page.
+
+    The page starts after the document the token points to, using a range
+    condition on the sort fields instead of skipping the previous documents.
+
+    Args:
+        queryset:
+        order_by_field: list of fields to order by
+        page_size: maximum number of documents in the page
+        continuation_token: token returned with the previous page, None for the first page
+
+    Returns: list of documents, token of the next page (None on the last page)
+
+    """
+    if page_size < 1:
+        raise exceptions.ApiError("The page size must be a positive integer.")
+
+    sort_keys = get_sort_keys(order_by_field)
+    queryset = queryset.order_by(*_get_order_by(sort_keys))
+    if queryset._loaded_fields.value == QueryFieldList.ONLY:
+        # projected documents must hold the sort values of the continuation token
+        queryset = queryset.only(*[name for name, _ in sort_keys])
+    if continuation_token is not None:
+        after_query = _get_after_query(
+            sort_keys, decode_continuation_token(continuation_token, sort_keys)
+        )
+        if after_query is None:
+            return [], None
+        queryset = queryset.filter(after_query)
+
+    # one extra document tells whether there is a next page
+    documents = list(queryset.limit(page_size + 1))
+    if len(documents) <= page_size:
+        return documents, None
+    return documents[:page_size], encode_continuation_token(
+        documents[page_size - 1], sort_keys
+    )
+
+
+def _get_order_by(sort_keys):
+    """Return the order_by arguments of sort keys.
+
+    Args:
+        sort_keys:
+
+    Returns:
+
+    """
+    return [("-" if direction < 0 else "+") + name for name, direction in sort_keys]
+
+
+def _get_value(document, name):
+    """Return the value of a (possibly nested) field of a document.
+
+    Args:
+        document:
+        name:
+
+    Returns:
+
+    """
+    if isinstance(document, dict) and name in ("id", "pk"):
+        # raw documents returned by as_pymongo
+        name = "_id"
+    value = document
+    for part in name.replace("__", ".").split("."):
+        if value is None:
+            return None
+        value = value.get(part) if isinstance(value, dict) else getattr(value, part)
+    # references are compared by id
+    return getattr(value, "pk", value)
+
+
+def _get_after_query(sort_keys, values):
+    """Return the condition matching the documents after the given sort values.
+
+    Null values sort first: in ascending order they are all before the
+    non-null ones, in descending order all after.
+
+    Args:
+        sort_keys:
+        values:
+
+    Returns: query, None if no document can come after
+
+    """
+    after_query = None
+    equal_query = Q()
+    for (name, direction), value in zip(sort_keys, values):
+        field = name.replace(".", "__")
+        if value is None:
+            after = Q(**{f"{field}__ne": None}) if direction > 0 else None
+        elif direction > 0:
+            after = Q(**{f"{field}__gt": value})
+        else:
+            after = Q(**{f"{field}__lt": value}) | Q(**{field: None})
+
+        if after is not None:
+            clause = equal_query & after
+            after_query = clause if after_query is None else after_query | clause
+        equal_query = equal_query & Q(**{field: value})
+    return after_query
@@ -0,0 +1,155 @@
+""" Cache of the workspaces accessible by a user
+"""
+from collections import namedtuple
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed
+from mongoengine import signals as mongoengine_signals
+
+from core_main_app.components.workspace import api as workspace_api
+from core_main_app.components.workspace.models import Workspace
+from core_user_registration_app.settings import REGISTRATION_WORKSPACE_ACCESS_CACHE_TTL
+
+CACHE_KEY_PREFIX = "core_user_registration_app:accessible_workspaces"
+# changed to invalidate the workspaces cached for every user
+CACHE_VERSION_KEY = f"{CACHE_KEY_PREFIX}:version"
+
+# ids of the workspaces a user can read, and can write
+AccessibleWorkspaces = namedtuple("AccessibleWorkspaces", ["read", "write"])
+
+
+def get_accessible_workspaces(user):
+    """Return the ids of the workspaces the user can read, and can write.
+
+    The ids are cached for REGISTRATION_WORKSPACE_ACCESS_CACHE_TTL seconds, in
+    the Django cache, which must be shared by all processes to be invalidated.
+
+    Args:
+        user:
+
+    Returns:
+        AccessibleWorkspaces
+
+    """
+    if REGISTRATION_WORKSPACE_ACCESS_CACHE_TTL <= 0 or user.id is None:
+        return _get_accessible_workspaces(user)
+
+    key = _get_cache_key(user.id)
+    accessible_workspaces = cache.get(key)
+    if accessible_workspaces is None:
+        accessible_workspaces = _get_accessible_workspaces(user)
+        cache.set(key, accessible_workspaces, REGISTRATION_WORKSPACE_ACCESS_CACHE_TTL)
+    return accessible_workspaces
+
+
+def invalidate_accessible_workspaces(user_id=None):
+    """Remove the cached workspaces of a user, of every user if None.
+
+    Args:
+        user_id:
+
+    Returns:
+
+    """
+    if user_id is not None:
+        cache.delete(_get_cache_key(user_id))
+        return
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        # no version yet, or evicted
+        cache.set(CACHE_VERSION_KEY, 1, None)
+
+
+def _get_cache_key(user_id):
+    """Return the cache key of the workspaces of a user.
+
+    Args:
+        user_id:
+
+    Returns:
+
+    """
+    version = cache.get(CACHE_VERSION_KEY, 0)
+    return f"{CACHE_KEY_PREFIX}:{version}:{user_id}"
+
+
+def _get_accessible_workspaces(user):
+    """Query the ids of the workspaces the user can read, and can write.
+
+    Args:
+        user:
+
+    Returns:
+
+    """
+    return AccessibleWorkspaces(
+        read=[
+            workspace.id
+            for workspace in workspace_api.get_all_workspaces_with_read_access_by_user(
+                user
+            )
+        ],
+        write=[
+            workspace.id
+            for workspace in workspace_api.get_all_workspaces_with_write_access_by_user(
+                user
+            )
+        ],
+    )
+
+
+def _on_user_access_changed(sender, instance, action, reverse, **kwargs):
+    """Invalidate the cached workspaces when permissions or groups of users change.
+
+    Args:
+        sender:
+        instance:
+        action:
+        reverse:
+        **kwargs:
+
+    Returns:
+
+    """
+    if not action.startswith("post_"):
+        return
+    # a user changed, or a permission / group was given to several users
+    invalidate_accessible_workspaces(None if reverse else instance.pk)
+
+
+def _on_group_permissions_changed(sender, action, **kwargs):
+    """Invalidate the cached workspaces when permissions of a group change.
+
+    Args:
+        sender:
+        action:
+        **kwargs:
+
+    Returns:
+
+    """
+    if action.startswith("post_"):
+        invalidate_accessible_workspaces()
+
+
+def _on_workspace_changed(sender, document, **kwargs):
+    """Invalidate the cached workspaces when a workspace is saved or deleted.
+
+    Args:
+        sender:
+        document:
+        **kwargs:
+
+    Returns:
+
+    """
+    invalidate_accessible_workspaces()
+
+
+m2m_changed.connect(_on_user_access_changed, sender=User.user_permissions.through)
+m2m_changed.connect(_on_user_access_changed, sender=User.groups.through)
+m2m_changed.connect(_on_group_permissions_changed, sender=Group.permissions.through)
+mongoengine_signals.post_save.connect(_on_workspace_changed, sender=Workspace)
+mongoengine_signals.post_delete.connect(_on_workspace_changed, sender=Workspace)
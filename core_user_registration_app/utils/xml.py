@@ -0,0 +1,292 @@
+""" XML utils for the registration app
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+
+from lxml import etree
+
+from core_main_app.settings import XERCES_VALIDATION, XSD_URI_RESOLVER
+from core_main_app.utils.resolvers.resolver_utils import lmxl_uri_resolver
+from core_main_app.utils.xml import validate_xml_data as core_validate_xml_data
+from core_user_registration_app.settings import (
+    REGISTRATION_SCHEMA_CACHE_SIZE,
+    REGISTRATION_VALIDATION_CACHE_SIZE,
+    REGISTRATION_VALIDATION_CACHE_TTL,
+)
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+# compiled schemas by (template id, template content hash), least recently used first
+_schema_cache = OrderedDict()
+_schema_cache_lock = threading.Lock()
+# (expiration time, error) by (template content hash, XML digest), oldest first
+_validation_cache = OrderedDict()
+_validation_cache_lock = threading.Lock()
+
+
+# id and content of a template, sent to the validation worker processes
+SchemaSource = namedtuple("SchemaSource", ["id", "content"])
+
+
+class CompiledSchema(object):
+    """Parsed and compiled schema of a template"""
+
+    def __init__(self, xsd_tree, xml_schema):
+        self.xsd_tree = xsd_tree
+        self.xml_schema = xml_schema
+        # lxml schemas keep the error log of the last validation
+        self.lock = threading.Lock()
+
+
+def get_template_content_hash(template):
+    """Return the hash of the content of a template.
+
+    Args:
+        template:
+
+    Returns:
+        str: hexadecimal digest
+
+    """
+    return hashlib.sha256(template.content.encode("utf-8")).hexdigest()
+
+
+def get_compiled_schema(template, request=None):
+    """Return the compiled schema of a template, from the cache if possible.
+
+    Args:
+        template:
+        request: used to resolve the imports and includes of the schema
+
+    Returns:
+        CompiledSchema:
+
+    """
+    key = (str(template.id), get_template_content_hash(template))
+    with _schema_cache_lock:
+        compiled_schema = _schema_cache.get(key)
+        if compiled_schema is not None:
+            _schema_cache.move_to_end(key)
+            return compiled_schema
+
+    xsd_tree = XSDTree.build_tree(template.content)
+    uri_resolver = lmxl_uri_resolver(request=request)
+    if uri_resolver:
+        xsd_tree.parser.resolvers.add(uri_resolver)
+    compiled_schema = CompiledSchema(xsd_tree, etree.XMLSchema(xsd_tree))
+
+    with _schema_cache_lock:
+        _schema_cache[key] = compiled_schema
+        while len(_schema_cache) > REGISTRATION_SCHEMA_CACHE_SIZE:
+            _schema_cache.popitem(last=False)
+    return compiled_schema
+
+
+def invalidate_schema_cache(template_ids=None):
+    """Remove compiled schemas from the cache.
+
+    Args:
+        template_ids: ids of the templates to remove, all if None
+
+    Returns:
+
+    """
+    with _schema_cache_lock:
+        if template_ids is None:
+            _schema_cache.clear()
+            return
+        template_ids = {str(template_id) for template_id in template_ids}
+        for key in [key for key in _schema_cache if key[0] in template_ids]:
+            del _schema_cache[key]
+
+
+def get_xml_digest(xml_tree):
+    """Return the digest of the canonical form of an XML tree.
+
+    Args:
+        xml_tree:
+
+    Returns:
+        str: hexadecimal digest
+
+    """
+    return hashlib.sha256(etree.tostring(xml_tree, method="c14n")).hexdigest()
+
+
+def clear_validation_cache():
+    """Remove all validation results from the cache.
+
+    Returns:
+
+    """
+    with _validation_cache_lock:
+        _validation_cache.clear()
+
+
+def validate_xml_data(template, xml_tree, request=None):
+    """Check if XML data is valid against the schema of a template.
+
+    The result is reused for identical documents validated against the same
+    schema within REGISTRATION_VALIDATION_CACHE_TTL seconds.
+
+    Args:
+        template:
+        xml_tree:
+        request:
+
+    Returns:
+        None if no errors, string otherwise
+
+    """
+    if REGISTRATION_VALIDATION_CACHE_SIZE <= 0:
+        return _validate_xml_data(template, xml_tree, request)
+
+    key = (get_template_content_hash(template), get_xml_digest(xml_tree))
+    with _validation_cache_lock:
+        cached_result = _validation_cache.get(key)
+        if cached_result is not None:
+            expiration_time, error = cached_result
+            if expiration_time > time.monotonic():
+                return error
+            del _validation_cache[key]
+
+    error = _validate_xml_data(template, xml_tree, request)
+
+    with _validation_cache_lock:
+        _validation_cache[key] = (
+            time.monotonic() + REGISTRATION_VALIDATION_CACHE_TTL,
+            error,
+        )
+        _validation_cache.move_to_end(key)
+        while len(_validation_cache) > REGISTRATION_VALIDATION_CACHE_SIZE:
+            _validation_cache.popitem(last=False)
+    return error
+
+
+def _validate_xml_data(template, xml_tree, request):
+    """Validate XML data against the schema of a template, without result cache.
+
+    Args:
+        template:
+        xml_tree:
+        request:
+
+    Returns:
+        None if no errors, string otherwise
+
+    """
+    if XERCES_VALIDATION:
+        # the schema is sent to the validation server, nothing to compile
+        xsd_tree = XSDTree.build_tree(template.content)
+        return core_validate_xml_data(xsd_tree, xml_tree, request=request)
+
+    try:
+        compiled_schema = get_compiled_schema(template, request=request)
+    except etree.XMLSchemaParseError as e:
+        return str(e)
+    with compiled_schema.lock:
+        try:
+            compiled_schema.xml_schema.assertValid(xml_tree)
+        except Exception as e:
+            return str(e)
+    return None
+
+
+def validate_xml_contents(template, xml_contents):
+    """Parse and validate XML documents against the schema of a template.
+
+    Run by the validation worker processes, each with its own schema cache.
+
+    Args:
+        template: template or SchemaSource
+        xml_contents: list of XML strings
+
+    Returns:
+        list: None if no errors, string otherwise, for each XML string
+
+    """
+    errors = []
+    for xml_content in xml_contents:
+        try:
+            xml_tree = XSDTree.build_tree(xml_content)
+            errors.append(validate_xml_data(template, xml_tree))
+        except Exception as e:
+            errors.append(str(e))
+    return errors
+
+
+def is_validation_request_dependent():
+    """Tell whether validating a document needs the request of the user.
+
+    The URI resolver of the schema imports and includes reads the session of
+    the request, which cannot be sent to worker processes.
+
+    Returns:
+        bool:
+
+    """
+    return bool(XSD_URI_RESOLVER) and not XERCES_VALIDATION
+
+
+def validate_xml_contents_in_pool(executor, items, workers):
+    """Validate XML documents in a pool of worker processes.
+
+    The documents of each template are split in one batch per worker.
+
+    Args:
+        executor: concurrent.futures.ProcessPoolExecutor
+        items: list of (template, XML string)
+        workers: number of processes of the executor
+
+    Yields:
+        None if no errors, string otherwise, for each item in input order
+
+    """
+    # unsaved templates have no id, group the documents by schema content
+    positions_by_schema = OrderedDict()
+    for position, (template, _) in enumerate(items):
+        try:
+            key = get_template_content_hash(template)
+        except Exception:
+            # no content to hash, the item fails on its own below
+            key = (None, position)
+        positions_by_schema.setdefault(key, []).append(position)
+
+    batches = []
+    for positions in positions_by_schema.values():
+        template = items[positions[0]][0]
+        try:
+            schema_source = SchemaSource(str(template.id), template.content)
+        except Exception as e:
+            # no schema to send to the workers, every document of the template fails
+            future = Future()
+            future.set_exception(e)
+            batches.append((positions, future))
+            continue
+        batch_size = math.ceil(len(positions) / workers)
+        for start in range(0, len(positions), batch_size):
+            batch_positions = positions[start : start + batch_size]
+            future = executor.submit(
+                validate_xml_contents,
+                schema_source,
+                [items[position][1] for position in batch_positions],
+            )
+            batches.append((batch_positions, future))
+    # batches start in input order, but can interleave for several templates
+    batches.sort(key=lambda batch: batch[0][0])
+
+    errors = {}
+    next_position = 0
+    for batch_positions, future in batches:
+        try:
+            batch_errors = future.result()
+        except Exception as e:
+            # a failed batch only fails its own documents
+            batch_errors = [str(e)] * len(batch_positions)
+        errors.update(zip(batch_positions, batch_errors))
+        while next_position in errors:
+            yield errors.pop(next_position)
+            next_position += 1
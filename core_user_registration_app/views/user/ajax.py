@@ -9,11 +9,9 @@ from django.http.response import HttpResponseBadRequest, HttpResponse
 from core_main_app.access_control.exceptions import AccessControlError
 from core_main_app.commons.exceptions import DoesNotExist
 from core_main_app.components.workspace import api as workspace_api
-from core_main_app.utils.xml import validate_xml_data
 from core_parser_app.components.data_structure_element import (
     api as data_structure_element_api,
 )
-from core_parser_app.tools.parser.renderer.xml import XmlRenderer
 from core_user_registration_app.components.account_request_metadata import (
     api as account_request_metadata_api,
 )
@@ -26,7 +24,6 @@ from xml_utils.xsd_tree.xsd_tree import XSDTree
 
 
 def save_data(request):
-    response_dict = {}
     try:
 
         # get user data structure
@@ -43,42 +40,29 @@ def save_data(request):
         # save data structure
         user_data_structure_api.upsert(user_data_structure, request.user)
 
-        # build trees
-        xsd_tree = XSDTree.build_tree(user_data_structure.template.content)
+        # build tree, validated once by the metadata api before saving
         xml_tree = XSDTree.build_tree(xml_data)
 
-        # validate XML document
-        errors = validate_xml_data(xsd_tree, xml_tree, request=request)
-        if errors is not None:
-            response_dict["errors"] = errors
-
-        if errors is None:
-            # generate the XML
-            xml_data = render_xml(
-                user_data_structure.data_structure_element_root, request
-            )
-
-            if user_data_structure._data is not None:
-                # create new data
-                data = UserMetadata()
-                data.title = user_data_structure.name
-                data.template = user_data_structure.template
-                data.user_id = str(request.user.id)
-                data.id = user_data_structure.pk
-                data.workspace = workspace_api.get_global_workspace()
-
-            # set content
-            data.xml_content = xml_data
-            # save data
-            data = data_api.upsert(data, request.user)
-            # insert Metadata reference in account request
-            account_request_metadata_api.insert_metadata(
-                request.user, account_request_metadata_id, data
-            )
-            user_data_structure_api.delete(user_data_structure, request.user)
-            messages.add_message(
-                request, messages.SUCCESS, "User metadata saved with success."
-            )
+        # create new data
+        data = UserMetadata()
+        data.title = user_data_structure.name
+        data.template = user_data_structure.template
+        data.user_id = str(request.user.id)
+        data.id = user_data_structure.pk
+        data.workspace = workspace_api.get_global_workspace()
+
+        # set content
+        data.xml_content = xml_data
+        # validate and save data
+        data = data_api.upsert(data, request, xml_tree=xml_tree)
+        # insert Metadata reference in account request
+        account_request_metadata_api.insert_metadata(
+            request.user, account_request_metadata_id, data
+        )
+        user_data_structure_api.delete(user_data_structure, request.user)
+        messages.add_message(
+            request, messages.SUCCESS, "User metadata saved with success."
+        )
     except Exception as e:
         message = str(e).replace('"', "'")
         return HttpResponseBadRequest(message, content_type="application/javascript")
@@ -97,6 +81,8 @@ def render_xml(root_element, request):
     Returns:
 
     """
+    from core_parser_app.tools.parser.renderer.xml import XmlRenderer
+
     # build XML renderer
     xml_renderer = XmlRenderer(root_element, request)
 
@@ -7,9 +7,9 @@ from django.template.loader import get_template
 from django.urls import reverse
 from django.views import View
 
-from core_curate_app.views.user.views import generate_form, render_form
 from core_main_app.commons.exceptions import ApiError
 from core_main_app.utils.rendering import render
+from core_user_registration_app import discover
 from core_user_registration_app.components.account_request_metadata import (
     api as account_request_metadata_api,
 )
@@ -33,6 +33,8 @@ def request_new_account(request):
         "css": ["core_website_app/user/css/list.css"],
     }
 
+    discover.ensure_registration_app_initialized()
+
     if request.method == "POST":
         request_form = RequestAccountForm(request.POST)
         if request_form.is_valid():
@@ -154,6 +156,7 @@ class AccountCreationView(View):
         }
 
     def get(self, request, objectid, accountid):
+        discover.ensure_registration_app_initialized()
         context = self.build_context(request, objectid, accountid)
         return render(
             request,
@@ -172,7 +175,9 @@ class AccountCreationView(View):
         Returns:
 
         """
-        #
+        # form generation pulls in the curate app and the parser, load it on first use
+        from core_curate_app.views.user.views import generate_form, render_form
+
         user_data_structure = user_data_structure_api.get_by_id(objectid)
         xsd_string = user_data_structure.template.content
         xml_string = user_data_structure.form_string
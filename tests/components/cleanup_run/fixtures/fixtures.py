@@ -0,0 +1,31 @@
+""" Fixtures files for Cleanup Run
+"""
+from datetime import timedelta
+
+from core_main_app.utils.datetime_tools.utils import datetime_now
+from core_main_app.utils.integration_tests.fixture_interface import FixtureInterface
+from core_user_registration_app.components.cleanup_run.models import CleanupRun
+
+
+class CleanupRunFixtures(FixtureInterface):
+    """Cleanup Run fixtures"""
+
+    recent_run = None
+    old_run = None
+    old_run_of_other_cleanup = None
+
+    def insert_data(self):
+        """Insert a recent and an old run of a cleanup, and an old run of another one.
+
+        Returns:
+
+        """
+        self.recent_run = CleanupRun(
+            name="cleanup", start_date=datetime_now() - timedelta(days=1)
+        ).save()
+        self.old_run = CleanupRun(
+            name="cleanup", start_date=datetime_now() - timedelta(days=10)
+        ).save()
+        self.old_run_of_other_cleanup = CleanupRun(
+            name="other", start_date=datetime_now() - timedelta(days=10)
+        ).save()
@@ -0,0 +1,35 @@
+""" Integration Test Cleanup Run
+"""
+from mock import patch
+
+from core_main_app.utils.datetime_tools.utils import datetime_now
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    MongoIntegrationBaseTestCase,
+)
+from core_user_registration_app.components.cleanup_run import (
+    api as cleanup_run_api,
+)
+from core_user_registration_app.components.cleanup_run.models import CleanupRun
+from tests.components.cleanup_run.fixtures.fixtures import CleanupRunFixtures
+
+fixture_cleanup_run = CleanupRunFixtures()
+
+
+class TestCleanupRunUpsert(MongoIntegrationBaseTestCase):
+    fixture = fixture_cleanup_run
+
+    @patch.object(cleanup_run_api, "CLEANUP_RUN_HISTORY_RETENTION", 5 * 24 * 3600)
+    def test_upsert_deletes_runs_of_same_cleanup_older_than_retention(self):
+        # Act
+        cleanup_run_api.upsert(CleanupRun(name="cleanup", start_date=datetime_now()))
+        # Assert
+        self.assertEqual(CleanupRun.get_all_by_name("cleanup").count(), 2)
+        self.assertFalse(CleanupRun.objects(id=self.fixture.old_run.id).first())
+        self.assertEqual(CleanupRun.get_all_by_name("other").count(), 1)
+
+    @patch.object(cleanup_run_api, "CLEANUP_RUN_HISTORY_RETENTION", 0)
+    def test_upsert_without_retention_keeps_history(self):
+        # Act
+        cleanup_run_api.upsert(CleanupRun(name="cleanup", start_date=datetime_now()))
+        # Assert
+        self.assertEqual(CleanupRun.get_all_by_name("cleanup").count(), 3)
@@ -0,0 +1,31 @@
+""" Unit Test Cleanup Run
+"""
+from unittest.case import TestCase
+
+from mock import patch
+
+from core_main_app.access_control.exceptions import AccessControlError
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_user_registration_app.components.cleanup_run import (
+    api as cleanup_run_api,
+)
+from core_user_registration_app.components.cleanup_run.models import CleanupRun
+
+
+class TestCleanupRunGetAllByName(TestCase):
+    @patch.object(CleanupRun, "get_all_by_name")
+    def test_get_all_by_name_as_superuser_returns_history(self, mock_get_all):
+        # Arrange
+        mock_get_all.return_value = [CleanupRun(name="cleanup")]
+        mock_user = create_mock_user("1", is_staff=True, is_superuser=True)
+        # Act
+        result = cleanup_run_api.get_all_by_name("cleanup", mock_user)
+        # Assert
+        self.assertTrue(all(isinstance(item, CleanupRun) for item in result))
+
+    def test_get_all_by_name_as_user_raises_error(self):
+        # Arrange
+        mock_user = create_mock_user("1")
+        # Act # Assert
+        with self.assertRaises(AccessControlError):
+            cleanup_run_api.get_all_by_name("cleanup", mock_user)
@@ -0,0 +1,20 @@
+""" Fixtures files for Cleanup State
+"""
+from bson.objectid import ObjectId
+
+from core_main_app.utils.integration_tests.fixture_interface import FixtureInterface
+from core_user_registration_app.components.cleanup_state.models import CleanupState
+
+
+class CleanupStateFixtures(FixtureInterface):
+    """Cleanup State fixtures"""
+
+    cleanup_state = None
+
+    def insert_data(self):
+        """Insert a Cleanup State.
+
+        Returns:
+
+        """
+        self.cleanup_state = CleanupState(name="cleanup", watermark=ObjectId()).save()
@@ -0,0 +1,72 @@
+""" Integration Test Cleanup State
+"""
+from datetime import timedelta
+
+from core_main_app.commons import exceptions
+from core_main_app.utils.datetime_tools.utils import datetime_now
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    MongoIntegrationBaseTestCase,
+)
+from core_user_registration_app.components.cleanup_state import (
+    api as cleanup_state_api,
+)
+from tests.components.cleanup_state.fixtures.fixtures import CleanupStateFixtures
+
+fixture_cleanup_state = CleanupStateFixtures()
+
+
+class TestCleanupStateGetByName(MongoIntegrationBaseTestCase):
+    fixture = fixture_cleanup_state
+
+    def test_returns_cleanup_state(self):
+        # Act
+        result = cleanup_state_api.get_by_name("cleanup")
+        # Assert
+        self.assertEqual(result.watermark, self.fixture.cleanup_state.watermark)
+
+    def test_raises_does_not_exist_if_not_found(self):
+        # Act # Assert
+        with self.assertRaises(exceptions.DoesNotExist):
+            cleanup_state_api.get_by_name("unknown")
+
+
+class TestCleanupStateGetOrCreate(MongoIntegrationBaseTestCase):
+    fixture = fixture_cleanup_state
+
+    def test_returns_existing_cleanup_state(self):
+        # Act
+        result = cleanup_state_api.get_or_create("cleanup")
+        # Assert
+        self.assertEqual(result.id, self.fixture.cleanup_state.id)
+
+    def test_returns_new_cleanup_state_without_watermark(self):
+        # Act
+        result = cleanup_state_api.get_or_create("other")
+        # Assert
+        self.assertIsNone(result.watermark)
+
+
+class TestCleanupStateIsDue(MongoIntegrationBaseTestCase):
+    fixture = fixture_cleanup_state
+
+    def test_returns_true_without_next_run_date(self):
+        # Act # Assert
+        self.assertTrue(cleanup_state_api.is_due("cleanup"))
+
+    def test_returns_true_for_unknown_cleanup(self):
+        # Act # Assert
+        self.assertTrue(cleanup_state_api.is_due("other"))
+
+    def test_returns_true_if_next_run_date_is_past(self):
+        # Arrange
+        self.fixture.cleanup_state.next_run_date = datetime_now() - timedelta(minutes=1)
+        self.fixture.cleanup_state.save()
+        # Act # Assert
+        self.assertTrue(cleanup_state_api.is_due("cleanup"))
+
+    def test_returns_false_if_next_run_date_is_future(self):
+        # Arrange
+        self.fixture.cleanup_state.next_run_date = datetime_now() + timedelta(minutes=1)
+        self.fixture.cleanup_state.save()
+        # Act # Assert
+        self.assertFalse(cleanup_state_api.is_due("cleanup"))
@@ -0,0 +1,31 @@
+""" Fixtures files for Lease
+"""
+from datetime import timedelta
+
+from core_main_app.utils.datetime_tools.utils import datetime_now
+from core_main_app.utils.integration_tests.fixture_interface import FixtureInterface
+from core_user_registration_app.components.lease.models import Lease
+
+
+class LeaseFixtures(FixtureInterface):
+    """Lease fixtures"""
+
+    active_lease = None
+    expired_lease = None
+
+    def insert_data(self):
+        """Insert an active and an expired Lease.
+
+        Returns:
+
+        """
+        self.active_lease = Lease(
+            name="active",
+            owner="owner_1",
+            expiration_date=datetime_now() + timedelta(minutes=5),
+        ).save()
+        self.expired_lease = Lease(
+            name="expired",
+            owner="owner_1",
+            expiration_date=datetime_now() - timedelta(minutes=5),
+        ).save()
@@ -0,0 +1,57 @@
+""" Integration Test Lease
+"""
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    MongoIntegrationBaseTestCase,
+)
+from core_user_registration_app.components.lease import api as lease_api
+from core_user_registration_app.components.lease.models import Lease
+from tests.components.lease.fixtures.fixtures import LeaseFixtures
+
+fixture_lease = LeaseFixtures()
+
+
+class TestLeaseAcquire(MongoIntegrationBaseTestCase):
+    fixture = fixture_lease
+
+    def test_acquire_new_lease_returns_true(self):
+        # Act
+        result = lease_api.acquire("new", "owner_2", 60)
+        # Assert
+        self.assertTrue(result)
+        self.assertEqual(Lease.get_by_name("new").owner, "owner_2")
+
+    def test_acquire_active_lease_of_other_owner_returns_false(self):
+        # Act
+        result = lease_api.acquire("active", "owner_2", 60)
+        # Assert
+        self.assertFalse(result)
+        self.assertEqual(Lease.get_by_name("active").owner, "owner_1")
+
+    def test_acquire_active_lease_of_same_owner_returns_true(self):
+        # Act
+        result = lease_api.acquire("active", "owner_1", 60)
+        # Assert
+        self.assertTrue(result)
+
+    def test_acquire_expired_lease_of_other_owner_returns_true(self):
+        # Act
+        result = lease_api.acquire("expired", "owner_2", 60)
+        # Assert
+        self.assertTrue(result)
+        self.assertEqual(Lease.get_by_name("expired").owner, "owner_2")
+
+
+class TestLeaseRelease(MongoIntegrationBaseTestCase):
+    fixture = fixture_lease
+
+    def test_release_by_owner_frees_lease(self):
+        # Act
+        lease_api.release("active", "owner_1")
+        # Assert
+        self.assertTrue(lease_api.acquire("active", "owner_2", 60))
+
+    def test_release_by_other_owner_keeps_lease(self):
+        # Act
+        lease_api.release("active", "owner_2")
+        # Assert
+        self.assertFalse(lease_api.acquire("active", "owner_3", 60))
@@ -5,7 +5,9 @@ import datetime
 
 import pytz
 from bson.objectid import ObjectId
+from mock import patch, Mock
 
+from core_main_app.access_control.exceptions import AccessControlError
 from core_main_app.commons import exceptions
 from core_main_app.settings import DATA_SORTING_FIELDS
 from core_main_app.utils.integration_tests.integration_base_test_case import (
@@ -20,6 +22,7 @@ from core_user_registration_app.components.user_metadata.api import (
     check_xml_file_is_valid,
 )
 from core_user_registration_app.components.user_metadata.models import UserMetadata
+from core_user_registration_app.utils import workspace_access as workspace_access_utils
 from tests.components.metadata.fixtures.fixtures import (
     DataFixtures,
     AccessControlDataFixture,
@@ -389,6 +392,14 @@ class TestDataGetAllExceptUserId(MongoIntegrationBaseTestCase):
         # Assert
         self.assertTrue(item.user_id != user_id for item in result)
 
+    def test_data_get_all_except_user_id_keeps_data_of_users_with_id_prefix(self):
+        # Arrange
+        user_id = 12
+        # Act
+        result = UserMetadata.get_all_except_user_id(user_id, DATA_SORTING_FIELDS)
+        # Assert
+        self.assertEqual(result.count(), len(self.fixture.data_collection))
+
     def test_data_get_all_by_user_id_return_full_collection_of_data_from_user_does_not_exist(
         self,
     ):
@@ -785,6 +796,347 @@ class TestGetAllByUserAndWorkspace(MongoIntegrationBaseTestCase):
         )
 
 
+class TestGetPage(MongoIntegrationBaseTestCase):
+
+    fixture = access_control_data_fixture
+
+    def _get_all_pages(self, data_list, page_size, order_by_field):
+        pages = []
+        continuation_token = None
+        while True:
+            page, continuation_token = user_metadata_api.get_page(
+                data_list, page_size, continuation_token, order_by_field
+            )
+            pages.append(page)
+            if continuation_token is None:
+                return pages
+
+    def test_pages_follow_ordering(self):
+        # Arrange
+        order_by_field = ["+title"]
+        # Act
+        pages = self._get_all_pages(UserMetadata.get_all([]), 2, order_by_field)
+        # Assert
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertListEqual(
+            [data.id for page in pages for data in page],
+            [data.id for data in UserMetadata.get_all(order_by_field + ["+id"])],
+        )
+
+    def test_pages_split_ties_in_descending_ordering(self):
+        # Arrange
+        order_by_field = ["-title"]
+        # Act
+        pages = self._get_all_pages(UserMetadata.get_all([]), 1, order_by_field)
+        # Assert
+        self.assertEqual(len(pages), 5)
+        self.assertListEqual(
+            [data.id for page in pages for data in page],
+            [data.id for data in UserMetadata.get_all(order_by_field + ["+id"])],
+        )
+
+    def test_pages_keep_query_filter(self):
+        # Arrange
+        data_list = UserMetadata.get_all_by_user_and_workspace(
+            "2", [self.fixture.workspace_1.id], []
+        )
+        # Act
+        pages = self._get_all_pages(data_list, 1, ["-title"])
+        # Assert
+        self.assertEqual(len(pages), 4)
+        self.assertListEqual(
+            [data.id for page in pages for data in page],
+            [data.id for data in data_list.order_by("-title", "+id")],
+        )
+
+    def test_last_page_has_no_continuation_token(self):
+        # Act
+        page, continuation_token = user_metadata_api.get_page(
+            UserMetadata.get_all([]), 5
+        )
+        # Assert
+        self.assertEqual(len(page), 5)
+        self.assertIsNone(continuation_token)
+
+    def test_invalid_continuation_token_raises_api_error(self):
+        # Act # Assert
+        with self.assertRaises(exceptions.ApiError):
+            user_metadata_api.get_page(UserMetadata.get_all([]), 2, "invalid")
+
+
+class TestGetAllProjection(MongoIntegrationBaseTestCase):
+
+    fixture = access_control_data_fixture
+
+    def test_get_all_returns_only_requested_fields(self):
+        # Arrange
+        mock_user = _create_user("1", is_superuser=True)
+        # Act
+        result = list(
+            user_metadata_api.get_all(
+                mock_user, ["+title"], fields=["title", "user_id"]
+            )
+        )
+        # Assert
+        self.assertEqual(len(result), len(self.fixture.data_collection))
+        self.assertTrue(
+            all(set(item) == {"_id", "title", "user_id"} for item in result)
+        )
+        self.assertEqual(result[0]["title"], self.fixture.data_1.title)
+
+    def test_get_all_by_user_returns_only_requested_fields(self):
+        # Arrange
+        mock_user = _create_user("2")
+        # Act
+        result = list(user_metadata_api.get_all_by_user(mock_user, fields=["title"]))
+        # Assert
+        self.assertListEqual(
+            sorted(item["_id"] for item in result),
+            sorted([self.fixture.data_2.id, self.fixture.data_4.id]),
+        )
+        self.assertTrue(all(set(item) == {"_id", "title"} for item in result))
+
+    @patch(
+        "core_main_app.components.workspace.api.get_all_workspaces_with_write_access_by_user"
+    )
+    @patch(
+        "core_main_app.components.workspace.api.get_all_workspaces_with_read_access_by_user"
+    )
+    def test_get_all_accessible_by_user_returns_only_requested_fields(
+        self,
+        get_all_workspaces_with_read_access_by_user,
+        get_all_workspaces_with_write_access_by_user,
+    ):
+        # Arrange
+        mock_user = _create_user("2")
+        workspace_access_utils.invalidate_accessible_workspaces()
+        get_all_workspaces_with_read_access_by_user.return_value = [
+            self.fixture.workspace_1
+        ]
+        get_all_workspaces_with_write_access_by_user.return_value = []
+        # Act
+        result = list(
+            user_metadata_api.get_all_accessible_by_user(
+                mock_user, fields=["last_modification_date"]
+            )
+        )
+        # Assert
+        self.assertEqual(len(result), 4)
+        self.assertTrue(
+            all(
+                set(item) <= {"_id", "last_modification_date", "title"}
+                for item in result
+            )
+        )
+
+    def test_get_all_without_fields_returns_documents(self):
+        # Arrange
+        mock_user = _create_user("1", is_superuser=True)
+        # Act
+        result = user_metadata_api.get_all(mock_user)
+        # Assert
+        self.assertTrue(all(isinstance(item, UserMetadata) for item in result))
+
+    def test_get_all_with_unknown_field_raises_api_error(self):
+        # Arrange
+        mock_user = _create_user("1", is_superuser=True)
+        # Act # Assert
+        with self.assertRaises(exceptions.ApiError):
+            user_metadata_api.get_all(mock_user, fields=["unknown"])
+
+    def test_projection_includes_ordering_fields(self):
+        # Arrange
+        mock_user = _create_user("1", is_superuser=True)
+        # Act
+        result = list(
+            user_metadata_api.get_all(mock_user, ["-title"], fields=["user_id"])
+        )
+        # Assert
+        self.assertTrue(
+            all(set(item) == {"_id", "title", "user_id"} for item in result)
+        )
+
+    def test_projection_without_ordering_fields_can_be_paged_to_the_end(self):
+        # Arrange
+        mock_user = _create_user("1", is_superuser=True)
+        data_list = user_metadata_api.get_all(mock_user, fields=["user_id"])
+        pages = []
+        continuation_token = None
+        # Act
+        # bounded, a token that does not move forward would page forever
+        for _ in range(len(self.fixture.data_collection)):
+            page, continuation_token = user_metadata_api.get_page(
+                data_list, 2, continuation_token, ["+title"]
+            )
+            pages.append(page)
+            if continuation_token is None:
+                break
+        # Assert
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertListEqual(
+            [item["_id"] for page in pages for item in page],
+            [data.id for data in UserMetadata.get_all(["+title", "+id"])],
+        )
+
+    def test_projection_is_paged_on_other_ordering(self):
+        # Arrange
+        mock_user = _create_user("1", is_superuser=True)
+        data_list = user_metadata_api.get_all(mock_user, fields=["title"])
+        # Act
+        page, continuation_token = user_metadata_api.get_page(
+            data_list, 3, order_by_field=["-user_id"]
+        )
+        next_page, _ = user_metadata_api.get_page(
+            data_list, 3, continuation_token, ["-user_id"]
+        )
+        # Assert
+        self.assertListEqual(
+            [item["_id"] for item in page + next_page],
+            [data.id for data in UserMetadata.get_all(["-user_id", "+id"])],
+        )
+
+    def test_projected_data_can_be_paged(self):
+        # Arrange
+        mock_user = _create_user("1", is_superuser=True)
+        data_list = user_metadata_api.get_all(mock_user, fields=["title"])
+        # Act
+        page, continuation_token = user_metadata_api.get_page(
+            data_list, 3, order_by_field=["-title"]
+        )
+        next_page, _ = user_metadata_api.get_page(
+            data_list, 3, continuation_token, ["-title"]
+        )
+        # Assert
+        self.assertListEqual(
+            [item["_id"] for item in page + next_page],
+            [data.id for data in UserMetadata.get_all(["-title", "+id"])],
+        )
+
+
+@patch(
+    "core_main_app.components.workspace.api.get_all_workspaces_with_write_access_by_user"
+)
+@patch(
+    "core_main_app.components.workspace.api.get_all_workspaces_with_read_access_by_user"
+)
+class TestCountAndExists(MongoIntegrationBaseTestCase):
+
+    fixture = access_control_data_fixture
+
+    def setUp(self):
+        super().setUp()
+        workspace_access_utils.invalidate_accessible_workspaces()
+
+    def test_count_by_user_counts_owned_data(self, mock_read, mock_write):
+        # Act
+        result = user_metadata_api.count_by_user(_create_user("1"))
+        # Assert
+        self.assertEqual(result, 3)
+
+    def test_exists_by_user_without_data_returns_false(self, mock_read, mock_write):
+        # Act
+        result = user_metadata_api.exists_by_user(_create_user("3"))
+        # Assert
+        self.assertFalse(result)
+
+    def test_exists_by_user_with_data_returns_true(self, mock_read, mock_write):
+        # Act
+        result = user_metadata_api.exists_by_user(_create_user("2"))
+        # Assert
+        self.assertTrue(result)
+
+    def test_count_by_workspace_counts_workspace_data(self, mock_read, mock_write):
+        # Arrange
+        mock_read.return_value = [self.fixture.workspace_1]
+        mock_write.return_value = []
+        # Act
+        result = user_metadata_api.count_by_workspace(
+            self.fixture.workspace_1, _create_user("2")
+        )
+        # Assert
+        self.assertEqual(result, 2)
+
+    def test_exists_by_workspace_without_access_raises_error(
+        self, mock_read, mock_write
+    ):
+        # Arrange
+        mock_read.return_value = []
+        mock_write.return_value = []
+        # Act # Assert
+        with self.assertRaises(AccessControlError):
+            user_metadata_api.exists_by_workspace(
+                self.fixture.workspace_1, _create_user("2")
+            )
+
+    def test_count_accessible_by_user_counts_owned_and_workspace_data(
+        self, mock_read, mock_write
+    ):
+        # Arrange
+        mock_read.return_value = [self.fixture.workspace_1]
+        mock_write.return_value = []
+        # Act
+        result = user_metadata_api.count_accessible_by_user(_create_user("2"))
+        # Assert
+        self.assertEqual(result, 4)
+
+    def test_exists_accessible_by_user_without_access_returns_false(
+        self, mock_read, mock_write
+    ):
+        # Arrange
+        mock_read.return_value = []
+        mock_write.return_value = []
+        # Act
+        result = user_metadata_api.exists_accessible_by_user(_create_user("3"))
+        # Assert
+        self.assertFalse(result)
+
+    def test_count_by_template_counts_accessible_data(self, mock_read, mock_write):
+        # Arrange
+        mock_read.return_value = []
+        mock_write.return_value = [self.fixture.workspace_2]
+        # Act
+        result = user_metadata_api.count_by_template(
+            self.fixture.template, _create_user("1")
+        )
+        # Assert
+        self.assertEqual(result, 4)
+
+    def test_count_by_template_counts_all_data_for_superuser(
+        self, mock_read, mock_write
+    ):
+        # Act
+        result = user_metadata_api.count_by_template(
+            self.fixture.template, _create_user("3", is_superuser=True)
+        )
+        # Assert
+        self.assertEqual(result, len(self.fixture.data_collection))
+
+    def test_exists_by_template_without_access_returns_false(
+        self, mock_read, mock_write
+    ):
+        # Arrange
+        mock_read.return_value = []
+        mock_write.return_value = []
+        # Act
+        result = user_metadata_api.exists_by_template(
+            self.fixture.template, _create_user("3")
+        )
+        # Assert
+        self.assertFalse(result)
+
+    def test_count_and_exists_do_not_load_data(self, mock_read, mock_write):
+        # Arrange
+        mock_read.return_value = [self.fixture.workspace_1]
+        mock_write.return_value = []
+        user = _create_user("2")
+        # Act
+        with patch.object(UserMetadata, "_from_son") as mock_from_son:
+            user_metadata_api.count_accessible_by_user(user)
+            user_metadata_api.exists_accessible_by_user(user)
+        # Assert
+        mock_from_son.assert_not_called()
+
+
 def mock_upsert(UserMetadata, user):
     if UserMetadata.xml_content is None:
         raise exceptions.ApiError(
@@ -798,3 +1150,137 @@ def mock_upsert(UserMetadata, user):
 
 def _create_user(user_id, is_superuser=False):
     return create_mock_user(user_id, is_superuser=is_superuser)
+
+
+@patch.object(UserMetadata, "convert_to_file")
+class TestBulkUpsert(MongoIntegrationBaseTestCase):
+    fixture = fixture_data
+
+    def _create_data(self, xml_content, title="bulk"):
+        data = UserMetadata(template=self.fixture.template, user_id="1", title=title)
+        data.xml_content = xml_content
+        return data
+
+    def test_saves_valid_data(self, mock_convert_to_file):
+        # Arrange
+        data_list = [self._create_data("<tag>1</tag>"), self._create_data("<tag/>")]
+        # Act
+        report = user_metadata_api.bulk_upsert(data_list, create_mock_user("1"))
+        # Assert
+        self.assertEqual([error for _, error in report], [None, None])
+        self.assertEqual(UserMetadata.objects(title="bulk").count(), 2)
+
+    def test_reports_invalid_data_and_saves_others(self, mock_convert_to_file):
+        # Arrange
+        data_list = [
+            self._create_data("<other/>"),
+            self._create_data("<tag>1</tag>"),
+            self._create_data(None),
+            self._create_data("<tag>", title="not well formed"),
+        ]
+        # Act
+        report = user_metadata_api.bulk_upsert(data_list, create_mock_user("1"))
+        # Assert
+        self.assertEqual([data_id for data_id, _ in report], [0, data_list[1].id, 2, 3])
+        self.assertEqual(
+            [error is None for _, error in report], [False, True, False, False]
+        )
+        self.assertEqual(UserMetadata.objects(title="bulk").count(), 1)
+
+    def test_reports_data_failing_model_validation(self, mock_convert_to_file):
+        # Arrange
+        data_list = [self._create_data("<tag/>", title=" ")]
+        # Act
+        report = user_metadata_api.bulk_upsert(data_list, create_mock_user("1"))
+        # Assert
+        self.assertIsNotNone(report[0][1])
+        self.assertEqual(UserMetadata.objects.count(), 3)
+
+    def test_updates_existing_data(self, mock_convert_to_file):
+        # Arrange
+        data = self.fixture.data_1
+        data.title = "updated"
+        data.xml_content = "<tag/>"
+        # Act
+        report = user_metadata_api.bulk_upsert([data], create_mock_user("1"))
+        # Assert
+        self.assertEqual(report, [(data.id, None)])
+        self.assertEqual(UserMetadata.get_by_id(data.id).title, "updated")
+        self.assertEqual(UserMetadata.objects.count(), 3)
+
+    @patch.object(user_metadata_api, "REGISTRATION_BULK_UPSERT_CHUNK_SIZE", 2)
+    def test_writes_by_chunks(self, mock_convert_to_file):
+        # Arrange
+        data_list = (self._create_data("<tag/>") for _ in range(5))
+        # Act
+        with patch.object(
+            UserMetadata, "bulk_upsert", wraps=UserMetadata.bulk_upsert
+        ) as mock_bulk_upsert:
+            report = user_metadata_api.bulk_upsert(data_list, create_mock_user("1"))
+        # Assert
+        self.assertEqual(len(report), 5)
+        self.assertEqual(mock_bulk_upsert.call_count, 3)
+        self.assertEqual(UserMetadata.objects(title="bulk").count(), 5)
+
+    @patch.object(user_metadata_api, "REGISTRATION_VALIDATION_WORKERS", 2)
+    def test_validates_in_worker_processes(self, mock_convert_to_file):
+        # Arrange
+        data_list = [
+            self._create_data("<tag>1</tag>"),
+            self._create_data("<other/>"),
+            self._create_data(None),
+            self._create_data("<tag/>"),
+        ]
+        # Act
+        report = user_metadata_api.bulk_upsert(data_list, create_mock_user("1"))
+        # Assert
+        self.assertEqual(
+            [error is None for _, error in report], [True, False, False, True]
+        )
+        self.assertEqual(UserMetadata.objects(title="bulk").count(), 2)
+
+    @patch.object(user_metadata_api, "REGISTRATION_VALIDATION_WORKERS", 2)
+    @patch.object(
+        user_metadata_api.registration_xml_utils,
+        "is_validation_request_dependent",
+        return_value=True,
+    )
+    def test_validates_in_process_if_resolver_needs_request(
+        self, mock_is_validation_request_dependent, mock_convert_to_file
+    ):
+        # Arrange
+        request = Mock(session=Mock(session_key="session"))
+        data_list = [self._create_data("<tag>1</tag>"), self._create_data("<other/>")]
+        # Act
+        with patch.object(
+            user_metadata_api, "check_xml_file_is_valid", wraps=check_xml_file_is_valid
+        ) as mock_check_xml_file_is_valid:
+            report = user_metadata_api.bulk_upsert(data_list, request)
+        # Assert
+        self.assertEqual([error is None for _, error in report], [True, False])
+        self.assertEqual(mock_check_xml_file_is_valid.call_count, 2)
+        self.assertIs(mock_check_xml_file_is_valid.call_args[1]["request"], request)
+
+    @patch.object(user_metadata_api, "REGISTRATION_VALIDATION_WORKERS", 2)
+    def test_reports_data_without_template_in_worker_processes(
+        self, mock_convert_to_file
+    ):
+        # Arrange
+        data_without_template = self._create_data("<tag/>")
+        data_without_template.template = None
+        data_list = [data_without_template, self._create_data("<tag>1</tag>")]
+        # Act
+        report = user_metadata_api.bulk_upsert(data_list, create_mock_user("1"))
+        # Assert
+        self.assertEqual([error is None for _, error in report], [False, True])
+        self.assertEqual(UserMetadata.objects(title="bulk").count(), 1)
+
+    def test_reports_data_without_template(self, mock_convert_to_file):
+        # Arrange
+        data_without_template = self._create_data("<tag/>")
+        data_without_template.template = None
+        data_list = [data_without_template, self._create_data("<tag>1</tag>")]
+        # Act
+        report = user_metadata_api.bulk_upsert(data_list, create_mock_user("1"))
+        # Assert
+        self.assertEqual([error is None for _, error in report], [False, True])
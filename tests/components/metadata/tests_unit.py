@@ -0,0 +1,276 @@
+""" Unit Test Metadata
+"""
+from unittest.case import TestCase
+
+from bson.objectid import ObjectId
+from mock import call, patch, Mock, PropertyMock
+from mongoengine.fields import GridFSProxy
+from mongoengine.errors import ValidationError
+from pymongo.errors import BulkWriteError
+
+from core_main_app.commons import exceptions
+from core_main_app.settings import DATA_SORTING_FIELDS
+from core_user_registration_app.components.user_metadata import api as metadata_api
+from core_user_registration_app.components.user_metadata.models import UserMetadata
+from core_user_registration_app.utils.pagination import get_sort_keys
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+
+@patch.object(metadata_api.registration_xml_utils, "validate_xml_data")
+class TestCheckXmlFileIsValid(TestCase):
+    def test_validates_given_tree(self, mock_validate_xml_data):
+        # Arrange
+        mock_validate_xml_data.return_value = None
+        data = Mock(xml_content="not parsed", template=None)
+        xml_tree = XSDTree.build_tree("<root>1</root>")
+        # Act
+        result = metadata_api.check_xml_file_is_valid(
+            data, request=Mock(), xml_tree=xml_tree
+        )
+        # Assert
+        self.assertTrue(result)
+        self.assertIs(mock_validate_xml_data.call_args[0][1], xml_tree)
+
+    def test_parses_xml_content_without_tree(self, mock_validate_xml_data):
+        # Arrange
+        data = Mock(xml_content="not xml", template=None)
+        # Act # Assert
+        with self.assertRaises(exceptions.XMLError):
+            metadata_api.check_xml_file_is_valid(data, request=Mock())
+
+    def test_raises_xml_error_if_invalid(self, mock_validate_xml_data):
+        # Arrange
+        mock_validate_xml_data.return_value = "error"
+        data = Mock(xml_content="<root>one</root>", template=None)
+        # Act # Assert
+        with self.assertRaises(exceptions.XMLError):
+            metadata_api.check_xml_file_is_valid(data, request=Mock())
+
+
+def _put_new_file(data):
+    """Stand in for convert_to_file, giving the data a new file id.
+
+    Args:
+        data:
+
+    Returns:
+
+    """
+    data.xml_file.grid_id = ObjectId()
+
+
+@patch.object(GridFSProxy, "fs", new_callable=PropertyMock)
+@patch.object(UserMetadata, "convert_to_file", autospec=True)
+class TestUserMetadataBulkUpsert(TestCase):
+    @patch.object(UserMetadata, "to_mongo")
+    @patch.object(UserMetadata, "validate")
+    @patch.object(UserMetadata, "_get_collection")
+    def test_maps_write_errors_to_data_indexes(
+        self,
+        mock_get_collection,
+        mock_validate,
+        mock_to_mongo,
+        mock_convert_to_file,
+        mock_fs,
+    ):
+        # Arrange
+        data_list = [UserMetadata(), UserMetadata(), UserMetadata()]
+        mock_validate.side_effect = [ValidationError("invalid"), None, None]
+        mock_get_collection.return_value.bulk_write.side_effect = BulkWriteError(
+            {"writeErrors": [{"index": 1, "errmsg": "duplicate key"}]}
+        )
+        # Act
+        result = UserMetadata.bulk_upsert(data_list)
+        # Assert
+        self.assertEqual(set(result), {0, 2})
+        self.assertEqual(result[2], "duplicate key")
+        self.assertFalse(
+            mock_get_collection.return_value.bulk_write.call_args[1]["ordered"]
+        )
+
+    @patch.object(UserMetadata, "validate")
+    @patch.object(UserMetadata, "_get_collection")
+    def test_does_not_convert_invalid_data(
+        self, mock_get_collection, mock_validate, mock_convert_to_file, mock_fs
+    ):
+        # Arrange
+        data = UserMetadata()
+        mock_validate.side_effect = ValidationError("invalid")
+        # Act
+        result = UserMetadata.bulk_upsert([data])
+        # Assert
+        self.assertEqual(set(result), {0})
+        self.assertFalse(mock_convert_to_file.called)
+        mock_get_collection.return_value.bulk_write.assert_not_called()
+
+    @patch.object(UserMetadata, "to_mongo")
+    @patch.object(UserMetadata, "validate")
+    @patch.object(UserMetadata, "_get_collection")
+    def test_deletes_new_file_of_data_not_written(
+        self,
+        mock_get_collection,
+        mock_validate,
+        mock_to_mongo,
+        mock_convert_to_file,
+        mock_fs,
+    ):
+        # Arrange
+        previous_grid_id = ObjectId()
+        new_data = UserMetadata()
+        existing_data = UserMetadata(id=ObjectId())
+        existing_data.xml_file.grid_id = previous_grid_id
+        mock_convert_to_file.side_effect = _put_new_file
+        mock_get_collection.return_value.bulk_write.side_effect = BulkWriteError(
+            {
+                "writeErrors": [
+                    {"index": 0, "errmsg": "error"},
+                    {"index": 1, "errmsg": "error"},
+                ]
+            }
+        )
+        # Act
+        UserMetadata.bulk_upsert([new_data, existing_data])
+        # Assert
+        self.assertEqual(mock_fs.return_value.delete.call_count, 2)
+        self.assertNotIn(
+            call(previous_grid_id), mock_fs.return_value.delete.call_args_list
+        )
+        self.assertIsNone(new_data.id)
+        self.assertIsNone(new_data.xml_file.grid_id)
+        self.assertEqual(existing_data.xml_file.grid_id, previous_grid_id)
+
+    @patch.object(UserMetadata, "to_mongo")
+    @patch.object(UserMetadata, "validate")
+    @patch.object(UserMetadata, "_get_collection")
+    def test_deletes_previous_file_of_data_written(
+        self,
+        mock_get_collection,
+        mock_validate,
+        mock_to_mongo,
+        mock_convert_to_file,
+        mock_fs,
+    ):
+        # Arrange
+        previous_grid_id = ObjectId()
+        data = UserMetadata(id=ObjectId())
+        data.xml_file.grid_id = previous_grid_id
+        mock_convert_to_file.side_effect = _put_new_file
+        # Act
+        result = UserMetadata.bulk_upsert([data])
+        # Assert
+        self.assertEqual(result, {})
+        mock_fs.return_value.delete.assert_called_once_with(previous_grid_id)
+        self.assertNotEqual(data.xml_file.grid_id, previous_grid_id)
+
+
+def _get_query_methods(order_by_field):
+    """Return the querysets of the UserMetadata query methods.
+
+    Args:
+        order_by_field:
+
+    Returns:
+
+    """
+    workspace_id = ObjectId()
+    return {
+        "get_all": UserMetadata.get_all(order_by_field),
+        "get_all_except": UserMetadata.get_all_except(order_by_field, [ObjectId()]),
+        "get_all_by_user_id": UserMetadata.get_all_by_user_id("1", order_by_field),
+        "get_all_except_user_id": UserMetadata.get_all_except_user_id(
+            "1", order_by_field
+        ),
+        "get_all_by_id_list": UserMetadata.get_all_by_id_list(
+            [ObjectId()], order_by_field
+        ),
+        "execute_query": UserMetadata.execute_query({}, order_by_field),
+        "get_all_by_workspace": UserMetadata.get_all_by_workspace(
+            workspace_id, order_by_field
+        ),
+        "get_all_by_list_workspace": UserMetadata.get_all_by_list_workspace(
+            [workspace_id], order_by_field
+        ),
+        "get_all_by_list_template": UserMetadata.get_all_by_list_template(
+            [ObjectId()], order_by_field
+        ),
+        "get_all_by_user_and_workspace": UserMetadata.get_all_by_user_and_workspace(
+            "1", [workspace_id], order_by_field
+        ),
+    }
+
+
+def _get_equality_clauses(query):
+    """Return the fields queried by equality (or $in), for each clause of a query.
+
+    Args:
+        query:
+
+    Returns:
+
+    """
+    if "$or" in query:
+        return [
+            fields
+            for clause in query["$or"]
+            for fields in _get_equality_clauses(clause)
+        ]
+    fields = set()
+    for key, value in query.items():
+        if key == "$and":
+            for clause in value:
+                fields.update(*_get_equality_clauses(clause))
+        elif not isinstance(value, dict) or set(value) == {"$in"}:
+            fields.add(key)
+    return [fields]
+
+
+def _is_served_by_index(equality_fields, ordering, index_fields):
+    """Is a query clause filtered and sorted by the index.
+
+    Args:
+        equality_fields:
+        ordering: list of (field, direction)
+        index_fields: list of (field, direction)
+
+    Returns:
+
+    """
+    prefix = index_fields[: len(equality_fields)]
+    sort = index_fields[len(equality_fields) : len(equality_fields) + len(ordering)]
+    reverse_ordering = [(field, -direction) for field, direction in ordering]
+    return {field for field, _ in prefix} == equality_fields and sort in (
+        ordering,
+        reverse_ordering,
+    )
+
+
+class TestUserMetadataIndexes(TestCase):
+    def setUp(self):
+        self.indexes = [spec["fields"] for spec in UserMetadata._meta["index_specs"]]
+        self.indexes.append([("_id", 1)])
+
+    def _assert_served_by_indexes(self, order_by_field):
+        for name, queryset in _get_query_methods(order_by_field).items():
+            ordering = list(queryset._ordering or [])
+            for equality_fields in _get_equality_clauses(queryset._query):
+                # lookups by id only sort the requested data
+                if "_id" in equality_fields:
+                    continue
+                with self.subTest(query=name, fields=equality_fields):
+                    self.assertTrue(
+                        any(
+                            _is_served_by_index(equality_fields, ordering, index)
+                            for index in self.indexes
+                        )
+                    )
+
+    def test_query_methods_are_served_by_indexes(self):
+        self._assert_served_by_indexes(DATA_SORTING_FIELDS)
+
+    def test_paged_query_methods_are_served_by_indexes(self):
+        self._assert_served_by_indexes(
+            [
+                ("-" if direction < 0 else "+") + field
+                for field, direction in get_sort_keys(DATA_SORTING_FIELDS)
+            ]
+        )
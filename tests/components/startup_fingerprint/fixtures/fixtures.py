@@ -0,0 +1,22 @@
+""" Fixtures files for Startup Fingerprint
+"""
+from core_main_app.utils.integration_tests.fixture_interface import FixtureInterface
+from core_user_registration_app.components.startup_fingerprint.models import (
+    StartupFingerprint,
+)
+
+
+class StartupFingerprintFixtures(FixtureInterface):
+    """Startup Fingerprint fixtures"""
+
+    startup_fingerprint = None
+
+    def insert_data(self):
+        """Insert a Startup Fingerprint.
+
+        Returns:
+
+        """
+        self.startup_fingerprint = StartupFingerprint(
+            name="init", value="fingerprint"
+        ).save()
@@ -0,0 +1,64 @@
+""" Integration Test Startup Fingerprint
+"""
+from core_main_app.commons import exceptions
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    MongoIntegrationBaseTestCase,
+)
+from core_user_registration_app.components.startup_fingerprint import (
+    api as startup_fingerprint_api,
+)
+from core_user_registration_app.components.startup_fingerprint.models import (
+    StartupFingerprint,
+)
+from tests.components.startup_fingerprint.fixtures.fixtures import (
+    StartupFingerprintFixtures,
+)
+
+fixture_startup_fingerprint = StartupFingerprintFixtures()
+
+
+class TestStartupFingerprintGetByName(MongoIntegrationBaseTestCase):
+    fixture = fixture_startup_fingerprint
+
+    def test_returns_startup_fingerprint(self):
+        # Act
+        result = startup_fingerprint_api.get_by_name("init")
+        # Assert
+        self.assertEqual(result.value, "fingerprint")
+
+    def test_raises_does_not_exist_if_not_found(self):
+        # Act # Assert
+        with self.assertRaises(exceptions.DoesNotExist):
+            startup_fingerprint_api.get_by_name("unknown")
+
+
+class TestStartupFingerprintGetOrCreate(MongoIntegrationBaseTestCase):
+    fixture = fixture_startup_fingerprint
+
+    def test_returns_existing_startup_fingerprint(self):
+        # Act
+        result = startup_fingerprint_api.get_or_create("init")
+        # Assert
+        self.assertEqual(result.id, self.fixture.startup_fingerprint.id)
+
+    def test_returns_new_startup_fingerprint_without_value(self):
+        # Act
+        result = startup_fingerprint_api.get_or_create("other")
+        # Assert
+        self.assertIsNone(result.value)
+
+
+class TestStartupFingerprintUpsert(MongoIntegrationBaseTestCase):
+    fixture = fixture_startup_fingerprint
+
+    def test_updates_existing_startup_fingerprint(self):
+        # Arrange
+        startup_fingerprint = startup_fingerprint_api.get_by_name("init")
+        startup_fingerprint.value = "new_fingerprint"
+        # Act
+        startup_fingerprint_api.upsert(startup_fingerprint)
+        # Assert
+        self.assertEqual(StartupFingerprint.objects.count(), 1)
+        self.assertEqual(
+            startup_fingerprint_api.get_by_name("init").value, "new_fingerprint"
+        )
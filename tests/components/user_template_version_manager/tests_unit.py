@@ -0,0 +1,38 @@
+""" Unit Test User Template Version Manager
+"""
+from unittest.case import TestCase
+
+from mock import patch, Mock
+
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_main_app.utils.tests_tools.RequestMock import create_mock_request
+from core_user_registration_app.components.user_template_version_manager import (
+    api as user_version_manager_api,
+)
+from core_user_registration_app.components.user_template_version_manager.models import (
+    UserTemplateVersionManager,
+)
+
+
+class TestUserTemplateVersionManagerSetCurrent(TestCase):
+    @patch.object(
+        user_version_manager_api.registration_xml_utils, "invalidate_schema_cache"
+    )
+    @patch.object(UserTemplateVersionManager, "save_version_manager")
+    @patch.object(user_version_manager_api, "get_from_version")
+    def test_set_current_invalidates_schema_cache(
+        self, mock_get_from_version, mock_save_version_manager, mock_invalidate
+    ):
+        # Arrange
+        user_version_manager = UserTemplateVersionManager(
+            title="user.xsd", versions=["1", "2"], current="1"
+        )
+        mock_get_from_version.return_value = user_version_manager
+        mock_save_version_manager.return_value = user_version_manager
+        mock_request = create_mock_request(
+            user=create_mock_user("1", is_superuser=True)
+        )
+        # Act
+        user_version_manager_api.set_current(Mock(id="2"), request=mock_request)
+        # Assert
+        mock_invalidate.assert_called_once_with(["1", "2"])
@@ -0,0 +1,345 @@
+""" Unit Test discover
+"""
+from unittest.case import TestCase
+
+from mock import patch, Mock
+
+from core_user_registration_app import discover
+from core_user_registration_app.components.startup_fingerprint.models import (
+    StartupFingerprint,
+)
+
+
+@patch.object(discover, "_get_init_fingerprint", return_value="fingerprint")
+@patch.object(discover.startup_fingerprint_api, "upsert")
+@patch.object(discover.startup_fingerprint_api, "get_or_create")
+@patch.object(discover, "_init_xslt", return_value=True)
+@patch.object(discover, "_init_permissions", return_value=True)
+@patch.object(discover, "_add_user_template", return_value=True)
+class TestInitRegistrationApp(TestCase):
+    def setUp(self):
+        acquire_patcher = patch.object(discover.lease_api, "acquire", return_value=True)
+        self.mock_acquire = acquire_patcher.start()
+        self.addCleanup(acquire_patcher.stop)
+        release_patcher = patch.object(discover.lease_api, "release")
+        self.mock_release = release_patcher.start()
+        self.addCleanup(release_patcher.stop)
+
+    def test_skips_init_if_fingerprint_matches(
+        self,
+        mock_add_user_template,
+        mock_init_permissions,
+        mock_init_xslt,
+        mock_get_or_create,
+        mock_upsert,
+        mock_get_init_fingerprint,
+    ):
+        # Arrange
+        mock_get_or_create.return_value = StartupFingerprint(
+            name=discover.INIT_FINGERPRINT_NAME, value="fingerprint"
+        )
+        # Act
+        discover.init_registration_app()
+        # Assert
+        mock_add_user_template.assert_not_called()
+        mock_init_permissions.assert_not_called()
+        mock_init_xslt.assert_not_called()
+        mock_upsert.assert_not_called()
+        self.mock_acquire.assert_not_called()
+
+    def test_runs_init_and_saves_fingerprint_if_fingerprint_changed(
+        self,
+        mock_add_user_template,
+        mock_init_permissions,
+        mock_init_xslt,
+        mock_get_or_create,
+        mock_upsert,
+        mock_get_init_fingerprint,
+    ):
+        # Arrange
+        mock_get_or_create.return_value = StartupFingerprint(
+            name=discover.INIT_FINGERPRINT_NAME, value="old_fingerprint"
+        )
+        # Act
+        discover.init_registration_app()
+        # Assert
+        mock_add_user_template.assert_called_once_with()
+        mock_init_permissions.assert_called_once_with()
+        mock_init_xslt.assert_called_once_with()
+        self.assertEqual(mock_upsert.call_args[0][0].value, "fingerprint")
+
+    def test_force_runs_init_if_fingerprint_matches(
+        self,
+        mock_add_user_template,
+        mock_init_permissions,
+        mock_init_xslt,
+        mock_get_or_create,
+        mock_upsert,
+        mock_get_init_fingerprint,
+    ):
+        # Arrange
+        mock_get_or_create.return_value = StartupFingerprint(
+            name=discover.INIT_FINGERPRINT_NAME, value="fingerprint"
+        )
+        # Act
+        result = discover.init_registration_app(force=True)
+        # Assert
+        self.assertTrue(result)
+        mock_add_user_template.assert_called_once_with()
+
+    def test_does_not_save_fingerprint_if_a_step_failed(
+        self,
+        mock_add_user_template,
+        mock_init_permissions,
+        mock_init_xslt,
+        mock_get_or_create,
+        mock_upsert,
+        mock_get_init_fingerprint,
+    ):
+        # Arrange
+        mock_get_or_create.return_value = StartupFingerprint(
+            name=discover.INIT_FINGERPRINT_NAME
+        )
+        mock_init_xslt.return_value = False
+        # Act
+        result = discover.init_registration_app()
+        # Assert
+        self.assertFalse(result)
+        mock_upsert.assert_not_called()
+
+    def test_records_phase_durations(
+        self,
+        mock_add_user_template,
+        mock_init_permissions,
+        mock_init_xslt,
+        mock_get_or_create,
+        mock_upsert,
+        mock_get_init_fingerprint,
+    ):
+        # Arrange
+        mock_get_or_create.return_value = StartupFingerprint(
+            name=discover.INIT_FINGERPRINT_NAME
+        )
+        # Act
+        discover.init_registration_app()
+        # Assert
+        self.assertEqual(
+            list(discover.get_init_phase_durations()),
+            ["fingerprint", "lock", "template", "permissions"],
+        )
+
+    def test_skipped_init_only_records_fingerprint_phase(
+        self,
+        mock_add_user_template,
+        mock_init_permissions,
+        mock_init_xslt,
+        mock_get_or_create,
+        mock_upsert,
+        mock_get_init_fingerprint,
+    ):
+        # Arrange
+        mock_get_or_create.return_value = StartupFingerprint(
+            name=discover.INIT_FINGERPRINT_NAME, value="fingerprint"
+        )
+        # Act
+        discover.init_registration_app()
+        # Assert
+        self.assertEqual(list(discover.get_init_phase_durations()), ["fingerprint"])
+
+    def test_releases_lock_after_init(
+        self,
+        mock_add_user_template,
+        mock_init_permissions,
+        mock_init_xslt,
+        mock_get_or_create,
+        mock_upsert,
+        mock_get_init_fingerprint,
+    ):
+        # Arrange
+        mock_get_or_create.return_value = StartupFingerprint(
+            name=discover.INIT_FINGERPRINT_NAME
+        )
+        # Act
+        discover.init_registration_app()
+        # Assert
+        self.mock_release.assert_called_once_with(
+            discover.INIT_FINGERPRINT_NAME, self.mock_acquire.call_args[0][1]
+        )
+
+    @patch.object(discover, "INIT_LEASE_POLL_INTERVAL", 0)
+    def test_waits_for_other_process_init(
+        self,
+        mock_add_user_template,
+        mock_init_permissions,
+        mock_init_xslt,
+        mock_get_or_create,
+        mock_upsert,
+        mock_get_init_fingerprint,
+    ):
+        # Arrange
+        self.mock_acquire.return_value = False
+        mock_get_or_create.side_effect = [
+            StartupFingerprint(name=discover.INIT_FINGERPRINT_NAME),
+            StartupFingerprint(
+                name=discover.INIT_FINGERPRINT_NAME, value="fingerprint"
+            ),
+        ]
+        # Act
+        result = discover.init_registration_app()
+        # Assert
+        self.assertTrue(result)
+        mock_add_user_template.assert_not_called()
+        self.mock_release.assert_not_called()
+
+    @patch.object(discover, "REGISTRATION_INIT_WAIT_TIMEOUT", 0)
+    def test_gives_up_if_other_process_holds_lock(
+        self,
+        mock_add_user_template,
+        mock_init_permissions,
+        mock_init_xslt,
+        mock_get_or_create,
+        mock_upsert,
+        mock_get_init_fingerprint,
+    ):
+        # Arrange
+        self.mock_acquire.return_value = False
+        mock_get_or_create.return_value = StartupFingerprint(
+            name=discover.INIT_FINGERPRINT_NAME
+        )
+        # Act
+        result = discover.init_registration_app()
+        # Assert
+        self.assertFalse(result)
+        mock_add_user_template.assert_not_called()
+
+    def test_skips_init_done_while_waiting_for_lock(
+        self,
+        mock_add_user_template,
+        mock_init_permissions,
+        mock_init_xslt,
+        mock_get_or_create,
+        mock_upsert,
+        mock_get_init_fingerprint,
+    ):
+        # Arrange
+        mock_get_or_create.side_effect = [
+            StartupFingerprint(name=discover.INIT_FINGERPRINT_NAME),
+            StartupFingerprint(
+                name=discover.INIT_FINGERPRINT_NAME, value="fingerprint"
+            ),
+        ]
+        # Act
+        result = discover.init_registration_app()
+        # Assert
+        self.assertTrue(result)
+        mock_add_user_template.assert_not_called()
+        self.mock_release.assert_called_once()
+
+
+@patch.object(discover.finders, "find", return_value=None)
+class TestGetInitFingerprint(TestCase):
+    def test_is_stable(self, mock_find):
+        # Act # Assert
+        self.assertEqual(
+            discover._get_init_fingerprint(), discover._get_init_fingerprint()
+        )
+
+    def test_changes_with_settings(self, mock_find):
+        # Arrange
+        fingerprint = discover._get_init_fingerprint()
+        # Act
+        with patch.object(discover, "LIST_XSL_FILENAME", "other.xsl"):
+            result = discover._get_init_fingerprint()
+        # Assert
+        self.assertNotEqual(result, fingerprint)
+
+    def test_changes_with_file_content(self, mock_find):
+        # Arrange
+        fingerprint = discover._get_init_fingerprint()
+        mock_find.return_value = __file__
+        # Act
+        result = discover._get_init_fingerprint()
+        # Assert
+        self.assertNotEqual(result, fingerprint)
+
+
+@patch.object(discover, "init_registration_app")
+class TestEnsureRegistrationAppInitialized(TestCase):
+    def setUp(self):
+        discover._registration_app_initialized = False
+        discover._registration_app_init_retry_time = None
+
+    def tearDown(self):
+        discover._registration_app_initialized = False
+        discover._registration_app_init_retry_time = None
+
+    def test_inits_registration_app_once(self, mock_init_registration_app):
+        # Arrange
+        mock_init_registration_app.return_value = True
+        # Act
+        discover.ensure_registration_app_initialized()
+        discover.ensure_registration_app_initialized()
+        # Assert
+        mock_init_registration_app.assert_called_once_with()
+
+    def test_does_not_retry_failed_init_before_retry_interval(
+        self, mock_init_registration_app
+    ):
+        # Arrange
+        mock_init_registration_app.return_value = False
+        # Act
+        discover.ensure_registration_app_initialized()
+        discover.ensure_registration_app_initialized()
+        discover.ensure_registration_app_initialized()
+        # Assert
+        mock_init_registration_app.assert_called_once_with()
+
+    @patch.object(discover, "REGISTRATION_INIT_RETRY_INTERVAL", 0)
+    def test_retries_failed_init_after_retry_interval(self, mock_init_registration_app):
+        # Arrange
+        mock_init_registration_app.return_value = False
+        # Act
+        discover.ensure_registration_app_initialized()
+        discover.ensure_registration_app_initialized()
+        # Assert
+        self.assertEqual(mock_init_registration_app.call_count, 2)
+
+
+@patch.object(discover, "_bind_template_xslt")
+@patch.object(discover, "_get_or_create_xslt")
+class TestInitXslt(TestCase):
+    @patch(
+        "core_user_registration_app.components.user_template_version_manager.api.get_default_version_manager"
+    )
+    def test_records_xslt_and_binding_phases(
+        self,
+        mock_get_default_version_manager,
+        mock_get_or_create_xslt,
+        mock_bind_template_xslt,
+    ):
+        # Arrange
+        discover._init_phase_durations.clear()
+        mock_get_default_version_manager.return_value = [Mock()]
+        # Act
+        result = discover._init_xslt()
+        # Assert
+        self.assertTrue(result)
+        self.assertEqual(list(discover.get_init_phase_durations()), ["xslt", "binding"])
+
+    @patch(
+        "core_user_registration_app.components.user_template_version_manager.api.get_default_version_manager"
+    )
+    def test_logs_error(
+        self,
+        mock_get_default_version_manager,
+        mock_get_or_create_xslt,
+        mock_bind_template_xslt,
+    ):
+        # Arrange
+        mock_get_or_create_xslt.side_effect = Exception("error")
+        mock_get_default_version_manager.return_value = [Mock()]
+        # Act
+        with self.assertLogs(discover.logger, level="ERROR"):
+            result = discover._init_xslt()
+        # Assert
+        self.assertFalse(result)
@@ -0,0 +1,80 @@
+""" Unit Test import time
+"""
+import os
+import subprocess
+import sys
+from unittest.case import TestCase
+
+# modules only needed to render or administrate, imported on first use
+# (xml_utils.xsd_tree is not: the metadata api validates with it at module level)
+LAZY_MODULES = [
+    "core_curate_app.views.user.views",
+    "core_main_app.components.xsl_transformation.api",
+    "core_main_app.views.admin.views",
+    "core_parser_app.tools.parser.renderer.xml",
+    "core_user_registration_app.views.admin.views",
+]
+# cumulative import time budget of the app, in microseconds
+IMPORT_TIME_BUDGET = 1500000
+ENTRY_POINTS = [
+    "core_user_registration_app.discover",
+    "core_user_registration_app.tasks",
+    "core_user_registration_app.urls",
+]
+
+
+def get_import_times(*modules):
+    """Set Django up and import the modules in a new interpreter.
+
+    Args:
+        *modules:
+
+    Returns:
+        list: (module name, nesting level, cumulative import time in microseconds)
+        of each imported module, as reported by python -X importtime
+
+    """
+    code = "import django; django.setup(); " + "; ".join(
+        f"import {module}" for module in modules
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        env=dict(os.environ, DJANGO_SETTINGS_MODULE="tests.test_settings"),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    import_times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            # nested imports are indented by two spaces per level
+            level = (len(name) - len(name.lstrip()) - 1) // 2
+            import_times.append((name.strip(), level, int(cumulative)))
+    return import_times
+
+
+class TestImportTime(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.import_times = get_import_times(*ENTRY_POINTS)
+
+    def test_entry_points_do_not_import_lazy_modules(self):
+        # Act
+        imported_modules = {name for name, _, _ in self.import_times}
+        # Assert
+        self.assertEqual(imported_modules.intersection(LAZY_MODULES), set())
+
+    def test_app_import_time_is_within_budget(self):
+        # Act
+        app_import_time = sum(
+            cumulative
+            for name, level, cumulative in self.import_times
+            if level == 0 and name.startswith("core_user_registration_app")
+        )
+        # Assert
+        self.assertLess(app_import_time, IMPORT_TIME_BUDGET)
@@ -0,0 +1,50 @@
+""" Unit Test management commands
+"""
+from io import StringIO
+from unittest.case import TestCase
+
+from django.core.management import call_command, CommandError
+from mock import patch
+
+from core_user_registration_app import discover
+
+
+@patch.object(discover, "init_registration_app")
+class TestInitRegistrationAppCommand(TestCase):
+    def test_inits_registration_app(self, mock_init_registration_app):
+        # Arrange
+        mock_init_registration_app.return_value = True
+        out = StringIO()
+        # Act
+        call_command("init_registration_app", stdout=out)
+        # Assert
+        mock_init_registration_app.assert_called_once_with(force=False)
+        self.assertIn("initialized", out.getvalue())
+
+    @patch.object(discover, "get_init_phase_durations")
+    def test_prints_phase_durations(
+        self, mock_get_init_phase_durations, mock_init_registration_app
+    ):
+        # Arrange
+        mock_init_registration_app.return_value = True
+        mock_get_init_phase_durations.return_value = {"template": 0.25}
+        out = StringIO()
+        # Act
+        call_command("init_registration_app", stdout=out)
+        # Assert
+        self.assertIn("template: 0.250s", out.getvalue())
+
+    def test_force_option_is_passed(self, mock_init_registration_app):
+        # Arrange
+        mock_init_registration_app.return_value = True
+        # Act
+        call_command("init_registration_app", "--force", stdout=StringIO())
+        # Assert
+        mock_init_registration_app.assert_called_once_with(force=True)
+
+    def test_raises_command_error_if_init_failed(self, mock_init_registration_app):
+        # Arrange
+        mock_init_registration_app.return_value = False
+        # Act # Assert
+        with self.assertRaises(CommandError):
+            call_command("init_registration_app", stdout=StringIO())
@@ -0,0 +1,427 @@
+""" Query plan harness for the UserMetadata and UserDataStructure query methods
+
+Seeds a synthetic registration dataset in a MongoDB database, runs every
+query method of the models, and explains the queries they send: documents
+and keys examined, collection scans and in-memory sorts. mongomock cannot
+explain queries, so the harness needs a MongoDB server:
+
+    QUERY_PLAN_MONGODB_URI=mongodb://localhost/query_plans python runtests.py
+
+or, to print the plans:
+
+    QUERY_PLAN_MONGODB_URI=mongodb://localhost/query_plans python -m tests.query_plans.harness
+
+The database of the URI is dropped after the run.
+"""
+import os
+import random
+import types
+from collections import OrderedDict, namedtuple
+from contextlib import ExitStack, contextmanager
+
+from bson.objectid import ObjectId
+from bson.son import SON
+from mongoengine import connect, disconnect
+from mongoengine.connection import get_db
+from mongoengine.context_managers import switch_db
+from mongoengine.queryset.base import BaseQuerySet
+from pymongo import monitoring
+
+QUERY_PLAN_MONGODB_URI = os.environ.get("QUERY_PLAN_MONGODB_URI")
+QUERY_PLAN_ALIAS = "query_plans"
+# size of the synthetic dataset
+USER_COUNT = 200
+TEMPLATE_COUNT = 10
+WORKSPACE_COUNT = 50
+METADATA_COUNT = 20000
+DATA_STRUCTURE_COUNT = 5000
+# commands sent by the query methods that can be explained
+EXPLAINED_COMMANDS = ("find", "count", "distinct", "aggregate")
+
+SyntheticDataset = namedtuple(
+    "SyntheticDataset", ["templates", "workspaces", "metadata", "data_structures"]
+)
+QueryPlan = namedtuple(
+    "QueryPlan",
+    [
+        "name",
+        "returned",
+        "docs_examined",
+        "keys_examined",
+        "collection_scan",
+        "in_memory_sort",
+    ],
+)
+
+
+class QueryCommandListener(monitoring.CommandListener):
+    """Record the query commands sent to the database"""
+
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        if event.command_name in EXPLAINED_COMMANDS:
+            self.commands.append(event.command)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+@contextmanager
+def query_plan_database(uri=QUERY_PLAN_MONGODB_URI):
+    """Bind the models to a new database, and yield the query listener.
+
+    Args:
+        uri:
+
+    Returns:
+
+    """
+    from core_user_registration_app.components.user_data_structure.models import (
+        UserDataStructure,
+    )
+    from core_user_registration_app.components.user_metadata.models import (
+        UserMetadata,
+    )
+
+    listener = QueryCommandListener()
+    connect(alias=QUERY_PLAN_ALIAS, host=uri, event_listeners=[listener])
+    try:
+        with ExitStack() as stack:
+            for document in (UserMetadata, UserDataStructure):
+                stack.enter_context(switch_db(document, QUERY_PLAN_ALIAS))
+                document.ensure_indexes()
+            yield listener
+    finally:
+        db = get_db(QUERY_PLAN_ALIAS)
+        db.client.drop_database(db.name)
+        disconnect(QUERY_PLAN_ALIAS)
+
+
+def seed_registration_dataset(seed=0):
+    """Insert a synthetic set of registrations and data structures.
+
+    Must be called in query_plan_database.
+
+    Args:
+        seed: seed of the random values
+
+    Returns:
+
+    """
+    from core_main_app.utils.datetime_tools.utils import datetime_now
+    from core_user_registration_app.components.user_data_structure.models import (
+        UserDataStructure,
+    )
+    from core_user_registration_app.components.user_metadata.models import (
+        UserMetadata,
+    )
+
+    rng = random.Random(seed)
+    now = datetime_now()
+    templates = [ObjectId() for _ in range(TEMPLATE_COUNT)]
+    workspaces = [ObjectId() for _ in range(WORKSPACE_COUNT)]
+
+    metadata = []
+    for index in range(METADATA_COUNT):
+        document = {
+            "_id": ObjectId(),
+            "title": f"registration {rng.randrange(METADATA_COUNT):06d}",
+            "user_id": str(rng.randrange(USER_COUNT)),
+            "template": rng.choice(templates),
+            "dict_content": {"root": {"index": index}},
+            "creation_date": now,
+            "last_modification_date": now,
+            "last_change_date": now,
+        }
+        # half of the registrations are shared in a workspace
+        if rng.random() < 0.5:
+            document["workspace"] = rng.choice(workspaces)
+        metadata.append(document)
+    UserMetadata._get_collection().insert_many(metadata)
+
+    data_structures = []
+    for index in range(DATA_STRUCTURE_COUNT):
+        document = {
+            "_id": ObjectId(),
+            "user": str(index % USER_COUNT),
+            "template": templates[index % TEMPLATE_COUNT],
+            "name": f"form {index}",
+            "data_structure_element_root": ObjectId(),
+            "form_string": "",
+            "creation_date": now,
+        }
+        # two thirds of the data structures were saved as a data
+        if rng.random() < 2 / 3:
+            document["data"] = metadata[index]["_id"]
+        data_structures.append(document)
+    UserDataStructure._get_collection().insert_many(data_structures)
+
+    return SyntheticDataset(templates, workspaces, metadata, data_structures)
+
+
+def get_query_methods(dataset):
+    """Return the query methods of the models, called on the dataset.
+
+    Args:
+        dataset:
+
+    Returns:
+        OrderedDict: function running the query, by name
+
+    """
+    from core_main_app.settings import DATA_SORTING_FIELDS
+    from core_user_registration_app.components.user_data_structure.models import (
+        UserDataStructure,
+    )
+    from core_user_registration_app.components.user_metadata.models import (
+        UserMetadata,
+    )
+
+    data = dataset.metadata[0]
+    data_structure = next(
+        document for document in dataset.data_structures if "data" in document
+    )
+    user_id = data["user_id"]
+    template_id = data["template"]
+    workspace_ids = dataset.workspaces[:5]
+    order_by_field = DATA_SORTING_FIELDS
+    return OrderedDict(
+        [
+            ("UserMetadata.get_all", lambda: UserMetadata.get_all(order_by_field)),
+            (
+                "UserMetadata.get_all_except",
+                lambda: UserMetadata.get_all_except(
+                    order_by_field,
+                    [document["_id"] for document in dataset.metadata[:10]],
+                ),
+            ),
+            (
+                "UserMetadata.get_all_by_user_id",
+                lambda: UserMetadata.get_all_by_user_id(user_id, order_by_field),
+            ),
+            (
+                "UserMetadata.get_all_except_user_id",
+                lambda: UserMetadata.get_all_except_user_id(user_id, order_by_field),
+            ),
+            (
+                "UserMetadata.get_all_by_id_list",
+                lambda: UserMetadata.get_all_by_id_list(
+                    [document["_id"] for document in dataset.metadata[:10]],
+                    order_by_field,
+                ),
+            ),
+            ("UserMetadata.get_by_id", lambda: UserMetadata.get_by_id(data["_id"])),
+            (
+                "UserMetadata.execute_query",
+                lambda: UserMetadata.execute_query({}, order_by_field),
+            ),
+            (
+                "UserMetadata.get_all_by_workspace",
+                lambda: UserMetadata.get_all_by_workspace(
+                    workspace_ids[0], order_by_field
+                ),
+            ),
+            (
+                "UserMetadata.get_all_by_list_workspace",
+                lambda: UserMetadata.get_all_by_list_workspace(
+                    workspace_ids, order_by_field
+                ),
+            ),
+            (
+                "UserMetadata.get_all_by_list_template",
+                lambda: UserMetadata.get_all_by_list_template(
+                    [template_id], order_by_field
+                ),
+            ),
+            (
+                "UserMetadata.get_all_by_user_and_workspace",
+                lambda: UserMetadata.get_all_by_user_and_workspace(
+                    user_id, workspace_ids, order_by_field
+                ),
+            ),
+            (
+                "UserDataStructure.get_by_id",
+                lambda: UserDataStructure.get_by_id(data_structure["_id"]),
+            ),
+            ("UserDataStructure.get_all", UserDataStructure.get_all),
+            (
+                "UserDataStructure.get_all_by_user_id_and_template_id",
+                lambda: UserDataStructure.get_all_by_user_id_and_template_id(
+                    data_structure["user"], data_structure["template"]
+                ),
+            ),
+            (
+                "UserDataStructure.get_by_user_id_and_template_id_and_name",
+                lambda: UserDataStructure.get_by_user_id_and_template_id_and_name(
+                    data_structure["user"],
+                    data_structure["template"],
+                    data_structure["name"],
+                ),
+            ),
+            (
+                "UserDataStructure.get_all_by_user_id_with_no_data",
+                lambda: UserDataStructure.get_all_by_user_id_with_no_data(
+                    data_structure["user"]
+                ),
+            ),
+            (
+                "UserDataStructure.get_all_except_user_id_with_no_data",
+                lambda: UserDataStructure.get_all_except_user_id_with_no_data(
+                    data_structure["user"]
+                ),
+            ),
+            (
+                "UserDataStructure.get_all_by_user_id_and_template_id_with_no_data",
+                lambda: UserDataStructure.get_all_by_user_id_and_template_id_with_no_data(
+                    data_structure["user"], data_structure["template"]
+                ),
+            ),
+            (
+                "UserDataStructure.get_all_with_no_data",
+                UserDataStructure.get_all_with_no_data,
+            ),
+            (
+                "UserDataStructure.get_all_by_user",
+                lambda: UserDataStructure.get_all_by_user(data_structure["user"]),
+            ),
+            (
+                "UserDataStructure.get_by_data_id",
+                lambda: UserDataStructure.get_by_data_id(data_structure["data"]),
+            ),
+            (
+                "UserDataStructure.get_by_data_structure_element_root",
+                lambda: UserDataStructure.get_by_data_structure_element_root(
+                    types.SimpleNamespace(
+                        id=data_structure["data_structure_element_root"]
+                    )
+                ),
+            ),
+        ]
+    )
+
+
+def get_query_plans(listener, query_methods):
+    """Run the query methods, and explain the queries they sent.
+
+    Args:
+        listener: listener of query_plan_database
+        query_methods: function running the query, by name
+
+    Returns:
+        list: QueryPlan of each query
+
+    """
+    db = get_db(QUERY_PLAN_ALIAS)
+    query_plans = []
+    for name, query_method in query_methods.items():
+        del listener.commands[:]
+        result = query_method()
+        if isinstance(result, BaseQuerySet):
+            list(result)
+        for command in list(listener.commands):
+            explained = db.command(
+                SON(
+                    [
+                        ("explain", _get_explainable_command(command)),
+                        ("verbosity", "executionStats"),
+                    ]
+                )
+            )
+            query_plans.append(_get_query_plan(name, explained))
+    return query_plans
+
+
+def format_query_plans(query_plans):
+    """Return the query plans as a text table.
+
+    Args:
+        query_plans:
+
+    Returns:
+
+    """
+    lines = ["query | returned | docs examined | keys examined | COLLSCAN | SORT"]
+    for query_plan in query_plans:
+        lines.append(
+            " | ".join(
+                str(value) if not isinstance(value, bool) else ("yes" if value else "")
+                for value in query_plan
+            )
+        )
+    return "\n".join(lines)
+
+
+def _get_explainable_command(command):
+    """Return a recorded command without its session and driver fields.
+
+    Args:
+        command:
+
+    Returns:
+
+    """
+    return SON(
+        (key, value)
+        for key, value in command.items()
+        if not key.startswith("$") and key not in ("lsid", "txnNumber")
+    )
+
+
+def _get_stages(plan):
+    """Return the names of the stages of a plan.
+
+    Args:
+        plan:
+
+    Returns:
+
+    """
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_get_stages(plan[key]))
+    for input_stage in plan.get("inputStages", []):
+        stages.extend(_get_stages(input_stage))
+    return stages
+
+
+def _get_query_plan(name, explained):
+    """Return the query plan of an explain result.
+
+    Args:
+        name:
+        explained:
+
+    Returns:
+
+    """
+    stats = explained["executionStats"]
+    stages = _get_stages(explained["queryPlanner"]["winningPlan"])
+    return QueryPlan(
+        name=name,
+        returned=stats["nReturned"],
+        docs_examined=stats["totalDocsExamined"],
+        keys_examined=stats["totalKeysExamined"],
+        collection_scan="COLLSCAN" in stages,
+        in_memory_sort="SORT" in stages,
+    )
+
+
+if __name__ == "__main__":
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.test_settings")
+    django.setup()
+    with query_plan_database() as query_listener:
+        print(
+            format_query_plans(
+                get_query_plans(
+                    query_listener, get_query_methods(seed_registration_dataset())
+                )
+            )
+        )
@@ -0,0 +1,76 @@
+""" Query plan regression tests of the UserMetadata and UserDataStructure query methods
+"""
+from contextlib import ExitStack
+from unittest import skipUnless
+from unittest.case import TestCase
+
+from tests.query_plans.harness import (
+    QUERY_PLAN_MONGODB_URI,
+    get_query_methods,
+    get_query_plans,
+    query_plan_database,
+    seed_registration_dataset,
+)
+
+# queries returning the whole collection by design
+UNFILTERED_QUERIES = ["UserDataStructure.get_all"]
+# queries sorting the (bounded) list of requested ids in memory
+ID_LIST_QUERIES = ["UserMetadata.get_all_by_id_list"]
+# queries examining only the documents they return
+SELECTIVE_QUERIES = [
+    "UserMetadata.get_all_by_user_id",
+    "UserMetadata.get_by_id",
+    "UserMetadata.get_all_by_workspace",
+    "UserMetadata.get_all_by_list_workspace",
+    "UserMetadata.get_all_by_list_template",
+    "UserMetadata.get_all_by_id_list",
+    "UserDataStructure.get_by_id",
+    "UserDataStructure.get_all_by_user_id_and_template_id",
+    "UserDataStructure.get_by_user_id_and_template_id_and_name",
+    "UserDataStructure.get_all_by_user",
+    "UserDataStructure.get_by_data_id",
+    "UserDataStructure.get_by_data_structure_element_root",
+]
+
+
+@skipUnless(QUERY_PLAN_MONGODB_URI, "mongomock cannot explain queries")
+class TestQueryPlans(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stack = ExitStack()
+        listener = cls.stack.enter_context(query_plan_database())
+        cls.query_methods = get_query_methods(seed_registration_dataset())
+        cls.query_plans = get_query_plans(listener, cls.query_methods)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stack.close()
+        super().tearDownClass()
+
+    def test_every_query_method_is_explained(self):
+        self.assertSetEqual(
+            {query_plan.name for query_plan in self.query_plans},
+            set(self.query_methods),
+        )
+
+    def test_no_query_scans_the_collection(self):
+        for query_plan in self.query_plans:
+            if query_plan.name in UNFILTERED_QUERIES:
+                continue
+            with self.subTest(query=query_plan.name):
+                self.assertFalse(query_plan.collection_scan)
+
+    def test_no_query_sorts_in_memory(self):
+        for query_plan in self.query_plans:
+            if query_plan.name in ID_LIST_QUERIES:
+                continue
+            with self.subTest(query=query_plan.name):
+                self.assertFalse(query_plan.in_memory_sort)
+
+    def test_selective_queries_only_examine_returned_documents(self):
+        for query_plan in self.query_plans:
+            if query_plan.name not in SELECTIVE_QUERIES:
+                continue
+            with self.subTest(query=query_plan.name):
+                self.assertLessEqual(query_plan.docs_examined, query_plan.returned)
@@ -0,0 +1,247 @@
+""" Fixtures files for System
+"""
+from datetime import timedelta
+
+from bson.objectid import ObjectId
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from core_main_app.components.template.models import Template
+from core_main_app.utils.integration_tests.fixture_interface import FixtureInterface
+from core_parser_app.components.data_structure_element.models import (
+    DataStructureElement,
+)
+from core_user_registration_app.components.account_request_metadata.models import (
+    AccountRequestMetadata,
+)
+from core_user_registration_app.components.user_data_structure.models import (
+    UserDataStructure,
+)
+from core_user_registration_app.components.user_metadata.models import UserMetadata
+
+
+class UserDataStructureElementFixtures(FixtureInterface):
+    """User Data structure element fixtures"""
+
+    old_data_structure = None
+    recent_data_structure = None
+    old_element_1 = None
+    old_element_2 = None
+    recent_element = None
+    template = None
+
+    def insert_data(self):
+        """Insert a set of User Data Structures and their elements.
+
+        Returns:
+
+        """
+        self.generate_template()
+        self.generate_data_structures()
+        self.generate_elements()
+
+    def generate_data_structures(self):
+        """Generate an old and a recent User Data Structure.
+
+        Returns:
+
+        """
+        self.old_data_structure = UserDataStructure(
+            id=_object_id_from_hours_ago(3),
+            user="1",
+            template=self.template,
+            name="old_data_structure",
+        ).save()
+        self.recent_data_structure = UserDataStructure(
+            user="2", template=self.template, name="recent_data_structure"
+        ).save()
+
+    def generate_elements(self):
+        """Generate old and recent Data Structure Elements.
+
+        Returns:
+
+        """
+        self.old_element_1 = DataStructureElement(
+            id=_object_id_from_hours_ago(3),
+            user="1",
+            tag="tag",
+            data_structure=self.old_data_structure,
+        ).save()
+        self.old_element_2 = DataStructureElement(
+            id=_object_id_from_hours_ago(2),
+            user="1",
+            tag="tag",
+            data_structure=self.old_data_structure,
+        ).save()
+        self.recent_element = DataStructureElement(
+            user="2", tag="tag", data_structure=self.recent_data_structure
+        ).save()
+
+    def generate_template(self):
+        """Generate an unique Template.
+
+        Returns:
+
+        """
+        template = Template()
+        xsd = (
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+            '<xs:element name="tag"></xs:element></xs:schema>'
+        )
+        template.content = xsd
+        template.hash = ""
+        template.filename = "filename"
+        self.template = template.save()
+
+
+class OrphanUserDataStructureElementFixtures(FixtureInterface):
+    """Trees of Data Structure Elements, with and without User Data Structure"""
+
+    data_structure = None
+    root = None
+    child = None
+    orphan_root = None
+    orphan_child = None
+    orphan_grandchild = None
+    recent_orphan_root = None
+    template = None
+
+    def insert_data(self):
+        """Insert a User Data Structure with its tree, and orphan trees.
+
+        Returns:
+
+        """
+        self.template = Template(
+            filename="filename", hash="", content="<xs:schema/>"
+        ).save()
+        self.generate_tree()
+        self.generate_orphan_trees()
+
+    def generate_tree(self):
+        """Generate a User Data Structure pointing to a tree of elements.
+
+        Returns:
+
+        """
+        self.data_structure = UserDataStructure(
+            user="1", template=self.template, name="data_structure"
+        ).save()
+        self.child = DataStructureElement(
+            id=_object_id_from_hours_ago(3),
+            tag="child",
+            data_structure=self.data_structure,
+        ).save()
+        self.root = DataStructureElement(
+            id=_object_id_from_hours_ago(4),
+            tag="root",
+            data_structure=self.data_structure,
+            children=[self.child],
+        ).save()
+        self.data_structure.data_structure_element_root = self.root
+        self.data_structure.save()
+
+    def generate_orphan_trees(self):
+        """Generate trees of elements whose User Data Structure was removed.
+
+        Returns:
+
+        """
+        deleted_data_structure = UserDataStructure(
+            user="2", template=self.template, name="deleted_data_structure"
+        ).save()
+        self.orphan_grandchild = DataStructureElement(
+            id=_object_id_from_hours_ago(5),
+            tag="grandchild",
+            data_structure=deleted_data_structure,
+        ).save()
+        self.orphan_child = DataStructureElement(
+            id=_object_id_from_hours_ago(6),
+            tag="child",
+            data_structure=deleted_data_structure,
+            children=[self.orphan_grandchild],
+        ).save()
+        self.orphan_root = DataStructureElement(
+            id=_object_id_from_hours_ago(7),
+            tag="root",
+            data_structure=deleted_data_structure,
+            children=[self.orphan_child],
+        ).save()
+        self.recent_orphan_root = DataStructureElement(
+            tag="root", data_structure=deleted_data_structure
+        ).save()
+        # remove the document without sending the pre_delete signal
+        UserDataStructure._get_collection().delete_one(
+            {"_id": deleted_data_structure.id}
+        )
+
+
+class AccountRequestFixtures(FixtureInterface):
+    """Account requests, with their users and metadata"""
+
+    old_request_without_metadata = None
+    old_request_with_metadata = None
+    recent_request = None
+    old_request_of_active_user = None
+    metadata = None
+    template = None
+
+    def insert_data(self):
+        """Insert old and recent account requests.
+
+        Returns:
+
+        """
+        self.template = Template(
+            filename="filename", hash="", content="<xs:schema/>"
+        ).save()
+        # NOTE: no xml_content to avoid using unsupported GridFS mock
+        self.metadata = UserMetadata(
+            template=self.template, user_id="None", title="old_with_metadata"
+        ).save()
+        self.old_request_without_metadata = self.generate_account_request(
+            "old_without_metadata", hours=48
+        )
+        self.old_request_with_metadata = self.generate_account_request(
+            "old_with_metadata", hours=49, metadata=self.metadata
+        )
+        self.recent_request = self.generate_account_request("recent", hours=0)
+        self.old_request_of_active_user = self.generate_account_request(
+            "active", hours=50, is_active=True
+        )
+
+    @staticmethod
+    def generate_account_request(username, hours, metadata=None, is_active=False):
+        """Generate a Django user and its account request.
+
+        Args:
+            username:
+            hours: age of the account request
+            metadata:
+            is_active:
+
+        Returns:
+
+        """
+        User.objects.create(username=username, is_active=is_active)
+        return AccountRequestMetadata(
+            id=_object_id_from_hours_ago(hours) if hours else None,
+            username=username,
+            first_name="first_name",
+            last_name="last_name",
+            email=f"{username}@example.com",
+            metadata=metadata,
+        ).save()
+
+
+def _object_id_from_hours_ago(hours):
+    """Return an ObjectId generated the given number of hours ago.
+
+    Args:
+        hours:
+
+    Returns:
+
+    """
+    return ObjectId.from_datetime(timezone.now() - timedelta(hours=hours))
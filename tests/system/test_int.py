@@ -0,0 +1,299 @@
+""" Integration Test System API
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from mock import patch
+from mongoengine.fields import GridFSProxy
+from django.utils import timezone
+
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    MongoIntegrationBaseTestCase,
+)
+from core_main_app.utils.integration_tests.integration_base_transaction_test_case import (
+    MongoIntegrationTransactionTestCase,
+)
+from core_parser_app.components.data_structure_element.models import (
+    DataStructureElement,
+)
+from core_user_registration_app.components.account_request_metadata.models import (
+    AccountRequestMetadata,
+)
+from core_user_registration_app.components.user_data_structure.models import (
+    UserDataStructure,
+)
+from core_user_registration_app.components.user_metadata.models import UserMetadata
+from core_user_registration_app.system import api as system_api
+from tests.system.fixtures.fixtures import (
+    UserDataStructureElementFixtures,
+    OrphanUserDataStructureElementFixtures,
+    AccountRequestFixtures,
+)
+
+fixture_elements = UserDataStructureElementFixtures()
+fixture_orphan_elements = OrphanUserDataStructureElementFixtures()
+fixture_account_requests = AccountRequestFixtures()
+
+
+class TestGetAllUserDataStructureElementsCreatedBefore(MongoIntegrationBaseTestCase):
+    fixture = fixture_elements
+
+    def test_returns_only_elements_created_before_date(self):
+        # Act
+        result = system_api.get_all_user_data_structure_elements_created_before(
+            timezone.now() - timedelta(hours=1)
+        )
+        # Assert
+        self.assertEqual(
+            {element.id for element in result},
+            {self.fixture.old_element_1.id, self.fixture.old_element_2.id},
+        )
+
+    def test_returns_nothing_if_date_is_before_all_elements(self):
+        # Act
+        result = system_api.get_all_user_data_structure_elements_created_before(
+            timezone.now() - timedelta(hours=5)
+        )
+        # Assert
+        self.assertEqual(result.count(), 0)
+
+
+class TestDeleteFirstUserDataStructureElementsCreatedBefore(
+    MongoIntegrationBaseTestCase
+):
+    fixture = fixture_elements
+
+    def test_deletes_count_first_elements(self):
+        # Act
+        result = system_api.delete_first_user_data_structure_elements_created_before(
+            timezone.now() - timedelta(hours=1), 1
+        )
+        # Assert
+        self.assertEqual(result, (1, self.fixture.old_element_1.id))
+        self.assertEqual(
+            [element.id for element in DataStructureElement.objects.all()],
+            [self.fixture.old_element_2.id, self.fixture.recent_element.id],
+        )
+
+    def test_deletes_only_elements_created_before_date(self):
+        # Act
+        result = system_api.delete_first_user_data_structure_elements_created_before(
+            timezone.now() - timedelta(hours=1), 10
+        )
+        # Assert
+        self.assertEqual(result, (2, self.fixture.old_element_2.id))
+        self.assertEqual(
+            [element.id for element in DataStructureElement.objects.all()],
+            [self.fixture.recent_element.id],
+        )
+
+    def test_resumes_from_id(self):
+        # Act
+        result = system_api.delete_first_user_data_structure_elements_created_before(
+            timezone.now() - timedelta(hours=1),
+            10,
+            from_id=self.fixture.old_element_2.id,
+        )
+        # Assert
+        self.assertEqual(result, (1, self.fixture.old_element_2.id))
+
+    def test_returns_no_id_if_nothing_expired(self):
+        # Act
+        result = system_api.delete_first_user_data_structure_elements_created_before(
+            timezone.now() - timedelta(hours=5), 10
+        )
+        # Assert
+        self.assertEqual(result, (0, None))
+
+
+class TestDeleteFirstUserDataStructuresCreatedBefore(MongoIntegrationBaseTestCase):
+    fixture = fixture_elements
+
+    def test_deletes_only_data_structures_created_before_date(self):
+        # Act
+        result = system_api.delete_first_user_data_structures_created_before(
+            timezone.now() - timedelta(hours=1), 10
+        )
+        # Assert
+        self.assertEqual(result, 1)
+        self.assertEqual(
+            [data_structure.id for data_structure in UserDataStructure.objects.all()],
+            [self.fixture.recent_data_structure.id],
+        )
+
+    def test_deletes_at_most_count_data_structures(self):
+        # Act
+        result = system_api.delete_first_user_data_structures_created_before(
+            timezone.now() + timedelta(hours=1), 1
+        )
+        # Assert
+        self.assertEqual(result, 1)
+        self.assertEqual(
+            [data_structure.id for data_structure in UserDataStructure.objects.all()],
+            [self.fixture.recent_data_structure.id],
+        )
+
+    def test_returns_zero_if_nothing_expired(self):
+        # Act
+        result = system_api.delete_first_user_data_structures_created_before(
+            timezone.now() - timedelta(hours=5), 10
+        )
+        # Assert
+        self.assertEqual(result, 0)
+
+
+class TestGetAllUserDataStructureElementsCreatedBeforeFromId(
+    MongoIntegrationBaseTestCase
+):
+    fixture = fixture_elements
+
+    def test_returns_only_elements_from_id(self):
+        # Act
+        result = system_api.get_all_user_data_structure_elements_created_before(
+            timezone.now() - timedelta(hours=1),
+            from_id=self.fixture.old_element_2.id,
+        )
+        # Assert
+        self.assertEqual(
+            [element.id for element in result], [self.fixture.old_element_2.id]
+        )
+
+
+class TestGetOrphanUserDataStructureElementTrees(MongoIntegrationBaseTestCase):
+    fixture = fixture_orphan_elements
+
+    def test_returns_orphan_roots_created_before_date(self):
+        # Act
+        result = system_api.get_orphan_user_data_structure_element_trees(
+            timezone.now() - timedelta(hours=1), batch_size=10
+        )
+        # Assert
+        self.assertEqual(
+            [tree["_id"] for tree in result], [self.fixture.orphan_root.id]
+        )
+
+    def test_returns_all_descendants_of_orphan_roots(self):
+        # Act
+        result = system_api.get_orphan_user_data_structure_element_trees(
+            timezone.now() - timedelta(hours=1), batch_size=10
+        )
+        # Assert
+        self.assertEqual(
+            {descendant["_id"] for descendant in list(result)[0]["descendants"]},
+            {self.fixture.orphan_child.id, self.fixture.orphan_grandchild.id},
+        )
+
+
+class TestDeleteOrphanUserDataStructureElements(MongoIntegrationBaseTestCase):
+    fixture = fixture_orphan_elements
+
+    def test_deletes_orphan_trees_only(self):
+        # Act
+        result = system_api.delete_orphan_user_data_structure_elements(
+            timezone.now() - timedelta(hours=1), batch_size=2
+        )
+        # Assert
+        self.assertEqual(result, 3)
+        self.assertEqual(
+            {element.id for element in DataStructureElement.objects.all()},
+            {
+                self.fixture.root.id,
+                self.fixture.child.id,
+                self.fixture.recent_orphan_root.id,
+            },
+        )
+
+
+class TestDeleteUserDataStructureDraftsCreatedBefore(MongoIntegrationBaseTestCase):
+    fixture = fixture_elements
+
+    def test_deletes_only_drafts_created_before_date(self):
+        # Act
+        result = system_api.delete_user_data_structure_drafts_created_before(
+            timezone.now() - timedelta(hours=1), batch_size=10
+        )
+        # Assert
+        self.assertEqual(result, 1)
+        self.assertEqual(
+            [data_structure.id for data_structure in UserDataStructure.objects.all()],
+            [self.fixture.recent_data_structure.id],
+        )
+
+    def test_keeps_drafts_linked_to_data(self):
+        # Arrange
+        UserDataStructure.objects(id=self.fixture.old_data_structure.id).update(
+            set__data=self.fixture.old_data_structure.id
+        )
+        # Act
+        result = system_api.delete_user_data_structure_drafts_created_before(
+            timezone.now() - timedelta(hours=1), batch_size=10
+        )
+        # Assert
+        self.assertEqual(result, 0)
+
+
+class TestDeleteAccountRequestsWithoutMetadataCreatedBefore(
+    MongoIntegrationTransactionTestCase
+):
+    fixture = fixture_account_requests
+
+    def test_deletes_old_account_requests_without_metadata(self):
+        # Act
+        result = system_api.delete_account_requests_without_metadata_created_before(
+            timezone.now() - timedelta(hours=24), batch_size=10
+        )
+        # Assert
+        self.assertEqual(result, 2)
+        self.assertEqual(
+            {request.username for request in AccountRequestMetadata.objects.all()},
+            {"old_with_metadata", "recent"},
+        )
+
+    def test_deletes_inactive_users_of_deleted_requests(self):
+        # Act
+        system_api.delete_account_requests_without_metadata_created_before(
+            timezone.now() - timedelta(hours=24), batch_size=10
+        )
+        # Assert
+        self.assertEqual(
+            set(User.objects.values_list("username", flat=True)),
+            {"old_with_metadata", "recent", "active"},
+        )
+
+    def test_deletes_only_one_batch(self):
+        # Act
+        result = system_api.delete_account_requests_without_metadata_created_before(
+            timezone.now() - timedelta(hours=24), batch_size=1
+        )
+        # Assert
+        self.assertEqual(result, 1)
+        self.assertEqual(AccountRequestMetadata.objects.count(), 3)
+
+
+# NOTE: GridFS is not supported by the mock database
+@patch.object(GridFSProxy, "delete")
+class TestDeleteAccountRequestsWithMetadataCreatedBefore(
+    MongoIntegrationTransactionTestCase
+):
+    fixture = fixture_account_requests
+
+    def test_deletes_old_account_requests_with_metadata(self, mock_delete_file):
+        # Act
+        result = system_api.delete_account_requests_with_metadata_created_before(
+            timezone.now() - timedelta(hours=24), batch_size=10
+        )
+        # Assert
+        self.assertEqual(result, 1)
+        self.assertEqual(
+            {request.username for request in AccountRequestMetadata.objects.all()},
+            {"old_without_metadata", "recent", "active"},
+        )
+
+    def test_deletes_metadata_and_user_of_deleted_requests(self, mock_delete_file):
+        # Act
+        system_api.delete_account_requests_with_metadata_created_before(
+            timezone.now() - timedelta(hours=24), batch_size=10
+        )
+        # Assert
+        self.assertEqual(UserMetadata.objects.count(), 0)
+        self.assertFalse(User.objects.filter(username="old_with_metadata").exists())
@@ -0,0 +1,116 @@
+""" Unit Test System API
+"""
+from unittest.case import TestCase
+
+from mock import patch, MagicMock
+from pymongo.errors import OperationFailure
+
+from core_parser_app.components.data_structure_element.models import (
+    DataStructureElement,
+)
+from core_user_registration_app.components.user_data_structure.models import (
+    UserDataStructure,
+)
+from core_user_registration_app.system import api as system_api
+
+
+class TestEnsureUserDataStructureTtlIndex(TestCase):
+    @patch.object(UserDataStructure, "_get_collection")
+    def test_creates_ttl_index_on_creation_date(self, mock_get_collection):
+        # Arrange
+        mock_collection = MagicMock()
+        mock_get_collection.return_value = mock_collection
+        # Act
+        system_api.ensure_user_data_structure_ttl_index(3600)
+        # Assert
+        mock_collection.create_index.assert_called_with(
+            "creation_date", expireAfterSeconds=3600
+        )
+
+    @patch.object(UserDataStructure, "_get_collection")
+    def test_updates_expiration_if_index_exists_with_other_options(
+        self, mock_get_collection
+    ):
+        # Arrange
+        mock_collection = MagicMock()
+        mock_collection.name = "user_data_structure"
+        mock_collection.create_index.side_effect = OperationFailure("conflict")
+        mock_get_collection.return_value = mock_collection
+        # Act
+        system_api.ensure_user_data_structure_ttl_index(7200)
+        # Assert
+        mock_collection.database.command.assert_called_with(
+            "collMod",
+            "user_data_structure",
+            index={"keyPattern": {"creation_date": 1}, "expireAfterSeconds": 7200},
+        )
+
+
+class TestDropUserDataStructureTtlIndex(TestCase):
+    @patch.object(UserDataStructure, "_get_collection")
+    def test_drops_ttl_index_on_creation_date(self, mock_get_collection):
+        # Arrange
+        mock_collection = MagicMock()
+        mock_collection.index_information.return_value = {
+            "_id_": {"key": [("_id", 1)]},
+            "creation_date_1": {
+                "key": [("creation_date", 1)],
+                "expireAfterSeconds": 3600,
+            },
+        }
+        mock_get_collection.return_value = mock_collection
+        # Act
+        result = system_api.drop_user_data_structure_ttl_index()
+        # Assert
+        self.assertTrue(result)
+        mock_collection.drop_index.assert_called_with("creation_date_1")
+
+    @patch.object(UserDataStructure, "_get_collection")
+    def test_keeps_index_without_expiration(self, mock_get_collection):
+        # Arrange
+        mock_collection = MagicMock()
+        mock_collection.index_information.return_value = {
+            "creation_date_1": {"key": [("creation_date", 1)]},
+        }
+        mock_get_collection.return_value = mock_collection
+        # Act
+        result = system_api.drop_user_data_structure_ttl_index()
+        # Assert
+        self.assertFalse(result)
+        mock_collection.drop_index.assert_not_called()
+
+
+class TestEnsureDataStructureElementChildrenIndex(TestCase):
+    @patch.object(DataStructureElement, "_get_collection")
+    def test_creates_index_on_children(self, mock_get_collection):
+        # Arrange
+        mock_collection = MagicMock()
+        mock_get_collection.return_value = mock_collection
+        # Act
+        system_api.ensure_data_structure_element_children_index()
+        # Assert
+        mock_collection.create_index.assert_called_with("children")
+
+
+class TestGetAverageDocumentSize(TestCase):
+    @patch.object(UserDataStructure, "_get_collection")
+    def test_returns_average_object_size(self, mock_get_collection):
+        # Arrange
+        mock_collection = MagicMock()
+        mock_collection.database.command.return_value = {"avgObjSize": 512}
+        mock_get_collection.return_value = mock_collection
+        # Act
+        result = system_api.get_average_document_size(UserDataStructure)
+        # Assert
+        self.assertEqual(result, 512)
+
+    @patch.object(UserDataStructure, "_get_collection")
+    def test_returns_zero_if_stats_are_not_available(self, mock_get_collection):
+        # Arrange
+        mock_collection = MagicMock()
+        mock_collection.database.command.side_effect = OperationFailure("error")
+        mock_get_collection.return_value = mock_collection
+        # Act
+        result = system_api.get_average_document_size(UserDataStructure)
+        # Assert
+        self.assertEqual(result, 0)
@@ -0,0 +1,374 @@
+""" Integration Test User Registration tasks
+"""
+from datetime import timedelta
+
+from mock import patch
+
+from core_main_app.utils.datetime_tools.utils import datetime_now
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    MongoIntegrationBaseTestCase,
+)
+from core_parser_app.components.data_structure_element.models import (
+    DataStructureElement,
+)
+from core_user_registration_app import tasks
+from core_user_registration_app.components.cleanup_run.models import CleanupRun
+from core_user_registration_app.components.cleanup_state import (
+    api as cleanup_state_api,
+)
+from core_user_registration_app.components.cleanup_state.models import (
+    CleanupState,
+)
+from core_user_registration_app.components.lease import api as lease_api
+from core_user_registration_app.components.lease.models import Lease
+from core_user_registration_app.components.user_data_structure.models import (
+    UserDataStructure,
+)
+from tests.system.fixtures.fixtures import (
+    UserDataStructureElementFixtures,
+    OrphanUserDataStructureElementFixtures,
+)
+
+fixture_elements = UserDataStructureElementFixtures()
+fixture_orphan_elements = OrphanUserDataStructureElementFixtures()
+
+
+class TestDeleteUserDataStructure(MongoIntegrationBaseTestCase):
+    fixture = fixture_elements
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(tasks.delete_user_data_structure, "apply_async")
+        self.mock_apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_deletes_expired_elements(self):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(
+            [element.id for element in DataStructureElement.objects.all()],
+            [self.fixture.recent_element.id],
+        )
+
+    def test_keeps_data_structures_without_ttl_index(self):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(UserDataStructure.objects.count(), 2)
+
+    @patch.object(tasks.system_api, "drop_user_data_structure_ttl_index")
+    def test_drops_ttl_index_when_disabled(self, mock_drop_ttl_index):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        mock_drop_ttl_index.assert_called_once_with()
+
+    @patch.object(tasks.system_api, "drop_user_data_structure_ttl_index")
+    def test_dry_run_keeps_ttl_index(self, mock_drop_ttl_index):
+        # Act
+        tasks.delete_user_data_structure(dry_run=True)
+        # Assert
+        mock_drop_ttl_index.assert_not_called()
+
+    @patch.object(tasks, "USER_DATA_STRUCTURE_TTL_INDEX_ENABLED", True)
+    @patch.object(tasks.system_api, "drop_user_data_structure_ttl_index")
+    def test_ttl_index_mode_keeps_ttl_index(self, mock_drop_ttl_index):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        mock_drop_ttl_index.assert_not_called()
+
+    @patch.object(tasks, "USER_DATA_STRUCTURE_TTL_INDEX_ENABLED", True)
+    def test_ttl_index_mode_sweeps_expired_data_structures(self):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(
+            [data_structure.id for data_structure in UserDataStructure.objects.all()],
+            [self.fixture.recent_data_structure.id],
+        )
+
+    @patch.object(tasks, "USER_DATA_STRUCTURE_TTL_INDEX_ENABLED", True)
+    @patch.object(tasks, "USER_DATA_STRUCTURE_DELETE_BATCH_SIZE", 1)
+    @patch.object(
+        tasks.system_api,
+        "delete_first_user_data_structures_created_before",
+        return_value=1,
+    )
+    def test_ttl_index_mode_sweeps_at_most_batch_size_data_structures(
+        self, mock_delete_data_structures
+    ):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(mock_delete_data_structures.call_args[0][1], 1)
+
+    @patch.object(tasks, "USER_DATA_STRUCTURE_TTL_INDEX_ENABLED", True)
+    def test_ttl_index_mode_sweeps_expired_elements(self):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(
+            [element.id for element in DataStructureElement.objects.all()],
+            [self.fixture.recent_element.id],
+        )
+
+    def test_saves_watermark(self):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        cleanup_state = CleanupState.get_by_name(tasks.USER_DATA_STRUCTURE_CLEANUP_NAME)
+        self.assertGreater(cleanup_state.watermark, self.fixture.old_element_2.id)
+        self.assertLess(cleanup_state.watermark, self.fixture.recent_element.id)
+
+    def test_skips_elements_below_watermark(self):
+        # Arrange
+        CleanupState(
+            name=tasks.USER_DATA_STRUCTURE_CLEANUP_NAME,
+            watermark=self.fixture.old_element_2.id,
+        ).save()
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(
+            [element.id for element in DataStructureElement.objects.all()],
+            [self.fixture.old_element_1.id, self.fixture.recent_element.id],
+        )
+
+    def test_skips_run_if_lease_is_held(self):
+        # Arrange
+        lease_api.acquire(tasks.USER_DATA_STRUCTURE_CLEANUP_NAME, "other_worker", 60)
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(DataStructureElement.objects.count(), 3)
+
+    def test_releases_lease_after_run(self):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(Lease.objects.count(), 0)
+
+    def test_saves_run_counters_in_history(self):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        cleanup_run = CleanupRun.get_all_by_name(
+            tasks.USER_DATA_STRUCTURE_CLEANUP_NAME
+        ).first()
+        self.assertEqual(cleanup_run.elements_scanned, 2)
+        self.assertEqual(cleanup_run.elements_deleted, 2)
+        self.assertFalse(cleanup_run.dry_run)
+        self.assertIn("delete_elements", cleanup_run.phase_durations)
+
+    def test_dry_run_deletes_nothing(self):
+        # Act
+        tasks.delete_user_data_structure(dry_run=True)
+        # Assert
+        self.assertEqual(DataStructureElement.objects.count(), 3)
+
+    def test_dry_run_reports_elements_that_would_be_deleted(self):
+        # Act
+        tasks.delete_user_data_structure(dry_run=True)
+        # Assert
+        cleanup_run = CleanupRun.get_all_by_name(
+            tasks.USER_DATA_STRUCTURE_CLEANUP_NAME
+        ).first()
+        self.assertTrue(cleanup_run.dry_run)
+        self.assertEqual(cleanup_run.elements_scanned, 2)
+        self.assertEqual(cleanup_run.elements_deleted, 0)
+
+    def test_dry_run_does_not_move_watermark(self):
+        # Act
+        tasks.delete_user_data_structure(dry_run=True)
+        # Assert
+        self.assertEqual(CleanupState.objects.count(), 0)
+
+    def test_skips_run_if_not_due(self):
+        # Arrange
+        CleanupState(
+            name=tasks.USER_DATA_STRUCTURE_CLEANUP_NAME,
+            next_run_date=datetime_now() + timedelta(minutes=5),
+        ).save()
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(DataStructureElement.objects.count(), 3)
+
+    def test_plans_next_run(self):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        cleanup_state = CleanupState.get_by_name(tasks.USER_DATA_STRUCTURE_CLEANUP_NAME)
+        self.assertFalse(
+            cleanup_state_api.is_due(tasks.USER_DATA_STRUCTURE_CLEANUP_NAME)
+        )
+        self.assertIsNotNone(cleanup_state.interval)
+        self.assertIsNotNone(cleanup_state.batch_size)
+
+    @patch.object(tasks, "USER_DATA_STRUCTURE_DELETE_BATCH_SIZE", 1)
+    def test_deletes_at_most_batch_size_elements(self):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(
+            [element.id for element in DataStructureElement.objects.all()],
+            [self.fixture.old_element_2.id, self.fixture.recent_element.id],
+        )
+
+    @patch.object(tasks, "USER_DATA_STRUCTURE_DELETE_BATCH_SIZE", 1)
+    @patch.object(tasks.system_api, "get_average_document_size", return_value=100)
+    def test_reclaims_bytes_of_deleted_elements_only(
+        self, mock_get_average_document_size
+    ):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        cleanup_run = CleanupRun.get_all_by_name(
+            tasks.USER_DATA_STRUCTURE_CLEANUP_NAME
+        ).first()
+        self.assertEqual(cleanup_run.elements_scanned, 2)
+        self.assertEqual(cleanup_run.bytes_reclaimed, 100)
+
+    @patch.object(tasks.system_api, "get_average_document_size", return_value=100)
+    def test_dry_run_reclaims_bytes_of_scanned_elements(
+        self, mock_get_average_document_size
+    ):
+        # Act
+        tasks.delete_user_data_structure(dry_run=True)
+        # Assert
+        cleanup_run = CleanupRun.get_all_by_name(
+            tasks.USER_DATA_STRUCTURE_CLEANUP_NAME
+        ).first()
+        self.assertEqual(cleanup_run.bytes_reclaimed, 200)
+
+    @patch.object(tasks, "USER_DATA_STRUCTURE_DELETE_BATCH_SIZE", 1)
+    def test_schedules_next_run_if_backlog_remains(self):
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        cleanup_state = CleanupState.get_by_name(tasks.USER_DATA_STRUCTURE_CLEANUP_NAME)
+        self.assertEqual(cleanup_state.watermark, self.fixture.old_element_1.id)
+        self.assertEqual(cleanup_state.batch_size, 2)
+        self.mock_apply_async.assert_called_once_with(
+            countdown=tasks.DELETE_USER_DATA_STRUCTURE_RATE
+        )
+
+    @patch.object(tasks, "USER_DATA_STRUCTURE_DELETE_BATCH_SIZE", 1)
+    def test_next_run_deletes_backlog(self):
+        # Arrange
+        tasks.delete_user_data_structure()
+        CleanupState.objects(name=tasks.USER_DATA_STRUCTURE_CLEANUP_NAME).update(
+            next_run_date=None
+        )
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        self.assertEqual(
+            [element.id for element in DataStructureElement.objects.all()],
+            [self.fixture.recent_element.id],
+        )
+
+    def test_does_not_schedule_next_run_if_nothing_expired(self):
+        # Arrange
+        CleanupState(
+            name=tasks.USER_DATA_STRUCTURE_CLEANUP_NAME,
+            watermark=self.fixture.recent_element.id,
+            interval=40,
+        ).save()
+        # Act
+        tasks.delete_user_data_structure()
+        # Assert
+        cleanup_state = CleanupState.get_by_name(tasks.USER_DATA_STRUCTURE_CLEANUP_NAME)
+        self.assertEqual(cleanup_state.interval, 80)
+        self.mock_apply_async.assert_not_called()
+
+
+class TestDeleteOrphanUserDataStructureElements(MongoIntegrationBaseTestCase):
+    fixture = fixture_orphan_elements
+
+    def test_deletes_orphan_trees(self):
+        # Act
+        tasks.delete_orphan_user_data_structure_elements()
+        # Assert
+        self.assertEqual(DataStructureElement.objects.count(), 3)
+
+    def test_dry_run_reports_orphan_elements(self):
+        # Act
+        tasks.delete_orphan_user_data_structure_elements(dry_run=True)
+        # Assert
+        cleanup_run = CleanupRun.get_all_by_name(
+            tasks.ORPHAN_DATA_STRUCTURE_ELEMENT_CLEANUP_NAME
+        ).first()
+        self.assertEqual(cleanup_run.elements_scanned, 3)
+        self.assertEqual(DataStructureElement.objects.count(), 6)
+
+    @patch.object(tasks.system_api, "get_average_document_size", return_value=100)
+    def test_reclaims_bytes_of_deleted_elements(self, mock_get_average_document_size):
+        # Act
+        tasks.delete_orphan_user_data_structure_elements()
+        # Assert
+        cleanup_run = CleanupRun.get_all_by_name(
+            tasks.ORPHAN_DATA_STRUCTURE_ELEMENT_CLEANUP_NAME
+        ).first()
+        self.assertEqual(cleanup_run.bytes_reclaimed, 300)
+
+    def test_creates_children_index(self):
+        # Act
+        tasks.delete_orphan_user_data_structure_elements()
+        # Assert
+        self.assertIn(
+            [("children", 1)],
+            [
+                index["key"]
+                for index in DataStructureElement._get_collection()
+                .index_information()
+                .values()
+            ],
+        )
+
+
+class TestApplyRegistrationRetentionPolicy(MongoIntegrationBaseTestCase):
+    fixture = fixture_elements
+
+    @patch.object(tasks, "REGISTRATION_RETENTION_POLICIES", {"user_data_structure": 1})
+    @patch.object(tasks.apply_registration_retention_policy, "apply_async")
+    def test_deletes_expired_drafts(self, mock_apply_async):
+        # Act
+        tasks.apply_registration_retention_policy("user_data_structure")
+        # Assert
+        self.assertEqual(
+            [data_structure.id for data_structure in UserDataStructure.objects.all()],
+            [self.fixture.recent_data_structure.id],
+        )
+        mock_apply_async.assert_not_called()
+
+    @patch.object(tasks, "REGISTRATION_RETENTION_BATCH_SIZE", 1)
+    @patch.object(tasks, "REGISTRATION_RETENTION_POLICIES", {"user_data_structure": 1})
+    @patch.object(tasks.apply_registration_retention_policy, "apply_async")
+    def test_schedules_next_batch_if_batch_is_full(self, mock_apply_async):
+        # Act
+        tasks.apply_registration_retention_policy("user_data_structure")
+        # Assert
+        mock_apply_async.assert_called_with(("user_data_structure",))
+
+
+class TestApplyRegistrationRetentionPolicies(MongoIntegrationBaseTestCase):
+    fixture = fixture_elements
+
+    @patch.object(
+        tasks,
+        "REGISTRATION_RETENTION_POLICIES",
+        {
+            "user_data_structure": 1,
+            "account_request_without_metadata": None,
+            "unknown": 1,
+        },
+    )
+    @patch.object(tasks.apply_registration_retention_policy, "apply_async")
+    def test_starts_enabled_policies_only(self, mock_apply_async):
+        # Act
+        tasks.apply_registration_retention_policies()
+        # Assert
+        mock_apply_async.assert_called_once_with(("user_data_structure",))
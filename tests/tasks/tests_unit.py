@@ -0,0 +1,61 @@
+""" Unit Test User Registration tasks
+"""
+from unittest.case import TestCase
+
+from mock import patch
+
+from core_user_registration_app import tasks
+
+
+@patch.object(tasks, "DELETE_USER_DATA_STRUCTURE_RATE", 10)
+@patch.object(tasks, "DELETE_USER_DATA_STRUCTURE_MAX_INTERVAL", 3600)
+@patch.object(tasks, "USER_DATA_STRUCTURE_DELETE_BATCH_SIZE", 1000)
+@patch.object(tasks, "USER_DATA_STRUCTURE_DELETE_MAX_BATCH_SIZE", 10000)
+class TestGetNextSchedule(TestCase):
+    def test_empty_run_doubles_interval(self):
+        # Act
+        result = tasks._get_next_schedule(40, 1000, 0)
+        # Assert
+        self.assertEqual(result, (80, 1000))
+
+    def test_empty_run_caps_interval(self):
+        # Act
+        result = tasks._get_next_schedule(3000, 1000, 0)
+        # Assert
+        self.assertEqual(result, (3600, 1000))
+
+    def test_first_empty_run_starts_from_rate(self):
+        # Act
+        result = tasks._get_next_schedule(None, 1000, 0)
+        # Assert
+        self.assertEqual(result, (20, 1000))
+
+    def test_backlog_runs_at_rate_with_larger_batch(self):
+        # Act
+        result = tasks._get_next_schedule(3600, 1000, 1500)
+        # Assert
+        self.assertEqual(result, (10, 2000))
+
+    def test_backlog_caps_batch_size(self):
+        # Act
+        result = tasks._get_next_schedule(10, 8000, 9000)
+        # Assert
+        self.assertEqual(result, (10, 10000))
+
+    def test_batch_deleting_all_eligible_elements_is_not_a_backlog(self):
+        # Act
+        result = tasks._get_next_schedule(400, 4000, 4000)
+        # Assert
+        self.assertEqual(result, (200, 2000))
+
+    def test_partial_batch_moves_back_to_defaults(self):
+        # Act
+        result = tasks._get_next_schedule(400, 4000, 5)
+        # Assert
+        self.assertEqual(result, (200, 2000))
+
+    def test_partial_batch_keeps_bounds(self):
+        # Act
+        result = tasks._get_next_schedule(10, 1000, 5)
+        # Assert
+        self.assertEqual(result, (10, 1000))
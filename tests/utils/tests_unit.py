@@ -0,0 +1,535 @@
+""" Unit Test XML utils
+"""
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from unittest.case import TestCase
+
+from bson.objectid import ObjectId
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase as DjangoTestCase
+from mock import Mock, patch
+from mongoengine import signals as mongoengine_signals
+
+from core_main_app.commons import exceptions
+from core_main_app.components.template.models import Template
+from core_main_app.components.workspace.models import Workspace
+from core_main_app.permissions import rights
+from core_user_registration_app.utils import pagination as pagination_utils
+from core_user_registration_app.utils import workspace_access as workspace_access_utils
+from core_user_registration_app.utils import xml as registration_xml_utils
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+XSD_CONTENT = (
+    '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+    '<xs:element name="root" type="xs:integer"/>'
+    "</xs:schema>"
+)
+OTHER_XSD_CONTENT = (
+    '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+    '<xs:element name="root" type="xs:string"/>'
+    "</xs:schema>"
+)
+
+
+def _create_template(content=XSD_CONTENT):
+    """Return an unsaved template with an id.
+
+    Args:
+        content:
+
+    Returns:
+
+    """
+    return Template(id=ObjectId(), filename="schema.xsd", content=content)
+
+
+class TestGetCompiledSchema(TestCase):
+    def setUp(self):
+        registration_xml_utils.invalidate_schema_cache()
+
+    def test_returns_cached_schema_for_same_template(self):
+        # Arrange
+        template = _create_template()
+        # Act
+        compiled_schema = registration_xml_utils.get_compiled_schema(template)
+        # Assert
+        self.assertIs(
+            registration_xml_utils.get_compiled_schema(template), compiled_schema
+        )
+
+    def test_compiles_again_if_content_changed(self):
+        # Arrange
+        template = _create_template()
+        compiled_schema = registration_xml_utils.get_compiled_schema(template)
+        template.content = OTHER_XSD_CONTENT
+        # Act
+        result = registration_xml_utils.get_compiled_schema(template)
+        # Assert
+        self.assertIsNot(result, compiled_schema)
+
+    @patch.object(registration_xml_utils, "REGISTRATION_SCHEMA_CACHE_SIZE", 1)
+    def test_evicts_least_recently_used_schema(self):
+        # Arrange
+        template = _create_template()
+        compiled_schema = registration_xml_utils.get_compiled_schema(template)
+        registration_xml_utils.get_compiled_schema(_create_template())
+        # Act
+        result = registration_xml_utils.get_compiled_schema(template)
+        # Assert
+        self.assertIsNot(result, compiled_schema)
+
+    def test_invalidate_removes_template_schemas(self):
+        # Arrange
+        template = _create_template()
+        other_template = _create_template()
+        compiled_schema = registration_xml_utils.get_compiled_schema(template)
+        other_compiled_schema = registration_xml_utils.get_compiled_schema(
+            other_template
+        )
+        # Act
+        registration_xml_utils.invalidate_schema_cache([template.id])
+        # Assert
+        self.assertIsNot(
+            registration_xml_utils.get_compiled_schema(template), compiled_schema
+        )
+        self.assertIs(
+            registration_xml_utils.get_compiled_schema(other_template),
+            other_compiled_schema,
+        )
+
+
+class TestValidateXmlData(TestCase):
+    def setUp(self):
+        registration_xml_utils.invalidate_schema_cache()
+        registration_xml_utils.clear_validation_cache()
+
+    def test_returns_none_if_valid(self):
+        # Arrange
+        xml_tree = XSDTree.build_tree("<root>1</root>")
+        # Act
+        result = registration_xml_utils.validate_xml_data(_create_template(), xml_tree)
+        # Assert
+        self.assertIsNone(result)
+
+    def test_returns_error_if_invalid(self):
+        # Arrange
+        xml_tree = XSDTree.build_tree("<root>one</root>")
+        # Act
+        result = registration_xml_utils.validate_xml_data(_create_template(), xml_tree)
+        # Assert
+        self.assertIsInstance(result, str)
+
+    def test_returns_error_if_schema_does_not_compile(self):
+        # Arrange
+        template = _create_template(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+            '<xs:element name="root" type="unknown"/>'
+            "</xs:schema>"
+        )
+        xml_tree = XSDTree.build_tree("<root>1</root>")
+        # Act
+        result = registration_xml_utils.validate_xml_data(template, xml_tree)
+        # Assert
+        self.assertIsInstance(result, str)
+
+
+@patch.object(registration_xml_utils, "_validate_xml_data", return_value=None)
+class TestValidateXmlDataCache(TestCase):
+    def setUp(self):
+        registration_xml_utils.clear_validation_cache()
+
+    def test_reuses_result_for_identical_document(self, mock_validate_xml_data):
+        # Arrange
+        template = _create_template()
+        # Act
+        registration_xml_utils.validate_xml_data(
+            template, XSDTree.build_tree("<root>1</root>")
+        )
+        registration_xml_utils.validate_xml_data(
+            template, XSDTree.build_tree("<root >1</root>")
+        )
+        # Assert
+        mock_validate_xml_data.assert_called_once()
+
+    def test_reuses_error_for_identical_document(self, mock_validate_xml_data):
+        # Arrange
+        template = _create_template()
+        xml_tree = XSDTree.build_tree("<root>one</root>")
+        mock_validate_xml_data.return_value = "error"
+        registration_xml_utils.validate_xml_data(template, xml_tree)
+        # Act
+        result = registration_xml_utils.validate_xml_data(template, xml_tree)
+        # Assert
+        self.assertEqual(result, "error")
+        mock_validate_xml_data.assert_called_once()
+
+    def test_validates_other_document(self, mock_validate_xml_data):
+        # Arrange
+        template = _create_template()
+        # Act
+        registration_xml_utils.validate_xml_data(
+            template, XSDTree.build_tree("<root>1</root>")
+        )
+        registration_xml_utils.validate_xml_data(
+            template, XSDTree.build_tree("<root>2</root>")
+        )
+        # Assert
+        self.assertEqual(mock_validate_xml_data.call_count, 2)
+
+    def test_validates_against_other_schema(self, mock_validate_xml_data):
+        # Arrange
+        xml_tree = XSDTree.build_tree("<root>1</root>")
+        # Act
+        registration_xml_utils.validate_xml_data(_create_template(), xml_tree)
+        registration_xml_utils.validate_xml_data(
+            _create_template(OTHER_XSD_CONTENT), xml_tree
+        )
+        # Assert
+        self.assertEqual(mock_validate_xml_data.call_count, 2)
+
+    @patch.object(registration_xml_utils, "REGISTRATION_VALIDATION_CACHE_TTL", 0)
+    def test_validates_again_after_ttl(self, mock_validate_xml_data):
+        # Arrange
+        template = _create_template()
+        xml_tree = XSDTree.build_tree("<root>1</root>")
+        registration_xml_utils.validate_xml_data(template, xml_tree)
+        # Act
+        registration_xml_utils.validate_xml_data(template, xml_tree)
+        # Assert
+        self.assertEqual(mock_validate_xml_data.call_count, 2)
+
+    @patch.object(registration_xml_utils, "REGISTRATION_VALIDATION_CACHE_SIZE", 1)
+    def test_evicts_oldest_result(self, mock_validate_xml_data):
+        # Arrange
+        template = _create_template()
+        registration_xml_utils.validate_xml_data(
+            template, XSDTree.build_tree("<root>1</root>")
+        )
+        registration_xml_utils.validate_xml_data(
+            template, XSDTree.build_tree("<root>2</root>")
+        )
+        # Act
+        registration_xml_utils.validate_xml_data(
+            template, XSDTree.build_tree("<root>1</root>")
+        )
+        # Assert
+        self.assertEqual(mock_validate_xml_data.call_count, 3)
+
+    @patch.object(registration_xml_utils, "REGISTRATION_VALIDATION_CACHE_SIZE", 0)
+    def test_cache_can_be_disabled(self, mock_validate_xml_data):
+        # Arrange
+        template = _create_template()
+        xml_tree = XSDTree.build_tree("<root>1</root>")
+        registration_xml_utils.validate_xml_data(template, xml_tree)
+        # Act
+        registration_xml_utils.validate_xml_data(template, xml_tree)
+        # Assert
+        self.assertEqual(mock_validate_xml_data.call_count, 2)
+
+
+class TestValidateXmlContents(TestCase):
+    def test_returns_error_for_each_document(self):
+        # Act
+        result = registration_xml_utils.validate_xml_contents(
+            registration_xml_utils.SchemaSource(str(ObjectId()), XSD_CONTENT),
+            ["<root>1</root>", "<root>one</root>", "<root>"],
+        )
+        # Assert
+        self.assertEqual([error is None for error in result], [True, False, False])
+
+
+class TestValidateXmlContentsInPool(TestCase):
+    def test_yields_errors_in_input_order(self):
+        # Arrange
+        template = _create_template()
+        other_template = _create_template(OTHER_XSD_CONTENT)
+        items = [
+            (template, "<root>1</root>"),
+            (other_template, "<root>one</root>"),
+            (template, "<root>one</root>"),
+            (other_template, "<other/>"),
+            (template, "<root>2</root>"),
+        ]
+        # Act
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            result = list(
+                registration_xml_utils.validate_xml_contents_in_pool(executor, items, 2)
+            )
+        # Assert
+        self.assertEqual(
+            [error is None for error in result], [True, True, False, False, True]
+        )
+
+    def test_validates_unsaved_templates_against_their_own_schema(self):
+        # Arrange
+        template = Template(filename="schema.xsd", content=XSD_CONTENT)
+        other_template = Template(filename="other.xsd", content=OTHER_XSD_CONTENT)
+        items = [(template, "<root>1</root>"), (other_template, "<root>one</root>")]
+        # Act
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            result = list(
+                registration_xml_utils.validate_xml_contents_in_pool(executor, items, 2)
+            )
+        # Assert
+        self.assertEqual(result, [None, None])
+
+    def test_reports_items_without_template(self):
+        # Arrange
+        template = _create_template()
+        items = [(None, "<root>1</root>"), (template, "<root>2</root>")]
+        # Act
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            result = list(
+                registration_xml_utils.validate_xml_contents_in_pool(executor, items, 2)
+            )
+        # Assert
+        self.assertEqual([error is None for error in result], [False, True])
+
+    def test_reports_failed_batch_for_its_items_only(self):
+        # Arrange
+        template = _create_template()
+        other_template = _create_template(OTHER_XSD_CONTENT)
+        failed_future = Mock()
+        failed_future.result.side_effect = RuntimeError("worker died")
+        executor = Mock()
+        executor.submit.side_effect = [
+            failed_future,
+            Mock(result=Mock(return_value=[None])),
+        ]
+        items = [(template, "<root>1</root>"), (other_template, "<root>one</root>")]
+        # Act
+        result = list(
+            registration_xml_utils.validate_xml_contents_in_pool(executor, items, 1)
+        )
+        # Assert
+        self.assertEqual(result, ["worker died", None])
+
+
+class TestGetSortKeys(TestCase):
+    def test_appends_id_to_ordering(self):
+        # Act
+        result = pagination_utils.get_sort_keys(["-title", "+user_id", "workspace"])
+        # Assert
+        self.assertEqual(
+            result, [("title", -1), ("user_id", 1), ("workspace", 1), ("id", 1)]
+        )
+
+    def test_keeps_id_ordering(self):
+        # Act
+        result = pagination_utils.get_sort_keys(["-id"])
+        # Assert
+        self.assertEqual(result, [("id", -1)])
+
+
+class TestContinuationToken(TestCase):
+    def test_decode_returns_encoded_values(self):
+        # Arrange
+        sort_keys = pagination_utils.get_sort_keys(["-last_modification_date"])
+        document = Template(id=ObjectId())
+        document.last_modification_date = datetime.datetime(2020, 1, 2, 3, 4, 5)
+        # Act
+        token = pagination_utils.encode_continuation_token(document, sort_keys)
+        result = pagination_utils.decode_continuation_token(token, sort_keys)
+        # Assert
+        self.assertEqual(result, [document.last_modification_date, document.id])
+
+    def test_decode_invalid_token_raises_api_error(self):
+        # Act # Assert
+        with self.assertRaises(exceptions.ApiError):
+            pagination_utils.decode_continuation_token(
+                "not a token", pagination_utils.get_sort_keys([])
+            )
+
+    def test_decode_token_of_other_ordering_raises_api_error(self):
+        # Arrange
+        document = Template(id=ObjectId(), filename="a.xsd")
+        token = pagination_utils.encode_continuation_token(
+            document, pagination_utils.get_sort_keys(["+filename"])
+        )
+        # Act # Assert
+        with self.assertRaises(exceptions.ApiError):
+            pagination_utils.decode_continuation_token(
+                token, pagination_utils.get_sort_keys(["-filename"])
+            )
+
+
+class TestGetAfterQuery(TestCase):
+    document_id = ObjectId()
+
+    def test_ascending_null_value_matches_non_null_values(self):
+        # Act
+        result = pagination_utils._get_after_query(
+            [("filename", 1), ("id", 1)], [None, self.document_id]
+        )
+        # Assert
+        self.assertEqual(
+            result.to_query(Template),
+            {
+                "$or": [
+                    {"filename": {"$ne": None}},
+                    {"filename": None, "_id": {"$gt": self.document_id}},
+                ]
+            },
+        )
+
+    def test_descending_value_matches_null_values(self):
+        # Act
+        result = pagination_utils._get_after_query(
+            [("filename", -1), ("id", 1)], ["a", self.document_id]
+        )
+        # Assert
+        self.assertEqual(
+            result.to_query(Template),
+            {
+                "$or": [
+                    {"filename": {"$lt": "a"}},
+                    {"filename": None},
+                    {"filename": "a", "_id": {"$gt": self.document_id}},
+                ]
+            },
+        )
+
+    def test_nothing_after_last_descending_null_value(self):
+        # Act
+        result = pagination_utils._get_after_query([("id", -1)], [None])
+        # Assert
+        self.assertIsNone(result)
+
+    def test_get_page_with_invalid_page_size_raises_api_error(self):
+        # Act # Assert
+        with self.assertRaises(exceptions.ApiError):
+            pagination_utils.get_page(None, [], 0)
+
+
+@patch.object(
+    workspace_access_utils.workspace_api,
+    "get_all_workspaces_with_write_access_by_user",
+)
+@patch.object(
+    workspace_access_utils.workspace_api, "get_all_workspaces_with_read_access_by_user"
+)
+@patch.object(workspace_access_utils, "REGISTRATION_WORKSPACE_ACCESS_CACHE_TTL", 60)
+class TestGetAccessibleWorkspaces(TestCase):
+    def setUp(self):
+        workspace_access_utils.invalidate_accessible_workspaces()
+        self.user = Mock(id=1)
+
+    def _set_workspaces(self, mock_read, mock_write, read_ids, write_ids):
+        mock_read.return_value = [Mock(id=workspace_id) for workspace_id in read_ids]
+        mock_write.return_value = [Mock(id=workspace_id) for workspace_id in write_ids]
+
+    def test_returns_read_and_write_workspace_ids(self, mock_read, mock_write):
+        # Arrange
+        self._set_workspaces(mock_read, mock_write, ["a", "b"], ["b"])
+        # Act
+        result = workspace_access_utils.get_accessible_workspaces(self.user)
+        # Assert
+        self.assertEqual(result.read, ["a", "b"])
+        self.assertEqual(result.write, ["b"])
+
+    def test_caches_workspaces_of_user(self, mock_read, mock_write):
+        # Arrange
+        self._set_workspaces(mock_read, mock_write, ["a"], [])
+        workspace_access_utils.get_accessible_workspaces(self.user)
+        # Act
+        result = workspace_access_utils.get_accessible_workspaces(self.user)
+        # Assert
+        self.assertEqual(result.read, ["a"])
+        self.assertEqual(mock_read.call_count, 1)
+        self.assertEqual(mock_write.call_count, 1)
+
+    def test_caches_workspaces_by_user(self, mock_read, mock_write):
+        # Arrange
+        self._set_workspaces(mock_read, mock_write, ["a"], [])
+        workspace_access_utils.get_accessible_workspaces(self.user)
+        self._set_workspaces(mock_read, mock_write, ["b"], [])
+        # Act
+        result = workspace_access_utils.get_accessible_workspaces(Mock(id=2))
+        # Assert
+        self.assertEqual(result.read, ["b"])
+
+    def test_invalidate_user_queries_workspaces_again(self, mock_read, mock_write):
+        # Arrange
+        self._set_workspaces(mock_read, mock_write, ["a"], [])
+        workspace_access_utils.get_accessible_workspaces(self.user)
+        self._set_workspaces(mock_read, mock_write, ["b"], [])
+        # Act
+        workspace_access_utils.invalidate_accessible_workspaces(self.user.id)
+        result = workspace_access_utils.get_accessible_workspaces(self.user)
+        # Assert
+        self.assertEqual(result.read, ["b"])
+
+    def test_workspace_change_invalidates_all_users(self, mock_read, mock_write):
+        # Arrange
+        self._set_workspaces(mock_read, mock_write, ["a"], [])
+        workspace_access_utils.get_accessible_workspaces(self.user)
+        self._set_workspaces(mock_read, mock_write, ["b"], [])
+        # Act
+        mongoengine_signals.post_save.send(Workspace, document=Mock())
+        result = workspace_access_utils.get_accessible_workspaces(self.user)
+        # Assert
+        self.assertEqual(result.read, ["b"])
+
+    def test_cache_disabled_queries_workspaces(self, mock_read, mock_write):
+        # Arrange
+        self._set_workspaces(mock_read, mock_write, ["a"], [])
+        # Act
+        with patch.object(
+            workspace_access_utils, "REGISTRATION_WORKSPACE_ACCESS_CACHE_TTL", 0
+        ):
+            workspace_access_utils.get_accessible_workspaces(self.user)
+            workspace_access_utils.get_accessible_workspaces(self.user)
+        # Assert
+        self.assertEqual(mock_read.call_count, 2)
+
+
+@patch.object(workspace_access_utils, "invalidate_accessible_workspaces")
+class TestAccessibleWorkspacesInvalidation(DjangoTestCase):
+    def setUp(self):
+        Group.objects.get_or_create(name=rights.default_group)
+        self.user = User.objects.create(username="user")
+        self.group = Group.objects.create(name="group")
+        self.permission = Permission.objects.create(
+            codename="read_workspace",
+            name="read workspace",
+            content_type=ContentType.objects.get_for_model(User),
+        )
+
+    def test_user_permission_change_invalidates_user(self, mock_invalidate):
+        # Act
+        self.user.user_permissions.add(self.permission)
+        # Assert
+        mock_invalidate.assert_called_once_with(self.user.pk)
+
+    def test_user_group_change_invalidates_user(self, mock_invalidate):
+        # Act
+        self.user.groups.add(self.group)
+        # Assert
+        mock_invalidate.assert_called_once_with(self.user.pk)
+
+    def test_permission_given_to_users_invalidates_all_users(self, mock_invalidate):
+        # Act
+        self.permission.user_set.add(self.user)
+        # Assert
+        mock_invalidate.assert_called_once_with(None)
+
+    def test_group_permission_change_invalidates_all_users(self, mock_invalidate):
+        # Act
+        self.group.permissions.add(self.permission)
+        # Assert
+        mock_invalidate.assert_called_once_with()
+
+
+class TestIsValidationRequestDependent(TestCase):
+    @patch.object(registration_xml_utils, "XERCES_VALIDATION", False)
+    @patch.object(registration_xml_utils, "XSD_URI_RESOLVER", "REQUESTS_RESOLVER")
+    def test_uri_resolver_depends_on_request(self):
+        # Act # Assert
+        self.assertTrue(registration_xml_utils.is_validation_request_dependent())
+
+    @patch.object(registration_xml_utils, "XERCES_VALIDATION", False)
+    @patch.object(registration_xml_utils, "XSD_URI_RESOLVER", None)
+    def test_no_uri_resolver_does_not_depend_on_request(self):
+        # Act # Assert
+        self.assertFalse(registration_xml_utils.is_validation_request_dependent())
@@ -0,0 +1,115 @@
+""" Unit Test user AJAX views
+"""
+from unittest.case import TestCase
+
+from bson.objectid import ObjectId
+from django.test import RequestFactory
+from mock import patch, Mock
+
+from core_main_app.commons.exceptions import XMLError
+from core_main_app.components.template.models import Template
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_user_registration_app.components.user_metadata.models import UserMetadata
+from core_user_registration_app.utils import xml as registration_xml_utils
+from core_user_registration_app.views.user import ajax as user_ajax
+
+XSD_CONTENT = (
+    '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+    '<xs:element name="root" type="xs:integer"/></xs:schema>'
+)
+
+
+@patch.object(user_ajax.messages, "add_message")
+@patch.object(user_ajax.user_data_structure_api, "delete")
+@patch.object(user_ajax.account_request_metadata_api, "insert_metadata")
+@patch.object(user_ajax.workspace_api, "get_global_workspace")
+@patch.object(user_ajax.data_api, "upsert")
+@patch.object(user_ajax.user_data_structure_api, "upsert")
+@patch.object(user_ajax.user_data_structure_api, "get_by_id")
+@patch.object(user_ajax, "render_xml", return_value="<root>1</root>")
+class TestSaveData(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().post("save-data", {"id": "1", "metadata": "2"})
+        self.request.user = create_mock_user("1")
+
+    def test_renders_once_and_passes_tree_to_metadata_api(
+        self,
+        mock_render_xml,
+        mock_get_by_id,
+        mock_data_structure_upsert,
+        mock_data_upsert,
+        *args
+    ):
+        # Arrange
+        mock_get_by_id.return_value = Mock(pk=None, template=None)
+        mock_data_upsert.side_effect = lambda data, request, xml_tree: data
+        # Act
+        response = user_ajax.save_data(self.request)
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        mock_render_xml.assert_called_once()
+        self.assertEqual(
+            mock_data_upsert.call_args[1]["xml_tree"].getroot().tag, "root"
+        )
+
+    def test_returns_bad_request_if_data_is_invalid(
+        self,
+        mock_render_xml,
+        mock_get_by_id,
+        mock_data_structure_upsert,
+        mock_data_upsert,
+        mock_get_global_workspace,
+        mock_insert_metadata,
+        *args
+    ):
+        # Arrange
+        mock_get_by_id.return_value = Mock(pk=None, template=None)
+        mock_data_upsert.side_effect = XMLError("invalid")
+        # Act
+        response = user_ajax.save_data(self.request)
+        # Assert
+        self.assertEqual(response.status_code, 400)
+        mock_insert_metadata.assert_not_called()
+
+
+@patch.object(user_ajax.messages, "add_message")
+@patch.object(user_ajax.user_data_structure_api, "delete")
+@patch.object(user_ajax.account_request_metadata_api, "insert_metadata")
+@patch.object(user_ajax.workspace_api, "get_global_workspace")
+@patch.object(UserMetadata, "convert_and_save", autospec=True)
+@patch.object(user_ajax.user_data_structure_api, "upsert")
+@patch.object(user_ajax.user_data_structure_api, "get_by_id")
+@patch.object(user_ajax, "render_xml", return_value="<root>1</root>")
+@patch.object(registration_xml_utils, "XERCES_VALIDATION", False)
+@patch.object(registration_xml_utils, "lmxl_uri_resolver", return_value=None)
+class TestSaveDataValidation(TestCase):
+    def setUp(self):
+        registration_xml_utils.invalidate_schema_cache()
+        registration_xml_utils.clear_validation_cache()
+        self.request = RequestFactory().post("save-data", {"id": "1", "metadata": "2"})
+        self.request.user = create_mock_user("1")
+        self.request.session = Mock(session_key="session")
+
+    def test_schema_resolver_receives_session_of_request(
+        self,
+        mock_lmxl_uri_resolver,
+        mock_render_xml,
+        mock_get_by_id,
+        mock_data_structure_upsert,
+        mock_convert_and_save,
+        *args
+    ):
+        # Arrange
+        mock_get_by_id.return_value = Mock(
+            pk=None, template=Template(id=ObjectId(), content=XSD_CONTENT)
+        )
+        mock_get_by_id.return_value.name = "data"
+        mock_convert_and_save.side_effect = lambda data: data
+        # Act
+        response = user_ajax.save_data(self.request)
+        # Assert
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            mock_lmxl_uri_resolver.call_args[1]["request"].session.session_key,
+            "session",
+        )